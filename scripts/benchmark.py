@@ -0,0 +1,472 @@
+#!/usr/bin/env python3
+"""
+Benchmark the session index, search, diagram validation and deck builds.
+
+Usage:
+    python scripts/benchmark.py [--suite chunking,indexing,query,validation,deck]
+                                [--sessions 200] [--slides 30] [--queries 200]
+                                [-o benchmark.json] [--baseline baseline.json]
+
+Generates a synthetic corpus (synthetic_corpus.py) in a temporary folder,
+or in --corpus-dir, and measures:
+
+- chunking: chunk_markdown and MinHash throughput over the session files
+- indexing: a full index build, a no-op run and an incremental run after
+  editing a few files
+- query: p50/p95/p99 latency of in-process vector, lexical and hybrid search
+- validation: per-diagram latency of run_tests.py on the test fixtures,
+  in --fast mode and, where mmdc or Matplotlib can run, in full
+- deck: chart generation and SVG optimization (time and bytes saved) for
+  a generated deck, then, when Marp CLI is installed, an HTML export with
+  the raw SVGs, a build with optimized ones and a no-op rebuild
+
+Everything runs offline: instead of the sentence-transformers model, the
+indexer and searcher get a hashed bag-of-words embedder with the same
+interface, so the numbers measure this repo's code rather than the model.
+
+Results are printed and written as JSON. With --baseline, metrics are
+compared against an earlier results file and the run exits with status 1
+if any regressed by more than --threshold. Timings are in milliseconds
+(lower is better); metrics ending in _per_s are throughputs (higher is
+better). Changes smaller than NOISE_FLOOR_MS are never flagged.
+
+Options:
+    --suite NAMES     Comma-separated suites to run (default: all)
+    --sessions N      Session files to generate (default: 200)
+    --slides N        Slides in the generated deck (default: 30)
+    --queries N       Queries per search mode (default: 200)
+    --repeat N        Timed repetitions for chunking and validation (default: 5)
+    --seed N          Corpus seed (default: 0)
+    --corpus-dir DIR  Generate the corpus here and keep it
+    -o, --output FILE Results file (default: benchmark.json)
+    --baseline FILE   Compare against an earlier results file
+    --threshold F     Relative change counted as a regression (default: 0.15)
+"""
+
+import argparse
+import contextlib
+import io
+import json
+import os
+import platform
+import random
+import shutil
+import statistics
+import subprocess
+import sys
+import tempfile
+import time
+import zlib
+from importlib.metadata import PackageNotFoundError, version as package_version
+from pathlib import Path
+
+import index_sessions
+import search_sessions
+from synthetic_corpus import TextSource, generate_decks, generate_sessions
+
+PROJECT_ROOT = Path(__file__).resolve().parent.parent
+sys.path.insert(0, str(PROJECT_ROOT / "tests" / "diagrams"))
+
+
+# Lazy imports for optional dependencies
+def get_dependencies():
+    """Import heavy dependencies only when needed."""
+    try:
+        import faiss
+        import numpy as np
+        return faiss, np
+    except ImportError as e:
+        print(f"Missing dependency: {e}")
+        print("Install with: pip install faiss-cpu numpy")
+        sys.exit(1)
+
+
+# Configuration
+SUITES = ("chunking", "indexing", "query", "validation", "deck")
+RESULTS_VERSION = 1
+DEFAULT_OUTPUT = "benchmark.json"
+DEFAULT_QUERIES = 200
+DEFAULT_REPEAT = 5
+DEFAULT_THRESHOLD = 0.15      # 15% slower (or lower throughput) is a regression
+NOISE_FLOOR_MS = 1.0          # Absolute changes below this are never regressions
+EDITED_FILE_FRACTION = 0.05   # Share of session files changed for the incremental run
+STAND_IN_DIM = 384            # Same width as all-MiniLM-L6-v2
+QUERY_MODES = search_sessions.SEARCH_MODES
+PERCENTILES = (50, 95, 99)
+
+RED = '\033[0;31m'
+GREEN = '\033[0;32m'
+YELLOW = '\033[1;33m'
+NC = '\033[0m'
+
+
+class HashingEmbedder:
+    """
+    Offline stand-in for SentenceTransformer.
+
+    Embeds text as a signed, hashed bag of words: texts sharing words get
+    similar vectors, which is enough for search to return sensible results.
+    """
+
+    def __init__(self, model_name: str = None, dim: int = STAND_IN_DIM):
+        _, self.np = get_dependencies()
+        self.dim = dim
+
+    def encode(self, texts: list[str], show_progress_bar: bool = False):
+        vectors = self.np.zeros((len(texts), self.dim), dtype='float32')
+        for row, text in enumerate(texts):
+            for word in index_sessions.WORD.findall(text.lower()):
+                h = zlib.crc32(word.encode('utf-8'))
+                vectors[row, h % self.dim] += 1.0 if h & 0x80000000 else -1.0
+        return vectors
+
+
+@contextlib.contextmanager
+def offline_model():
+    """Give the indexer and searcher the stand-in embedder instead of the real model."""
+    faiss, np = get_dependencies()
+    saved = index_sessions.get_dependencies, search_sessions.get_dependencies
+
+    def stand_in():
+        return HashingEmbedder, faiss, np
+
+    index_sessions.get_dependencies = search_sessions.get_dependencies = stand_in
+    try:
+        yield
+    finally:
+        index_sessions.get_dependencies, search_sessions.get_dependencies = saved
+
+
+@contextlib.contextmanager
+def in_directory(path: Path):
+    """Run with `path` as the working directory (index paths are relative)."""
+    previous = os.getcwd()
+    os.chdir(path)
+    try:
+        yield
+    finally:
+        os.chdir(previous)
+
+
+def timed(fn, *args, **kwargs) -> float:
+    """Milliseconds taken by fn(*args, **kwargs), with its output discarded."""
+    with contextlib.redirect_stdout(io.StringIO()):
+        start = time.perf_counter()
+        fn(*args, **kwargs)
+        return (time.perf_counter() - start) * 1000
+
+
+def percentile(values: list[float], p: int) -> float:
+    if len(values) == 1:
+        return values[0]
+    return statistics.quantiles(values, n=100, method='inclusive')[p - 1]
+
+
+def bench_chunking(corpus: Path, repeat: int) -> dict:
+    files = index_sessions.find_session_files(str(corpus / index_sessions.SESSION_LOGS_DIR))
+    texts = [(path.read_text(), str(path)) for path in files]
+    megabytes = sum(len(text.encode('utf-8')) for text, _ in texts) / 2**20
+
+    chunk_ms = []
+    for _ in range(repeat):
+        start = time.perf_counter()
+        chunks = [c for text, path in texts for c in index_sessions.chunk_markdown(text, path)]
+        chunk_ms.append((time.perf_counter() - start) * 1000)
+    minhash_ms = []
+    for _ in range(repeat):
+        start = time.perf_counter()
+        for chunk in chunks:
+            index_sessions.minhash_signature(chunk["text"])
+        minhash_ms.append((time.perf_counter() - start) * 1000)
+
+    chunk_s = statistics.median(chunk_ms) / 1000
+    minhash_s = statistics.median(minhash_ms) / 1000
+    return {
+        "chunking.mb_per_s": megabytes / chunk_s,
+        "chunking.chunks_per_s": len(chunks) / chunk_s,
+        "chunking.minhash_chunks_per_s": len(chunks) / minhash_s,
+        "chunking.files": len(files),
+        "chunking.chunks": len(chunks),
+    }
+
+
+def bench_indexing(corpus: Path, seed: int) -> dict:
+    index_dir = corpus / index_sessions.INDEX_DIR
+    shutil.rmtree(index_dir, ignore_errors=True)
+    with in_directory(corpus), offline_model():
+        full_ms = timed(index_sessions.build_index)
+        noop_ms = timed(index_sessions.build_index)
+
+        files = index_sessions.find_session_files(index_sessions.SESSION_LOGS_DIR)
+        text = TextSource(random.Random(seed))
+        edited = files[::max(1, round(1 / EDITED_FILE_FRACTION))]
+        for path in edited:
+            with open(path, "a") as f:
+                f.write(f"\n## User\n\n{text.paragraph()}\n")
+        incremental_ms = timed(index_sessions.build_index)
+
+        store = index_sessions.open_chunk_store()
+        vectors = store.count()
+        store.close()
+    return {
+        "indexing.full_ms": full_ms,
+        "indexing.noop_ms": noop_ms,
+        "indexing.incremental_ms": incremental_ms,
+        "indexing.edited_files": len(edited),
+        "indexing.vectors": vectors,
+    }
+
+
+def bench_query(corpus: Path, num_queries: int, seed: int) -> dict:
+    rng = random.Random(seed)
+    text = TextSource(rng)
+    queries = [" ".join(text.words(rng.randint(2, 5))) for _ in range(num_queries)]
+    metrics = {}
+    with in_directory(corpus), offline_model():
+        searcher = search_sessions.SessionSearcher()
+        start = time.perf_counter()
+        searcher.warm()
+        metrics["query.load_ms"] = (time.perf_counter() - start) * 1000
+        for mode in QUERY_MODES:
+            latencies = []
+            for query in queries:
+                start = time.perf_counter()
+                searcher.search(query, k=5, mode=mode)
+                latencies.append((time.perf_counter() - start) * 1000)
+            for p in PERCENTILES:
+                metrics[f"query.{mode}.p{p}_ms"] = percentile(latencies, p)
+        if searcher.store is not None:
+            searcher.store.close()
+    return metrics
+
+
+def bench_validation(repeat: int) -> dict:
+    import run_tests
+
+    fixtures_dir = PROJECT_ROOT / "tests" / "diagrams" / "fixtures"
+    # Time validations, not the one-off chart server start
+    run_tests.shared_runner().warm()
+    metrics = {}
+    for test_id in run_tests.list_tests(fixtures_dir):
+        _, code = run_tests.load_test_fixture(fixtures_dir, test_id)
+        if code is None:
+            continue
+        fast = []
+        for _ in range(repeat):
+            start = time.perf_counter()
+            run_tests.validate_diagram(code, test_id, fast_only=True)
+            fast.append((time.perf_counter() - start) * 1000)
+        metrics[f"validation.fast.{test_id}_ms"] = statistics.median(fast)
+
+        # Full validation renders or runs the code; only time runs that did
+        full = []
+        for _ in range(repeat):
+            start = time.perf_counter()
+            result = run_tests.validate_diagram(code, test_id)
+            full.append((time.perf_counter() - start) * 1000)
+            if not result.passed:
+                break
+        else:
+            metrics[f"validation.full.{test_id}_ms"] = statistics.median(full)
+    return metrics
+
+
+def bench_deck(corpus: Path, slides: int, seed: int) -> dict:
+    from build import build, export, marp_version, resolve_theme, theme_index
+    from build_charts import build_charts, find_img_dir
+    from chart_runner import shared_runner
+    from deck_parser import parse_frontmatter
+    from optimize_svg import optimize_images
+
+    deck = generate_decks(corpus, 1, slides, seed)[0]
+    img_dir = find_img_dir(deck)
+    output_dir = deck.parent / "output"
+    shared_runner().warm()
+    metrics = {"deck.charts_ms": timed(build_charts, img_dir, force=True)}
+    raw_svgs = {path: path.read_bytes() for path in img_dir.glob("*.svg")}
+    raw_html_ms = None
+    if marp_version() is not None:
+        theme_files = resolve_theme(parse_frontmatter(deck.read_text()).get("theme"), theme_index())
+        raw_html_ms = timed(export, deck, "html", output_dir / "raw.html", theme_files)
+
+    metrics["deck.svg_optimize_ms"] = timed(optimize_images, img_dir, force=True, quiet=True)
+    metrics["deck.svg_bytes"] = sum(map(len, raw_svgs.values()))
+    metrics["deck.svg_bytes_saved"] = metrics["deck.svg_bytes"] - sum(
+        path.stat().st_size for path in raw_svgs)
+    if raw_html_ms is None:
+        print(f"{YELLOW}  deck: exports skipped (Marp CLI not installed){NC}")
+        return metrics
+    metrics.update({
+        "deck.html_raw_svg_ms": raw_html_ms,
+        "deck.html_ms": timed(build, deck, ["html"], output_dir, force=True),
+        "deck.noop_ms": timed(build, deck, ["html"], output_dir),
+    })
+    return metrics
+
+
+def environment() -> dict:
+    """Versions and machine details recorded alongside results."""
+    def installed(name):
+        try:
+            return package_version(name)
+        except PackageNotFoundError:
+            return None
+
+    try:
+        commit = subprocess.run(["git", "rev-parse", "--short", "HEAD"], cwd=PROJECT_ROOT,
+                                capture_output=True, text=True).stdout.strip() or None
+    except OSError:
+        commit = None
+    return {
+        "commit": commit,
+        "python": platform.python_version(),
+        "platform": platform.platform(),
+        "cpus": os.cpu_count(),
+        "numpy": installed("numpy"),
+        "faiss": installed("faiss-cpu") or installed("faiss"),
+        "matplotlib": installed("matplotlib"),
+    }
+
+
+def is_throughput(name: str) -> bool:
+    return name.endswith("_per_s")
+
+
+def is_timing(name: str) -> bool:
+    return name.endswith("_ms")
+
+
+def compare(metrics: dict, baseline: dict, threshold: float) -> list[tuple[str, float, float, float]]:
+    """
+    Regressions against a baseline's metrics.
+
+    Returns (name, baseline, current, relative change) for each timing or
+    throughput that got worse by more than threshold. Counts are ignored.
+    """
+    regressions = []
+    for name, current in metrics.items():
+        before = baseline.get(name)
+        if not before or not (is_timing(name) or is_throughput(name)):
+            continue
+        change = (current - before) / before
+        worse = -change if is_throughput(name) else change
+        if is_timing(name) and abs(current - before) < NOISE_FLOOR_MS:
+            continue
+        if worse > threshold:
+            regressions.append((name, before, current, change))
+    return regressions
+
+
+def format_value(name: str, value: float) -> str:
+    if is_timing(name):
+        return f"{value:.3f} ms" if value < 10 else f"{value:.1f} ms"
+    if is_throughput(name):
+        return f"{value:,.1f}/s"
+    return str(value)
+
+
+def print_metrics(metrics: dict, baseline: dict = None):
+    width = max(len(name) for name in metrics)
+    for name, value in metrics.items():
+        line = f"  {name:<{width}} {format_value(name, value):>16}"
+        before = (baseline or {}).get(name)
+        if before and (is_timing(name) or is_throughput(name)):
+            line += f" {(value - before) / before:>+8.1%}"
+        print(line)
+
+
+def run(suites: list[str], corpus: Path, args) -> dict:
+    if any(suite in suites for suite in ("chunking", "indexing", "query")):
+        generate_sessions(corpus, args.sessions, args.seed)
+
+    metrics = {}
+    for suite in suites:
+        print(f"{YELLOW}Running {suite} benchmark...{NC}")
+        if suite == "chunking":
+            metrics.update(bench_chunking(corpus, args.repeat))
+        elif suite == "indexing":
+            metrics.update(bench_indexing(corpus, args.seed))
+        elif suite == "query":
+            if not (corpus / index_sessions.INDEX_FILE).exists():
+                bench_indexing(corpus, args.seed)
+            metrics.update(bench_query(corpus, args.queries, args.seed))
+        elif suite == "validation":
+            metrics.update(bench_validation(args.repeat))
+        elif suite == "deck":
+            metrics.update(bench_deck(corpus, args.slides, args.seed))
+    return metrics
+
+
+def main():
+    parser = argparse.ArgumentParser(
+        description="Benchmark indexing, search, diagram validation and deck builds"
+    )
+    parser.add_argument("--suite", default=",".join(SUITES),
+                        help=f"Comma-separated suites to run (default: {','.join(SUITES)})")
+    parser.add_argument("--sessions", type=int, default=200,
+                        help="Session files to generate (default: 200)")
+    parser.add_argument("--slides", type=int, default=30,
+                        help="Slides in the generated deck (default: 30)")
+    parser.add_argument("--queries", type=int, default=DEFAULT_QUERIES,
+                        help=f"Queries per search mode (default: {DEFAULT_QUERIES})")
+    parser.add_argument("--repeat", type=int, default=DEFAULT_REPEAT,
+                        help=f"Timed repetitions for chunking and validation (default: {DEFAULT_REPEAT})")
+    parser.add_argument("--seed", type=int, default=0, help="Corpus seed (default: 0)")
+    parser.add_argument("--corpus-dir", default=None, help="Generate the corpus here and keep it")
+    parser.add_argument("-o", "--output", default=DEFAULT_OUTPUT,
+                        help=f"Results file (default: {DEFAULT_OUTPUT})")
+    parser.add_argument("--baseline", default=None, help="Compare against an earlier results file")
+    parser.add_argument("--threshold", type=float, default=DEFAULT_THRESHOLD,
+                        help=f"Relative change counted as a regression (default: {DEFAULT_THRESHOLD})")
+    args = parser.parse_args()
+
+    suites = [s.strip() for s in args.suite.split(",") if s.strip()]
+    unknown = [s for s in suites if s not in SUITES]
+    if unknown:
+        parser.error(f"unknown suite(s): {', '.join(unknown)} (choose from {', '.join(SUITES)})")
+
+    baseline = None
+    if args.baseline:
+        try:
+            baseline = json.loads(Path(args.baseline).read_text())["metrics"]
+        except (OSError, ValueError, KeyError) as e:
+            print(f"{RED}Error: cannot read baseline {args.baseline}: {e}{NC}")
+            sys.exit(1)
+
+    if args.corpus_dir:
+        corpus = Path(args.corpus_dir).resolve()
+        corpus.mkdir(parents=True, exist_ok=True)
+        metrics = run(suites, corpus, args)
+    else:
+        with tempfile.TemporaryDirectory(prefix="deck-forge-bench-") as tmp:
+            metrics = run(suites, Path(tmp), args)
+
+    results = {
+        "version": RESULTS_VERSION,
+        "created": time.strftime("%Y-%m-%dT%H:%M:%S"),
+        "environment": environment(),
+        "config": {"suites": suites, "sessions": args.sessions, "slides": args.slides,
+                   "queries": args.queries, "repeat": args.repeat, "seed": args.seed,
+                   "embedding_model": "stand-in (hashed bag of words)"},
+        "metrics": metrics,
+    }
+    index_sessions.write_json_atomic(args.output, results)
+
+    print(f"{GREEN}Benchmark results{NC}" + (f" (vs {args.baseline})" if baseline else ""))
+    if metrics:
+        print_metrics(metrics, baseline)
+    print(f"Results saved to: {args.output}")
+
+    if baseline is not None:
+        regressions = compare(metrics, baseline, args.threshold)
+        if regressions:
+            print(f"{RED}{len(regressions)} regression(s) beyond {args.threshold:.0%}:{NC}")
+            for name, before, current, change in regressions:
+                print(f"{RED}  {name}: {format_value(name, before)} -> "
+                      f"{format_value(name, current)} ({change:+.1%}){NC}")
+            sys.exit(1)
+        print(f"{GREEN}No regressions beyond {args.threshold:.0%}{NC}")
+
+
+if __name__ == "__main__":
+    main()
@@ -0,0 +1,333 @@
+#!/usr/bin/env python3
+"""
+Build a Marp deck to HTML, PDF and PowerPoint, skipping formats that are up to date.
+
+Usage:
+    python scripts/build.py <preview|html|pdf|pptx|all> <deck.md> [output_dir]
+
+Each build first regenerates any chart scripts in img/ whose inputs changed
+(see build_charts.py), then resolves the deck's dependency set: the markdown, the theme named
+in its frontmatter (plus any local themes that theme @imports), and the
+local images and SVGs it references. The set is hashed per format and
+recorded in output_dir/.build-manifest.json, so a format whose output
+exists and whose hash is unchanged is skipped. Only the deck's own theme
+is passed to Marp, rather than every CSS file under themes/. `all` exports
+the stale formats concurrently, and every build ends with a per-stage
+timing summary.
+
+Before hashing, the SVGs in img/ are minified in place (see
+optimize_svg.py); only SVGs written since the last build are processed.
+With --png-dpi, PPTX is exported from a copy of the deck that uses PNG
+renderings of the SVGs wherever the PNG is smaller.
+
+With --per-slide, PDF and PPTX are built slide by slide instead: only
+slides whose content changed are re-rendered, and the output is stitched
+from cached pages (see slide_build.py; needs pypdf and python-pptx).
+
+Options:
+    --force     Rebuild even if outputs are up to date
+    --per-slide Re-render only changed slides for PDF and PPTX
+    --png-dpi   Use PNGs rendered at this DPI (default 192) for PPTX where smaller
+    -j, --jobs  Formats to export at once (default: all of them)
+"""
+
+import argparse
+import hashlib
+import json
+import os
+import re
+import shutil
+import subprocess
+import sys
+import threading
+import time
+from concurrent.futures import ThreadPoolExecutor
+from pathlib import Path
+from typing import Optional
+
+from build_charts import IMG_DIRNAME, build_charts
+from deck_parser import parse_deck, parse_frontmatter
+from optimize_svg import DEFAULT_PNG_DPI, cheaper_pngs, format_bytes, optimize_images, with_pngs
+
+
+PROJECT_ROOT = Path(__file__).resolve().parent.parent
+THEMES_DIR = PROJECT_ROOT / "themes"
+FORMATS = {"html": "--html", "pdf": "--pdf", "pptx": "--pptx"}
+MANIFEST_NAME = ".build-manifest.json"
+DEFAULT_OUTPUT_DIR = "./output"
+
+THEME_NAME = re.compile(r"/\*\s*@theme\s+([\w-]+)\s*\*/")
+THEME_IMPORT = re.compile(r"@import\s+['\"]([\w-]+)['\"]")
+
+RED = '\033[0;31m'
+GREEN = '\033[0;32m'
+YELLOW = '\033[1;33m'
+NC = '\033[0m'
+
+
+def theme_index(themes_dir: Path = THEMES_DIR) -> dict[str, Path]:
+    """Map each theme name (from its /* @theme name */ comment) to its CSS file."""
+    themes = {}
+    for path in sorted(themes_dir.rglob("*.css")):
+        with open(path, errors="replace") as f:
+            match = THEME_NAME.search(f.read(4096))
+        if match:
+            themes[match.group(1)] = path
+    return themes
+
+
+def resolve_theme(name: Optional[str], themes: dict[str, Path]) -> list[Path]:
+    """
+    CSS files for a theme: its own file and the local themes it @imports.
+
+    Empty for Marp's built-in themes (default, gaia, uncover) and unknown names.
+    """
+    files = []
+    pending = [name] if name else []
+    while pending:
+        path = themes.get(pending.pop())
+        if path is None or path in files:
+            continue
+        files.append(path)
+        pending.extend(THEME_IMPORT.findall(path.read_text(errors="replace")))
+    return files
+
+
+def marp_version() -> Optional[str]:
+    """Installed Marp CLI version, read from its package.json without starting node."""
+    marp = shutil.which("marp")
+    if marp is None:
+        return None
+    for parent in Path(os.path.realpath(marp)).parents:
+        package = parent / "package.json"
+        if package.exists():
+            try:
+                return json.loads(package.read_text()).get("version", "unknown")
+            except (OSError, ValueError):
+                return "unknown"
+    return "unknown"
+
+
+def dependency_hash(files: list[Path], version: Optional[str]) -> str:
+    """
+    Hash of the dependency set's contents and the Marp version.
+
+    Missing files hash as missing, so creating one later triggers a rebuild.
+    """
+    digest = hashlib.sha256()
+    digest.update(f"marp {version}\0".encode())
+    for path in files:
+        digest.update(str(path).encode('utf-8') + b'\0')
+        if path.is_file():
+            digest.update(hashlib.sha256(path.read_bytes()).digest())
+        else:
+            digest.update(b'missing\0')
+    return digest.hexdigest()
+
+
+def format_hash(deps_hash: str, fmt: str) -> str:
+    return hashlib.sha256(f"{deps_hash}\0{fmt}".encode()).hexdigest()
+
+
+class Manifest:
+    """Per-output dependency hashes, saved atomically after each export. Thread-safe."""
+
+    def __init__(self, output_dir: Path):
+        self.path = output_dir / MANIFEST_NAME
+        self._lock = threading.Lock()
+        try:
+            self.hashes = json.loads(self.path.read_text())
+        except (OSError, ValueError):
+            self.hashes = {}
+
+    def is_current(self, output_file: Path, expected: str) -> bool:
+        return output_file.exists() and self.hashes.get(output_file.name) == expected
+
+    def record(self, output_file: Path, value: str):
+        with self._lock:
+            self.hashes[output_file.name] = value
+            tmp_path = self.path.with_name(f".{self.path.name}.tmp")
+            tmp_path.write_text(json.dumps(self.hashes, indent=2, sort_keys=True))
+            os.replace(tmp_path, self.path)
+
+
+def marp_command(input_path: Path, theme_files: list[Path], *args: str) -> list[str]:
+    command = ["marp", str(input_path), *args]
+    if theme_files:
+        command += ["--theme-set", *map(str, theme_files)]
+    return command
+
+
+def export(input_path: Path, fmt: str, output_file: Path, theme_files: list[Path]) -> tuple[bool, str]:
+    """Run one Marp export. Returns (ok, error output)."""
+    result = subprocess.run(
+        marp_command(input_path, theme_files, "-o", str(output_file), FORMATS[fmt]),
+        capture_output=True, text=True
+    )
+    return result.returncode == 0, (result.stderr or result.stdout).strip()
+
+
+def print_timings(timings: list[tuple[str, str]]):
+    width = max(len(stage) for stage, _ in timings)
+    print(f"\n{'Stage':<{width}}  Time")
+    for stage, value in timings:
+        print(f"{stage:<{width}}  {value}")
+
+
+def build(input_path: Path, formats: list[str], output_dir: Path, force: bool = False,
+          jobs: Optional[int] = None, per_slide: bool = False, png_dpi: Optional[int] = None) -> int:
+    """
+    Export the deck to each of `formats`, skipping outputs that are up to date.
+
+    png_dpi (whole-deck PPTX only) swaps SVGs for PNGs rendered at that DPI
+    where the PNG is smaller. Returns the number of chart scripts and
+    formats that failed.
+    """
+    start = time.perf_counter()
+    timings = []
+    img_dir = input_path.parent / IMG_DIRNAME
+    png_dpi = png_dpi if "pptx" in formats and not per_slide else None
+
+    stage = time.perf_counter()
+    cached, ran, chart_failures = build_charts(img_dir, quiet=True)
+    if cached or ran or chart_failures:
+        timings.append(("charts", f"{time.perf_counter() - stage:.2f}s ({ran} run, {cached} cached)"))
+
+    stage = time.perf_counter()
+    svgs = optimize_images(img_dir, png_dpi, quiet=True)
+    if svgs.optimized or svgs.cached:
+        timings.append(("optimize", f"{time.perf_counter() - stage:.2f}s ({svgs.optimized} optimized, "
+                                    f"{svgs.cached} cached, {format_bytes(svgs.saved)} saved"
+                                    + (f", {svgs.rasterized} PNG(s)" if png_dpi else "") + ")"))
+
+    stage = time.perf_counter()
+    deck = parse_deck(input_path.read_text())
+    theme = deck.frontmatter.get("theme")
+    theme_files = resolve_theme(theme, theme_index())
+    assets = deck.local_files(input_path.parent)
+    version = marp_version()
+    timings.append(("resolve", f"{time.perf_counter() - stage:.2f}s"))
+    if theme and not theme_files:
+        print(f"{YELLOW}Theme '{theme}' is not in themes/; using Marp's built-in themes{NC}")
+    missing = [path for path in assets if not path.is_file()]
+    for path in missing:
+        print(f"{YELLOW}Warning: referenced file not found: {path}{NC}")
+
+    stage = time.perf_counter()
+    deps_hash = dependency_hash([input_path.resolve(), *theme_files, *assets], version)
+    timings.append(("hash", f"{time.perf_counter() - stage:.2f}s "
+                            f"({1 + len(theme_files) + len(assets) - len(missing)} files)"))
+
+    def output_hash(fmt: str) -> str:
+        return format_hash(deps_hash, f"{fmt}@{png_dpi}dpi" if fmt == "pptx" and png_dpi else fmt)
+
+    output_dir.mkdir(parents=True, exist_ok=True)
+    manifest = Manifest(output_dir)
+    stale = []
+    for fmt in formats:
+        output_file = output_dir / f"{input_path.stem}.{fmt}"
+        if not force and manifest.is_current(output_file, output_hash(fmt)):
+            print(f"{GREEN}Up to date: {output_file}{NC}")
+        else:
+            stale.append((fmt, output_file))
+
+    # PPTX source with the cheaper PNGs in place of SVGs, next to the deck so paths resolve
+    pptx_source = None
+    if png_dpi and any(fmt == "pptx" for fmt, _ in stale):
+        text = with_pngs(input_path.read_text(), input_path.parent, cheaper_pngs(img_dir, png_dpi))
+        if text is not None:
+            pptx_source = input_path.with_name(f".{input_path.stem}.pptx.md")
+            pptx_source.write_text(text)
+
+    def run(item):
+        fmt, output_file = item
+        print(f"{YELLOW}Building {fmt}...{NC}")
+        stage = time.perf_counter()
+        if per_slide and fmt != "html":
+            from slide_build import export_slides
+            ok, error = export_slides(input_path, fmt, output_file, theme_files, version)
+        else:
+            source = pptx_source if fmt == "pptx" and pptx_source else input_path
+            ok, error = export(source, fmt, output_file, theme_files)
+        elapsed = time.perf_counter() - stage
+        if ok:
+            manifest.record(output_file, output_hash(fmt))
+            print(f"{GREEN}Created: {output_file}{NC}")
+        else:
+            print(f"{RED}Failed to build {fmt}:{NC}\n{error}", file=sys.stderr)
+        return ok, elapsed
+
+    if per_slide:
+        from slide_build import get_dependencies
+        for fmt, _ in stale:
+            if fmt != "html":
+                get_dependencies(fmt)
+
+    results = {}
+    try:
+        if stale:
+            with ThreadPoolExecutor(max_workers=jobs or len(stale)) as pool:
+                results = dict(zip((fmt for fmt, _ in stale), pool.map(run, stale)))
+    finally:
+        if pptx_source is not None:
+            pptx_source.unlink(missing_ok=True)
+
+    failed = chart_failures
+    for fmt in formats:
+        if fmt not in results:
+            timings.append((fmt, "up to date"))
+            continue
+        ok, elapsed = results[fmt]
+        timings.append((fmt, f"{elapsed:.2f}s" + ("" if ok else " (failed)")))
+        failed += not ok
+    timings.append(("total", f"{time.perf_counter() - start:.2f}s"))
+    print_timings(timings)
+    return failed
+
+
+def preview(input_path: Path):
+    theme = parse_frontmatter(input_path.read_text()).get("theme")
+    theme_files = resolve_theme(theme, theme_index())
+    print(f"{YELLOW}Starting preview server... Press Ctrl+C to stop{NC}")
+    os.execvp("marp", marp_command(input_path, theme_files, "--preview", "--html"))
+
+
+def main():
+    parser = argparse.ArgumentParser(
+        description="Build a Marp deck, skipping formats that are already up to date"
+    )
+    parser.add_argument("command", choices=["preview", *FORMATS, "all"])
+    parser.add_argument("input", help="Deck markdown file")
+    parser.add_argument("output_dir", nargs="?", default=DEFAULT_OUTPUT_DIR,
+                        help=f"Output directory (default: {DEFAULT_OUTPUT_DIR})")
+    parser.add_argument("--force", action="store_true",
+                        help="Rebuild even if outputs are up to date")
+    parser.add_argument("-j", "--jobs", type=int, default=None,
+                        help="Formats to export at once (default: all of them)")
+    parser.add_argument("--per-slide", action="store_true",
+                        help="Re-render only changed slides for PDF and PPTX")
+    parser.add_argument("--png-dpi", type=int, nargs="?", const=DEFAULT_PNG_DPI, default=None,
+                        help=f"For PPTX, use PNGs of the SVGs where smaller (default DPI: {DEFAULT_PNG_DPI}; "
+                             f"needs cairosvg)")
+    args = parser.parse_args()
+    if args.png_dpi and args.per_slide:
+        parser.error("--png-dpi applies to whole-deck PPTX export, not --per-slide")
+
+    input_path = Path(args.input)
+    if not input_path.is_file():
+        print(f"{RED}Error: File not found: {input_path}{NC}")
+        sys.exit(1)
+    if shutil.which("marp") is None:
+        print(f"{RED}Error: Marp CLI not found. Install with: npm install -g @marp-team/marp-cli{NC}")
+        sys.exit(1)
+
+    if args.command == "preview":
+        preview(input_path)
+    formats = list(FORMATS) if args.command == "all" else [args.command]
+    failed = build(input_path, formats, Path(args.output_dir), args.force, args.jobs,
+                   args.per_slide, args.png_dpi)
+    sys.exit(1 if failed else 0)
+
+
+if __name__ == "__main__":
+    main()
@@ -0,0 +1,236 @@
+#!/usr/bin/env python3
+"""
+Regenerate a deck's Matplotlib charts, re-running only scripts whose inputs changed.
+
+Usage:
+    python scripts/build_charts.py <deck.md or deck folder> [--force] [-j N]
+
+Chart scripts are the .py files in the deck's img/ folder (such as
+img/generate_charts.py), run with img/ as their working directory. Each
+script's inputs are found by reading its source:
+
+- data files it names as string literals that exist in img/ or next to the
+  deck (CSV, JSON, ...)
+- local modules it imports from img/
+- a matplotlibrc or .mplstyle file it names, or one in img/
+
+A script's cache key hashes the script, those inputs, the matplotlib
+version, the slide style below and the SVG optimizer's version (build.py
+minifies the charts in place, so a new optimizer needs fresh charts); keys
+are kept in img/.charts-manifest.json.
+Scripts whose key is unchanged and whose SVGs (the names passed to savefig)
+all exist are skipped. Stale scripts run in parallel, each in a child of
+the pre-warmed chart server (chart_runner.py).
+
+Charts are slide-optimized: SLIDE_RC is applied before each script runs
+(scripts can still override it), SVG text stays text, element IDs and
+dates are stable so unchanged charts produce identical files, and savefig
+writes atomically so the preview never picks up a half-written SVG.
+"""
+
+import argparse
+import ast
+import hashlib
+import json
+import os
+import sys
+import time
+from concurrent.futures import ThreadPoolExecutor
+from pathlib import Path
+from typing import Optional
+
+from chart_runner import matplotlib_version, shared_runner
+from optimize_svg import OPTIMIZER_VERSION
+
+
+IMG_DIRNAME = "img"
+MANIFEST_NAME = ".charts-manifest.json"
+STYLE_FILES = ("matplotlibrc", "*.mplstyle")
+# Slide defaults from agent_docs/diagrams-and-charts.md ("Slide-Optimized Styling")
+SLIDE_RC = {
+    "font.size": 12,
+    "axes.titlesize": 14,
+    "axes.labelsize": 12,
+    "lines.linewidth": 2.5,
+    "axes.spines.top": False,
+    "axes.spines.right": False,
+    "axes.grid": False,
+    "savefig.transparent": True,
+    "svg.fonttype": "none",        # text stays text: smaller files, theme fonts apply
+    "svg.hashsalt": "deck-forge",  # stable element IDs across runs
+}
+CHART_ENV = {"SOURCE_DATE_EPOCH": "0"}  # fixed SVG date metadata
+
+RED = '\033[0;31m'
+GREEN = '\033[0;32m'
+YELLOW = '\033[1;33m'
+NC = '\033[0m'
+
+
+def script_inputs(script: Path, img_dir: Path) -> tuple[list[Path], list[str]]:
+    """
+    Inputs and outputs of a chart script, read from its source.
+
+    Returns (inputs, outputs): files the script reads (data, local modules,
+    style files) and the file names it passes to savefig. A script that
+    does not parse has neither; running it reports the syntax error.
+    """
+    try:
+        tree = ast.parse(script.read_text(), filename=str(script))
+    except SyntaxError:
+        return [], []
+
+    outputs = []
+    for node in ast.walk(tree):
+        if (isinstance(node, ast.Call) and isinstance(node.func, ast.Attribute)
+                and node.func.attr == "savefig" and node.args
+                and isinstance(node.args[0], ast.Constant) and isinstance(node.args[0].value, str)):
+            outputs.append(node.args[0].value)
+
+    inputs = []
+    search_dirs = [img_dir, img_dir.parent]
+    for node in ast.walk(tree):
+        candidates = []
+        if isinstance(node, ast.Constant) and isinstance(node.value, str) and len(node.value) < 256:
+            if node.value not in outputs and '\n' not in node.value:
+                candidates = [d / node.value for d in search_dirs]
+        elif isinstance(node, ast.Import):
+            candidates = [img_dir / f"{alias.name.split('.')[0]}.py" for alias in node.names]
+        elif isinstance(node, ast.ImportFrom) and node.module and node.level == 0:
+            candidates = [img_dir / f"{node.module.split('.')[0]}.py"]
+        for path in candidates:
+            try:
+                if path.is_file() and path.resolve() != script.resolve() and path not in inputs:
+                    inputs.append(path)
+                    break
+            except OSError:
+                pass  # Not a usable path (e.g. too long)
+
+    for pattern in STYLE_FILES:
+        for path in sorted(img_dir.glob(pattern)):
+            if path not in inputs:
+                inputs.append(path)
+    return inputs, outputs
+
+
+def chart_key(script: Path, inputs: list[Path], mpl_version: str) -> str:
+    """Cache key for a chart script's outputs."""
+    digest = hashlib.sha256()
+    digest.update(f"matplotlib {mpl_version}\0optimizer {OPTIMIZER_VERSION}\0".encode())
+    digest.update(json.dumps(SLIDE_RC, sort_keys=True).encode() + b'\0')
+    for path in [script, *sorted(inputs)]:
+        digest.update(path.name.encode('utf-8') + b'\0')
+        digest.update(hashlib.sha256(path.read_bytes()).digest())
+    return digest.hexdigest()
+
+
+def svg_mtimes(img_dir: Path) -> dict[str, int]:
+    """Modification time of each SVG in img_dir, by file name."""
+    return {path.name: path.stat().st_mtime_ns for path in img_dir.glob("*.svg")}
+
+
+def find_img_dir(target: Path) -> Path:
+    """img/ folder for a deck file or a deck folder."""
+    deck_dir = target.parent if target.is_file() else target
+    return deck_dir / IMG_DIRNAME
+
+
+def build_charts(img_dir: Path, force: bool = False, jobs: Optional[int] = None,
+                 quiet: bool = False) -> tuple[int, int, int]:
+    """
+    Run the chart scripts in img_dir whose inputs changed.
+
+    Returns (cached, run, failed) counts.
+    """
+    start_time = time.perf_counter()
+    scripts = sorted(img_dir.glob("*.py")) if img_dir.is_dir() else []
+    if not scripts:
+        return 0, 0, 0
+
+    manifest_path = img_dir / MANIFEST_NAME
+    try:
+        manifest = json.loads(manifest_path.read_text())
+    except (OSError, ValueError):
+        manifest = {}
+
+    found = {script: script_inputs(script, img_dir) for script in scripts}
+    # Modules imported by other scripts are helpers, not charts; a change to
+    # one still reaches its importers through their keys
+    helpers = {path for inputs, _ in found.values() for path in inputs if path.suffix == ".py"}
+    charts = [script for script in scripts if script not in helpers]
+
+    mpl_version = matplotlib_version()
+    keys = {}
+    stale = []
+    for script in charts:
+        inputs, outputs = found[script]
+        keys[script.name] = (chart_key(script, inputs, mpl_version), outputs)
+        entry = manifest.get(script.name, {})
+        current = (entry.get("key") == keys[script.name][0]
+                   and all((img_dir / name).exists() for name in entry.get("outputs", [])))
+        if force or not current:
+            stale.append(script)
+
+    def run(script: Path):
+        return shared_runner().run(str(script.resolve()), str(img_dir.resolve()),
+                                   rc=SLIDE_RC, env=CHART_ENV, atomic=True)
+
+    failed = 0
+    if stale:
+        if not quiet:
+            print(f"{YELLOW}Running {len(stale)} changed chart script(s)...{NC}")
+        before = svg_mtimes(img_dir)
+        with ThreadPoolExecutor(max_workers=jobs or os.cpu_count() or 1) as pool:
+            runs = list(pool.map(run, stale))
+        # savefig names built at run time (f-strings, loops) are not in the
+        # source: record the SVGs the batch actually wrote as outputs too
+        written = [name for name, mtime in svg_mtimes(img_dir).items() if before.get(name) != mtime]
+        for script, result in zip(stale, runs):
+            if result.ok:
+                key, outputs = keys[script.name]
+                manifest[script.name] = {"key": key, "outputs": sorted(set(outputs) | set(written))}
+            else:
+                failed += 1
+                manifest.pop(script.name, None)
+                reason = "timed out" if result.timed_out else (result.error or "").strip()
+                print(f"{RED}  {script.name} failed: {reason}{NC}", file=sys.stderr)
+
+        # Forget scripts that no longer exist
+        manifest = {name: entry for name, entry in manifest.items() if name in keys}
+        tmp_path = manifest_path.with_name(f".{manifest_path.name}.tmp")
+        tmp_path.write_text(json.dumps(manifest, indent=2, sort_keys=True))
+        os.replace(tmp_path, manifest_path)
+
+    cached = len(charts) - len(stale)
+    if not quiet or stale:
+        elapsed = time.perf_counter() - start_time
+        print(f"{GREEN}{len(charts)} chart script(s): {cached} cached, {len(stale) - failed} run, "
+              f"{failed} failed ({elapsed:.2f}s){NC}")
+    return cached, len(stale) - failed, failed
+
+
+def main():
+    parser = argparse.ArgumentParser(
+        description="Regenerate a deck's Matplotlib charts, skipping unchanged scripts"
+    )
+    parser.add_argument("target", help="Deck markdown file or deck folder")
+    parser.add_argument("--force", action="store_true", help="Re-run every chart script")
+    parser.add_argument("-j", "--jobs", type=int, default=None,
+                        help="Scripts to run at once (default: one per CPU)")
+    args = parser.parse_args()
+
+    target = Path(args.target)
+    if not target.exists():
+        print(f"{RED}Error: Not found: {target}{NC}")
+        sys.exit(1)
+
+    img_dir = find_img_dir(target)
+    if not img_dir.is_dir() or not any(img_dir.glob("*.py")):
+        print(f"No chart scripts in {img_dir}")
+        return
+    _, _, failed = build_charts(img_dir, args.force, args.jobs)
+    sys.exit(1 if failed else 0)
+
+
+if __name__ == "__main__":
+    main()
@@ -0,0 +1,254 @@
+"""
+Run Matplotlib chart scripts in forked children of a pre-warmed server.
+
+Starting a fresh interpreter and importing matplotlib costs most of a
+chart's run time. ChartRunner uses multiprocessing's forkserver with
+matplotlib.pyplot and the Agg backend preloaded: each script runs in a child
+forked from that server, in its own working directory, on Agg unless
+MPLBACKEND names another backend. A crash, hang or stray global in one
+chart stays isolated to its child, as it would with a subprocess, and
+children that exceed the timeout are killed.
+
+Callers can also override rcParams and environment variables for a run,
+and make savefig write atomically (to a temp file renamed into place), so
+a chart being regenerated is never seen half-written.
+
+Where forkserver is unavailable (Windows), scripts run in a plain
+subprocess instead.
+"""
+
+import json
+import multiprocessing
+import os
+import subprocess
+import sys
+import tempfile
+import threading
+import time
+import traceback
+from dataclasses import dataclass
+from importlib.metadata import PackageNotFoundError, version as package_version
+from typing import Optional
+
+from tracing import span
+
+
+CHART_TIMEOUT = 30   # seconds per chart
+EXIT_GRACE = 5       # seconds for a child to exit after reporting
+PRELOAD = ["chart_runner", "matplotlib.pyplot", "matplotlib.backends.backend_agg"]
+
+
+@dataclass
+class ChartRun:
+    ok: bool
+    error: Optional[str] = None   # traceback or captured stderr on failure
+    timed_out: bool = False
+    elapsed: float = 0.0          # seconds
+
+
+def matplotlib_version() -> str:
+    """Installed matplotlib version, without importing it."""
+    try:
+        return package_version("matplotlib")
+    except PackageNotFoundError:
+        return "missing"
+
+
+def _prepare(rc: Optional[dict], env: Optional[dict], atomic: bool):
+    """Child setup before the script runs: environment, backend, rcParams, atomic savefig."""
+    import matplotlib
+
+    os.environ.update(env or {})
+    # Picked here rather than by setting MPLBACKEND for the server, which the
+    # caller's own process (and its other subprocesses) would inherit
+    matplotlib.use(os.environ.get("MPLBACKEND", "Agg"))
+    if rc:
+        matplotlib.rcParams.update(rc)
+    if atomic:
+        from matplotlib.figure import Figure
+
+        savefig = Figure.savefig
+
+        def atomic_savefig(self, fname, *args, **kwargs):
+            if not isinstance(fname, (str, os.PathLike)):
+                return savefig(self, fname, *args, **kwargs)
+            path = os.fspath(fname)
+            directory, name = os.path.split(path)
+            stem, ext = os.path.splitext(name)
+            if not ext:
+                return savefig(self, fname, *args, **kwargs)
+            # Keep the extension so the format is still inferred from it
+            tmp_path = os.path.join(directory, f".{stem}.{os.getpid()}.tmp{ext}")
+            savefig(self, tmp_path, *args, **kwargs)
+            os.replace(tmp_path, path)
+
+        Figure.savefig = atomic_savefig
+
+
+def _run_script(script_path: str, cwd: str, log_path: str, setup: tuple, conn):
+    """Forked child: run a chart script as __main__ and report the outcome."""
+    import runpy
+
+    os.chdir(cwd)
+    # Script output goes to a log, read back if the child dies without reporting
+    log = os.open(log_path, os.O_WRONLY | os.O_TRUNC)
+    os.dup2(log, 1)
+    os.dup2(log, 2)
+    sys.argv = [script_path]
+    # As `python script.py` would, so scripts can import their neighbours
+    sys.path.insert(0, os.path.dirname(os.path.abspath(script_path)))
+
+    try:
+        _prepare(*setup)
+        runpy.run_path(script_path, run_name="__main__")
+        conn.send((True, None))
+    except SystemExit as e:
+        if e.code in (None, 0):
+            conn.send((True, None))
+        else:
+            conn.send((False, f"script exited with status {e.code}"))
+    except BaseException as e:
+        # Report from the script's first frame on, as a subprocess would
+        tb = e.__traceback__
+        while tb is not None and tb.tb_frame.f_code.co_filename != script_path:
+            tb = tb.tb_next
+        lines = traceback.format_exception_only(type(e), e)
+        if tb is not None:
+            lines = ["Traceback (most recent call last):\n"] + traceback.format_tb(tb) + lines
+        conn.send((False, ''.join(lines)))
+    finally:
+        conn.close()
+
+
+def _noop():
+    pass
+
+
+class ChartRunner:
+    """Runs chart scripts on a forkserver with matplotlib preloaded. Thread-safe."""
+
+    def __init__(self, timeout: float = CHART_TIMEOUT):
+        self.timeout = timeout
+        self.context = None
+        self._warm = False
+        self._warm_lock = threading.Lock()
+        if "forkserver" in multiprocessing.get_all_start_methods():
+            self.context = multiprocessing.get_context("forkserver")
+            self.context.set_forkserver_preload(PRELOAD)
+
+    def warm(self):
+        """Start the server and wait for its preload, if not already done."""
+        with self._warm_lock:
+            if self.context is None or self._warm:
+                return
+            # The server preloads before serving its first fork
+            with span("chart server start"):
+                process = self.context.Process(target=_noop)
+                process.start()
+                process.join()
+            self._warm = True
+
+    def run(self, script_path: str, cwd: str, rc: Optional[dict] = None,
+            env: Optional[dict] = None, atomic: bool = False) -> ChartRun:
+        """
+        Run script_path with cwd as its working directory.
+
+        rc and env override rcParams and environment variables for this run
+        only; atomic makes savefig write through a temp file. The elapsed
+        time covers the chart alone, not starting the server.
+        """
+        self.warm()
+        setup = (rc, env, atomic)
+        start = time.perf_counter()
+        with span("chart run", script=os.path.basename(script_path)):
+            if self.context is None:
+                result = self._run_subprocess(script_path, cwd, setup)
+            else:
+                result = self._run_forked(script_path, cwd, setup)
+        result.elapsed = time.perf_counter() - start
+        return result
+
+    def _run_forked(self, script_path: str, cwd: str, setup: tuple) -> ChartRun:
+        # The log lives outside cwd, which is often the deck's img/ folder
+        log_fd, log_path = tempfile.mkstemp(prefix="chart-", suffix=".log")
+        os.close(log_fd)
+        try:
+            return self._run_forked_logged(script_path, cwd, log_path, setup)
+        finally:
+            os.unlink(log_path)
+
+    def _run_forked_logged(self, script_path: str, cwd: str, log_path: str,
+                           setup: tuple) -> ChartRun:
+        receiver, sender = self.context.Pipe(duplex=False)
+        process = self.context.Process(target=_run_script,
+                                       args=(script_path, cwd, log_path, setup, sender))
+        process.start()
+        sender.close()
+
+        # Read the report before joining: a child blocked writing a large
+        # traceback into the pipe would never exit
+        ok = error = None
+        timed_out = not receiver.poll(self.timeout)
+        if timed_out:
+            process.kill()
+        else:
+            try:
+                ok, error = receiver.recv()
+            except EOFError:
+                pass  # Died without reporting
+        receiver.close()
+        process.join(EXIT_GRACE)
+        if process.is_alive():
+            process.kill()
+            process.join()
+        if timed_out:
+            return ChartRun(ok=False, timed_out=True)
+
+        if ok is None:
+            # Died without reporting (segfault, os._exit, ...)
+            with open(log_path, errors="replace") as f:
+                output = f.read().strip()
+            return ChartRun(ok=False, error=output or f"chart process exited with status {process.exitcode}")
+        return ChartRun(ok=ok, error=error)
+
+    def _run_subprocess(self, script_path: str, cwd: str, setup: tuple) -> ChartRun:
+        command = [sys.executable, script_path]
+        if any(setup):
+            rc, env, atomic = setup
+            bootstrap = (
+                "import runpy, sys, json; "
+                f"sys.path.insert(0, {os.path.dirname(os.path.abspath(__file__))!r}); "
+                "import chart_runner; "
+                "chart_runner._prepare(json.loads(sys.argv[2]), json.loads(sys.argv[3]), "
+                "sys.argv[4] == '1'); "
+                "sys.argv = sys.argv[1:2]; "
+                "runpy.run_path(sys.argv[0], run_name='__main__')"
+            )
+            command = [sys.executable, "-c", bootstrap, script_path,
+                       json.dumps(rc), json.dumps(env), "1" if atomic else "0"]
+        try:
+            result = subprocess.run(
+                command,
+                capture_output=True,
+                text=True,
+                timeout=self.timeout,
+                cwd=cwd
+            )
+        except subprocess.TimeoutExpired:
+            return ChartRun(ok=False, timed_out=True)
+        if result.returncode != 0:
+            return ChartRun(ok=False, error=result.stderr.strip())
+        return ChartRun(ok=True)
+
+
+_shared = None
+_shared_lock = threading.Lock()
+
+
+def shared_runner() -> ChartRunner:
+    """Process-wide ChartRunner, so every chart reuses one warm server."""
+    global _shared
+    with _shared_lock:
+        if _shared is None:
+            _shared = ChartRunner()
+        return _shared
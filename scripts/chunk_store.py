@@ -0,0 +1,277 @@
+"""
+SQLite-backed chunk store for the session index.
+
+Rows are addressed by the chunk's FAISS vector ID. Search hits are hydrated
+by ID without reading the rest of the store, and the full chunk text is only
+fetched when asked for, so loading the index no longer means parsing every
+chunk into memory.
+
+Near-duplicate chunks share one row (see near_duplicates.py): chunk_sources
+lists every file and section a row stands for, and minhash_signatures and
+lsh_buckets hold the MinHash state used to find duplicates incrementally.
+A row is deleted only once its last source is gone.
+
+An FTS5 full-text index over section titles and chunk text backs BM25
+lexical search. It is an external-content table (it stores only the inverted
+index, not a second copy of the text) kept in sync by triggers, so it updates
+incrementally with every add/remove.
+"""
+
+import json
+import os
+import sqlite3
+
+
+SCHEMA = """
+CREATE TABLE IF NOT EXISTS chunks (
+    id INTEGER PRIMARY KEY,
+    file TEXT NOT NULL,
+    section TEXT NOT NULL,
+    section_index INTEGER NOT NULL DEFAULT 0,
+    window INTEGER NOT NULL DEFAULT 0,
+    preview TEXT NOT NULL,
+    text TEXT NOT NULL
+);
+CREATE INDEX IF NOT EXISTS chunks_file ON chunks (file);
+
+CREATE TABLE IF NOT EXISTS chunk_sources (
+    id INTEGER NOT NULL,
+    file TEXT NOT NULL,
+    hash TEXT NOT NULL,
+    section TEXT NOT NULL,
+    section_index INTEGER NOT NULL,
+    window INTEGER NOT NULL
+);
+CREATE INDEX IF NOT EXISTS chunk_sources_id ON chunk_sources (id);
+CREATE INDEX IF NOT EXISTS chunk_sources_file ON chunk_sources (file, hash);
+
+CREATE TABLE IF NOT EXISTS minhash_signatures (
+    id INTEGER PRIMARY KEY,
+    signature BLOB NOT NULL
+);
+CREATE TABLE IF NOT EXISTS lsh_buckets (
+    key INTEGER NOT NULL,
+    id INTEGER NOT NULL
+);
+CREATE INDEX IF NOT EXISTS lsh_buckets_key ON lsh_buckets (key);
+"""
+
+FTS_SCHEMA = """
+CREATE VIRTUAL TABLE chunks_fts USING fts5 (
+    section, text,
+    content = chunks, content_rowid = id,
+    tokenize = "unicode61 tokenchars '_'"
+);
+CREATE TRIGGER chunks_ai AFTER INSERT ON chunks BEGIN
+    INSERT INTO chunks_fts (rowid, section, text) VALUES (new.id, new.section, new.text);
+END;
+CREATE TRIGGER chunks_ad AFTER DELETE ON chunks BEGIN
+    INSERT INTO chunks_fts (chunks_fts, rowid, section, text)
+    VALUES ('delete', old.id, old.section, old.text);
+END;
+INSERT INTO chunks_fts (chunks_fts) VALUES ('rebuild');
+"""
+
+# Columns added after the first release, with their definitions
+ADDED_COLUMNS = {
+    "section_index": "INTEGER NOT NULL DEFAULT 0",
+    "window": "INTEGER NOT NULL DEFAULT 0",
+}
+
+SUMMARY_COLUMNS = ("id", "file", "section", "section_index", "window", "preview")
+SOURCE_COLUMNS = ("file", "section", "section_index", "window")
+
+# Stay under SQLite's bound-parameter limit in IN (...) queries
+MAX_PARAMS = 500
+
+
+class ChunkStore:
+    """Chunk metadata and text keyed by vector ID."""
+
+    def __init__(self, path: str):
+        self.path = path
+        self.conn = sqlite3.connect(path)
+        # INSERT OR REPLACE must fire the delete trigger for the replaced row
+        self.conn.execute("PRAGMA recursive_triggers = ON")
+        self.conn.executescript(SCHEMA)
+        existing = {row[1] for row in self.conn.execute("PRAGMA table_info(chunks)")}
+        for column, definition in ADDED_COLUMNS.items():
+            if column not in existing:
+                self.conn.execute(f"ALTER TABLE chunks ADD COLUMN {column} {definition}")
+        has_fts = self.conn.execute(
+            "SELECT 1 FROM sqlite_master WHERE name = 'chunks_fts'"
+        ).fetchone()
+        if not has_fts:
+            # Also indexes any rows from stores created before lexical search
+            self.conn.executescript(FTS_SCHEMA)
+            self.conn.commit()
+
+    def add(self, items: list[tuple[int, dict]]):
+        """Insert or replace (id, chunk) pairs."""
+        self.conn.executemany(
+            "INSERT OR REPLACE INTO chunks "
+            "(id, file, section, section_index, window, preview, text) "
+            "VALUES (?, ?, ?, ?, ?, ?, ?)",
+            [(chunk_id, c["file"], c["section"], c.get("section_index", 0),
+              c.get("window", 0), c["preview"], c["text"])
+             for chunk_id, c in items]
+        )
+
+    def remove(self, ids: list[int]):
+        """Delete chunks by ID, with their sources and MinHash state."""
+        params = [(i,) for i in ids]
+        for table in ("chunks", "chunk_sources", "minhash_signatures", "lsh_buckets"):
+            self.conn.executemany(f"DELETE FROM {table} WHERE id = ?", params)
+
+    def clear(self):
+        """Delete every chunk."""
+        for table in ("chunks", "chunk_sources", "minhash_signatures", "lsh_buckets"):
+            self.conn.execute(f"DELETE FROM {table}")
+
+    def _select_in(self, sql: str, ids: list[int]):
+        """Run sql (with one IN ({}) placeholder) over ids in parameter-limited batches."""
+        ids = [int(i) for i in ids]
+        for start in range(0, len(ids), MAX_PARAMS):
+            batch = ids[start:start + MAX_PARAMS]
+            yield from self.conn.execute(sql.format(",".join("?" * len(batch))), batch)
+
+    def add_sources(self, items: list[tuple[int, str, dict]]):
+        """Record (id, chunk hash, chunk) as a source of row id."""
+        self.conn.executemany(
+            "INSERT INTO chunk_sources (id, file, hash, section, section_index, window) "
+            "VALUES (?, ?, ?, ?, ?, ?)",
+            [(chunk_id, c["file"], h, c["section"], c.get("section_index", 0), c.get("window", 0))
+             for chunk_id, h, c in items]
+        )
+
+    def remove_sources(self, entries: list[tuple[int, str, str]]) -> list[int]:
+        """
+        Drop (id, file, chunk hash) sources.
+
+        Rows that still have other sources are repointed at one of them if
+        their own source was dropped. Returns the IDs left with no sources,
+        which the caller should remove from the index and the store.
+        """
+        self.conn.executemany(
+            "DELETE FROM chunk_sources WHERE id = ? AND file = ? AND hash = ?", entries
+        )
+        affected = sorted({entry[0] for entry in entries})
+        remaining = self.sources(affected)
+        orphaned = [i for i in affected if i not in remaining]
+
+        current = self.get([i for i in affected if i in remaining])
+        for chunk_id, chunk in current.items():
+            own = {k: chunk[k] for k in SOURCE_COLUMNS}
+            if own not in remaining[chunk_id]:
+                source = remaining[chunk_id][0]
+                self.conn.execute(
+                    "UPDATE chunks SET file = ?, section = ?, section_index = ?, window = ? "
+                    "WHERE id = ?",
+                    [source[k] for k in SOURCE_COLUMNS] + [chunk_id]
+                )
+        return orphaned
+
+    def sources(self, ids: list[int]) -> dict[int, list[dict]]:
+        """Map each ID to the list of sources it stands for."""
+        sources = {}
+        rows = self._select_in(
+            f"SELECT id, {', '.join(SOURCE_COLUMNS)} FROM chunk_sources "
+            "WHERE id IN ({}) ORDER BY rowid", ids
+        )
+        for row in rows:
+            sources.setdefault(row[0], []).append(dict(zip(SOURCE_COLUMNS, row[1:])))
+        return sources
+
+    def add_signature(self, chunk_id: int, signature: bytes, keys: list[int]):
+        """Store a row's MinHash signature and its LSH bucket keys."""
+        self.conn.execute(
+            "INSERT OR REPLACE INTO minhash_signatures (id, signature) VALUES (?, ?)",
+            (chunk_id, signature)
+        )
+        self.conn.executemany(
+            "INSERT INTO lsh_buckets (key, id) VALUES (?, ?)", [(k, chunk_id) for k in keys]
+        )
+
+    def lsh_candidates(self, keys: list[int]) -> list[int]:
+        """IDs sharing at least one LSH bucket with keys."""
+        return [row[0] for row in self._select_in(
+            "SELECT DISTINCT id FROM lsh_buckets WHERE key IN ({})", keys
+        )]
+
+    def get_signatures(self, ids: list[int]) -> dict[int, bytes]:
+        """Fetch MinHash signatures by ID."""
+        return dict(self._select_in(
+            "SELECT id, signature FROM minhash_signatures WHERE id IN ({})", ids
+        ))
+
+    def get(self, ids: list[int], with_text: bool = False) -> dict[int, dict]:
+        """
+        Fetch chunks by ID.
+
+        Returns a dict of id -> chunk with file, section, section_index,
+        window and preview, plus the full text if with_text is set. Missing
+        IDs are omitted.
+        """
+        columns = SUMMARY_COLUMNS + (("text",) if with_text else ())
+        rows = self._select_in(f"SELECT {', '.join(columns)} FROM chunks WHERE id IN ({{}})", ids)
+        return {row[0]: dict(zip(columns[1:], row[1:])) for row in rows}
+
+    def lexical_search(self, query: str, limit: int) -> list[tuple[int, float]]:
+        """
+        BM25-ranked full-text search.
+
+        Each whitespace-separated query term is matched as a phrase, and terms
+        are OR-ed so partial matches still rank. Returns (id, score) pairs,
+        best first; higher scores are better.
+        """
+        terms = ['"' + term.replace('"', '""') + '"' for term in query.split()]
+        if not terms:
+            return []
+
+        rows = self.conn.execute(
+            "SELECT rowid, bm25(chunks_fts) FROM chunks_fts "
+            "WHERE chunks_fts MATCH ? ORDER BY bm25(chunks_fts) LIMIT ?",
+            (" OR ".join(terms), limit)
+        )
+        # bm25() is lower-is-better; negate so all search scores sort the same way
+        return [(row[0], -row[1]) for row in rows]
+
+    def ids(self) -> list[int]:
+        """IDs of every stored chunk, ascending."""
+        return [row[0] for row in self.conn.execute("SELECT id FROM chunks ORDER BY id")]
+
+    def count(self) -> int:
+        """Number of stored chunks."""
+        return self.conn.execute("SELECT COUNT(*) FROM chunks").fetchone()[0]
+
+    def source_count(self) -> int:
+        """Number of source chunks the stored rows stand for."""
+        return self.conn.execute("SELECT COUNT(*) FROM chunk_sources").fetchone()[0]
+
+    def commit(self):
+        self.conn.commit()
+
+    def close(self):
+        self.conn.close()
+
+
+def migrate_json_metadata(json_path: str, store: ChunkStore) -> int:
+    """
+    One-shot import of a metadata.json written by older indexer versions.
+
+    Imports the {id: chunk} mapping into the store and deletes the JSON file.
+    Returns the number of chunks migrated. Older list-shaped metadata has no
+    stable IDs and belongs to an index that gets rebuilt anyway, so it is
+    dropped without importing.
+    """
+    with open(json_path, 'r') as f:
+        metadata = json.load(f)
+
+    migrated = 0
+    if isinstance(metadata, dict):
+        store.add([(int(chunk_id), chunk) for chunk_id, chunk in metadata.items()])
+        store.commit()
+        migrated = len(metadata)
+
+    os.unlink(json_path)
+    return migrated
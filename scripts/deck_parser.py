@@ -0,0 +1,323 @@
+#!/usr/bin/env python3
+"""
+Parse a Marp deck once into slides, directives, code blocks and image references.
+
+Usage:
+    python scripts/deck_parser.py <deck.md> [--json]
+
+Prints the deck's outline: each slide's line span, title, directives, code
+blocks by language, images and content hash.
+
+parse_deck() reads the deck in a single pass over its lines, tracking fenced
+code and HTML comments as it goes, so its cost is linear in the deck's
+size (thousands of slides parse in milliseconds). The result is what the
+other scripts work from:
+
+- render_mermaid.py: the ```mermaid blocks and their line spans
+- build.py: the frontmatter and the local files the deck references
+- slide_build.py: slide bodies, directives, speaker notes and styles
+
+Slides are split as Marp splits them: a `---` line separates slides unless
+it is inside a fenced code block or directly follows paragraph text (where
+Markdown reads it as a heading underline). Code, directives, images and
+titles inside fenced code blocks are not parsed. Each slide carries a hash
+of its own text, so later stages can skip slides that did not change.
+
+Line numbers are 0-based indexes into Deck.lines (text.split('\\n')).
+"""
+
+import argparse
+import hashlib
+import json
+import re
+import sys
+from dataclasses import asdict, dataclass, field
+from pathlib import Path
+from typing import Optional
+from urllib.parse import unquote
+
+
+GLOBAL_DIRECTIVES = {"theme", "style", "headingDivider", "lang", "size", "math", "title",
+                     "author", "description", "image", "keywords", "url", "marp"}
+LOCAL_DIRECTIVES = {"paginate", "header", "footer", "class", "backgroundColor",
+                    "backgroundImage", "backgroundPosition", "backgroundRepeat",
+                    "backgroundSize", "color"}
+
+FRONTMATTER_LINE = re.compile(r"([\w-]+)\s*:\s*(.*)$")
+COMMENT = re.compile(r"<!--(.*?)-->", re.DOTALL)
+STYLE = re.compile(r"<style(\s[^>]*)?>.*?</style>", re.DOTALL | re.IGNORECASE)
+FENCE = re.compile(r"^(`{3,}|~{3,})")
+DIRECTIVE_LINE = re.compile(r"\s*(_?\w+)\s*:\s*(.*?)\s*$")
+HEADING = re.compile(r"^#{1,6}\s+(.*?)\s*#*\s*$")
+SETEXT_UNDERLINE = re.compile(r"^(=+|-+)$")
+# Lines that are not paragraph text: headings, fences, HTML, quotes, lists, tables
+PARAGRAPH_BREAKERS = re.compile(r"#|`{3}|~{3}|<|>|[-*+]\s|\d+[.)]\s|\|")
+# ![alt](path "title"), <img src="path">, url(path) in inline styles and directives
+IMAGE_REFS = [
+    re.compile(r"!\[[^\]]*\]\(\s*<?([^)\s>]+)>?(?:\s+[\"'][^)]*[\"'])?\s*\)"),
+    re.compile(r"<img\b[^>]*\bsrc\s*=\s*[\"']([^\"']+)[\"']", re.IGNORECASE),
+    re.compile(r"url\(\s*[\"']?([^\"')]+)[\"']?\s*\)"),
+]
+REMOTE = re.compile(r"^(?:[a-z][a-z0-9+.-]*:|//|#)", re.IGNORECASE)
+
+
+@dataclass
+class CodeBlock:
+    language: str            # first word of the fence's info string, lowercased
+    info: str                # rest of the info string (Marp image options for mermaid)
+    source: str              # lines between the fences, each ending in '\n'
+    start: int               # line of the opening fence
+    end: Optional[int]       # line of the closing fence; None if never closed
+    slide: int
+
+
+@dataclass
+class ImageRef:
+    ref: str                 # as written
+    line: int
+    slide: Optional[int]     # None for references in the frontmatter
+
+    @property
+    def remote(self) -> bool:
+        return bool(REMOTE.match(self.ref))
+
+    def local_path(self, deck_dir: Path) -> Optional[Path]:
+        """The referenced file resolved against deck_dir (None if remote)."""
+        if self.remote:
+            return None
+        return (deck_dir / unquote(self.ref.strip().split('#')[0].split('?')[0])).resolve()
+
+
+@dataclass
+class Slide:
+    index: int
+    start: int               # first line of the body
+    end: int                 # line after the body: the next separator, or len(lines)
+    body: str
+    hash: str                # sha256 of body
+    title: Optional[str] = None
+    directives: dict[str, str] = field(default_factory=dict)  # as written, `_` prefix kept
+    notes: list[str] = field(default_factory=list)
+    styles: list[str] = field(default_factory=list)           # unscoped <style> blocks
+    code_blocks: list[CodeBlock] = field(default_factory=list)
+    images: list[ImageRef] = field(default_factory=list)
+
+    def code(self, language: str) -> list[CodeBlock]:
+        return [block for block in self.code_blocks if block.language == language]
+
+
+@dataclass
+class Deck:
+    lines: list[str]
+    frontmatter: dict[str, str]   # top-level `key: value` pairs
+    frontmatter_text: str         # the block itself, `---` lines included ("" if none)
+    slides: list[Slide]
+    images: list[ImageRef]        # every reference, frontmatter included, in deck order
+    code_blocks: dict[str, list[CodeBlock]]  # by language, in deck order
+
+    def global_directives(self) -> dict[str, str]:
+        """Global directives set in slide comments (frontmatter values not included)."""
+        values = {}
+        for slide in self.slides:
+            values.update({k: v for k, v in slide.directives.items() if k in GLOBAL_DIRECTIVES})
+        return values
+
+    def local_files(self, deck_dir: Path) -> list[Path]:
+        """Local files referenced as images, resolved against deck_dir, in first-seen order."""
+        files = []
+        for image in self.images:
+            path = image.local_path(deck_dir)
+            if path is not None and path not in files:
+                files.append(path)
+        return files
+
+
+def parse_frontmatter(text: str) -> dict[str, str]:
+    """Top-level `key: value` pairs from the deck's YAML frontmatter."""
+    lines = text.split('\n')
+    end = _frontmatter_end(lines)
+    return _frontmatter_values(lines[1:end - 1]) if end else {}
+
+
+def _frontmatter_end(lines: list[str]) -> int:
+    """Index of the first line after the frontmatter block (0 if there is none)."""
+    if not lines or lines[0].strip() != '---':
+        return 0
+    for i in range(1, len(lines)):
+        if lines[i].strip() == '---':
+            return i + 1
+    return 0
+
+
+def _frontmatter_values(lines: list[str]) -> dict[str, str]:
+    values = {}
+    for line in lines:
+        match = FRONTMATTER_LINE.match(line)
+        if match:
+            values[match.group(1)] = match.group(2).strip().strip("'\"")
+    return values
+
+
+def _is_paragraph(stripped: str) -> bool:
+    """Whether a line is paragraph text, which a following `---` would underline."""
+    return bool(stripped) and not (PARAGRAPH_BREAKERS.match(stripped) or stripped.endswith('-->'))
+
+
+def _find_images(line: str, number: int, slide: Optional[int], images: list[ImageRef]):
+    # Cheap pre-check: most lines reference nothing
+    if '](' not in line and '<' not in line and 'url(' not in line:
+        return
+    for pattern in IMAGE_REFS:
+        for match in pattern.finditer(line):
+            images.append(ImageRef(match.group(1).strip(), number, slide))
+
+
+def _parse_markup(slide: Slide, markup: str):
+    """Directives, speaker notes and unscoped styles from a slide's non-code text."""
+    for match in COMMENT.finditer(markup):
+        values = {}
+        for line in match.group(1).strip().split('\n'):
+            if not line.strip():
+                continue
+            parsed = DIRECTIVE_LINE.match(line)
+            if parsed is None or parsed.group(1).lstrip('_') not in GLOBAL_DIRECTIVES | LOCAL_DIRECTIVES:
+                values = None
+                break
+            values[parsed.group(1)] = parsed.group(2)
+        if values:
+            slide.directives.update(values)
+        elif match.group(1).strip():
+            slide.notes.append(match.group(1).strip())
+    for match in STYLE.finditer(markup):
+        if "scoped" not in (match.group(1) or "").lower():
+            slide.styles.append(match.group(0))
+
+
+def parse_deck(text: str) -> Deck:
+    """Parse a deck's text in one pass over its lines."""
+    lines = text.split('\n')
+    body_start = _frontmatter_end(lines)
+    images = []
+    for number in range(1, body_start - 1):
+        _find_images(lines[number], number, None, images)
+
+    slides = []
+    code_blocks = {}
+
+    def close_slide(start: int, end: int, markup: list[str], title: Optional[str],
+                    blocks: list[CodeBlock], slide_images: list[ImageRef]):
+        body = '\n'.join(lines[start:end])
+        slide = Slide(len(slides), start, end, body,
+                      hashlib.sha256(body.encode('utf-8')).hexdigest(), title,
+                      code_blocks=blocks, images=slide_images)
+        # Only comments and <style> matter here; skip the regexes when absent
+        if any('<' in line for line in markup):
+            _parse_markup(slide, '\n'.join(markup))
+        slides.append(slide)
+
+    start = body_start
+    markup = []        # the slide's lines outside fenced code
+    title = None
+    blocks = []
+    slide_images = []
+    fence = None       # the open fence's marker, or None
+    block = None       # the open CodeBlock
+    in_comment = False
+    previous = ""      # last stripped line of the slide, for the paragraph rule
+
+    for number in range(body_start, len(lines)):
+        line = lines[number]
+        stripped = line.strip()
+
+        if fence is not None:
+            # A closing fence is at least as long as the opening one, with no info string
+            if stripped.startswith(fence) and not stripped.lstrip(fence[0]):
+                block.end = number
+                block.source = '\n'.join(lines[block.start + 1:number]) + '\n' \
+                    if number > block.start + 1 else ''
+                fence = block = None
+            previous = stripped
+            continue
+
+        opening = FENCE.match(stripped)
+        if opening:
+            fence = opening.group(1)
+            info = stripped[len(fence):].strip()
+            language, _, rest = info.partition(' ')
+            block = CodeBlock(language.lower(), rest.strip(), '', number, None, len(slides))
+            blocks.append(block)
+            code_blocks.setdefault(block.language, []).append(block)
+            previous = stripped
+            continue
+
+        if stripped == '---' and not in_comment and not _is_paragraph(previous):
+            close_slide(start, number, markup, title, blocks, slide_images)
+            start = number + 1
+            markup, title, blocks, slide_images = [], None, [], []
+            previous = ""
+            continue
+
+        markup.append(line)
+        _find_images(line, number, len(slides), slide_images)
+        if in_comment:
+            in_comment = '-->' not in stripped
+        elif title is None and stripped.startswith('#'):
+            heading = HEADING.match(stripped)
+            if heading:
+                title = heading.group(1)
+        elif title is None and SETEXT_UNDERLINE.match(stripped) and _is_paragraph(previous):
+            title = previous
+        if '<!--' in stripped and '-->' not in stripped[stripped.rindex('<!--'):]:
+            in_comment = True
+        previous = stripped
+
+    if block is not None:
+        # Unclosed: the block runs to the end of the deck
+        block.source = '\n'.join(lines[block.start + 1:]) + '\n'
+    close_slide(start, len(lines), markup, title, blocks, slide_images)
+
+    for slide in slides:
+        images.extend(slide.images)
+    return Deck(lines, _frontmatter_values(lines[1:body_start - 1]) if body_start else {},
+                '\n'.join(lines[:body_start]), slides, images, code_blocks)
+
+
+def outline(deck: Deck) -> str:
+    """Human-readable summary of a parsed deck."""
+    rows = [f"{len(deck.slides)} slide(s)"
+            + (f", theme {deck.frontmatter['theme']}" if "theme" in deck.frontmatter else "")]
+    for slide in deck.slides:
+        rows.append(f"  {slide.index + 1:>4}  lines {slide.start + 1}-{slide.end}  "
+                    f"{slide.hash[:12]}  {slide.title or '(untitled)'}")
+        if slide.directives:
+            rows.append("        directives: " + ", ".join(f"{k}={v}" for k, v in slide.directives.items()))
+        for block in slide.code_blocks:
+            status = "" if block.end is not None else " (unclosed)"
+            rows.append(f"        ```{block.language or 'text'} at line {block.start + 1}{status}")
+        for image in slide.images:
+            rows.append(f"        image {image.ref}")
+    return '\n'.join(rows)
+
+
+def main():
+    parser = argparse.ArgumentParser(description="Show how a Marp deck parses into slides")
+    parser.add_argument("input", help="Deck markdown file")
+    parser.add_argument("--json", action="store_true", help="Output the parsed deck as JSON")
+    args = parser.parse_args()
+
+    input_path = Path(args.input)
+    if not input_path.is_file():
+        print(f"Error: File not found: {input_path}")
+        sys.exit(1)
+
+    deck = parse_deck(input_path.read_text())
+    if args.json:
+        data = asdict(deck)
+        del data["lines"]
+        print(json.dumps(data, indent=2))
+    else:
+        print(outline(deck))
+
+
+if __name__ == "__main__":
+    main()
@@ -0,0 +1,167 @@
+"""
+Persistent embedding cache for the session indexer.
+
+Embeddings live in a memory-mapped float32 matrix (vectors.f32); a JSON hash
+index (index.json) maps each key to its row and last-use tick. Keys hash the
+model name together with the chunk text, so a cache survives --rebuild and
+chunking changes that leave the text of most chunks untouched. When the cache
+is full, the least recently used rows are reused; the index is saved without
+the evicted keys before their rows are overwritten, so a run that dies
+midway never leaves a key pointing at another text's vector.
+"""
+
+import hashlib
+import json
+import os
+
+
+class EmbeddingCache:
+    """LRU cache of text embeddings backed by a memory-mapped matrix."""
+
+    def __init__(self, directory: str, model_name: str, max_entries: int):
+        import numpy as np
+        self.np = np
+        self.directory = directory
+        self.model_name = model_name
+        self.max_entries = max_entries
+        self.vectors_path = os.path.join(directory, "vectors.f32")
+        self.index_path = os.path.join(directory, "index.json")
+
+        self.dim = None
+        self.clock = 0
+        self.entries = {}  # key -> [row, last_used]
+        self.free_rows = []
+        self.vectors = None
+
+        self.hits = 0
+        self.misses = 0
+        self.evictions = 0
+
+        self._load()
+
+    def _load(self):
+        """Load the hash index and map the matrix, discarding incompatible caches."""
+        if not os.path.exists(self.index_path) or not os.path.exists(self.vectors_path):
+            return
+
+        try:
+            with open(self.index_path, 'r') as f:
+                meta = json.load(f)
+        except Exception as e:
+            print(f"Warning: Could not load embedding cache: {e}")
+            return
+
+        if meta.get("capacity") != self.max_entries:
+            # Row layout depends on capacity; start over rather than remap
+            return
+
+        self.dim = meta["dim"]
+        self.clock = meta["clock"]
+        self.entries = meta["entries"]
+        used = {row for row, _ in self.entries.values()}
+        self.free_rows = sorted(set(range(self.max_entries)) - used, reverse=True)
+        self.vectors = self.np.memmap(
+            self.vectors_path, dtype='float32', mode='r+',
+            shape=(self.max_entries, self.dim)
+        )
+
+    def _create(self, dim: int):
+        """Allocate an empty matrix (sparse on disk until rows are written)."""
+        os.makedirs(self.directory, exist_ok=True)
+        # The old index describes rows about to be discarded
+        if os.path.exists(self.index_path):
+            os.unlink(self.index_path)
+        self.dim = dim
+        self.entries = {}
+        self.free_rows = list(range(self.max_entries - 1, -1, -1))
+        self.vectors = self.np.memmap(
+            self.vectors_path, dtype='float32', mode='w+',
+            shape=(self.max_entries, dim)
+        )
+
+    def key(self, text: str) -> str:
+        """Cache key for a text under this cache's model."""
+        return hashlib.sha256(f"{self.model_name}\0{text}".encode('utf-8')).hexdigest()
+
+    def lookup(self, texts: list[str]):
+        """
+        Look up embeddings for texts.
+
+        Returns (found, misses): found maps position in texts to its cached
+        vector; misses lists the positions that need encoding.
+        """
+        found = {}
+        misses = []
+        for i, text in enumerate(texts):
+            entry = self.entries.get(self.key(text))
+            if entry is None:
+                misses.append(i)
+                continue
+            self.clock += 1
+            entry[1] = self.clock
+            found[i] = self.np.array(self.vectors[entry[0]])
+
+        self.hits += len(found)
+        self.misses += len(misses)
+        return found, misses
+
+    def store(self, texts: list[str], embeddings):
+        """Insert embeddings for texts, evicting least recently used rows if full."""
+        if len(texts) == 0:
+            return
+        if self.vectors is None or embeddings.shape[1] != self.dim:
+            self._create(embeddings.shape[1])
+
+        keys = [self.key(text) for text in texts]
+        needed = sum(1 for k in set(keys) if k not in self.entries)
+        self._evict(needed - len(self.free_rows), protect=set(keys))
+
+        for k, vector in zip(keys, embeddings):
+            entry = self.entries.get(k)
+            if entry is None:
+                if not self.free_rows:
+                    continue  # More new texts in one batch than the whole cache holds
+                entry = [self.free_rows.pop(), 0]
+                self.entries[k] = entry
+            self.clock += 1
+            entry[1] = self.clock
+            self.vectors[entry[0]] = vector
+
+    def _evict(self, count: int, protect: set):
+        """Free the count least recently used rows, skipping protected keys."""
+        if count <= 0:
+            return
+        victims = sorted(
+            (k for k in self.entries if k not in protect),
+            key=lambda k: self.entries[k][1]
+        )[:count]
+        for k in victims:
+            self.free_rows.append(self.entries.pop(k)[0])
+        self.evictions += len(victims)
+        if victims:
+            # The saved index must stop mapping these rows before they are reused
+            self.save()
+
+    def save(self):
+        """Flush the matrix and write the hash index."""
+        if self.vectors is None:
+            return
+        self.vectors.flush()
+        tmp_path = f"{self.index_path}.tmp"
+        with open(tmp_path, 'w') as f:
+            json.dump({
+                "model": self.model_name,
+                "dim": self.dim,
+                "capacity": self.max_entries,
+                "clock": self.clock,
+                "entries": self.entries,
+            }, f)
+        os.replace(tmp_path, self.index_path)
+
+    def stats(self) -> str:
+        """One-line hit/miss summary for the current run."""
+        total = self.hits + self.misses
+        rate = 100 * self.hits / total if total else 0.0
+        return (f"Embedding cache: {self.hits} hit(s), {self.misses} miss(es) "
+                f"({rate:.0f}% hit rate), {self.evictions} eviction(s), "
+                f"{len(self.entries)}/{self.max_entries} entries")
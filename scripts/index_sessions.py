@@ -3,18 +3,67 @@
 Index session markdown files into a FAISS vector store for semantic search.
 
 Usage:
-    python scripts/index_sessions.py [--rebuild]
+    python scripts/index_sessions.py [--rebuild] [--batch-size 256] [--workers N]
+                                     [--window-tokens 128] [--overlap-tokens 21]
+                                     [--storage float32|float16|int8] [--[no-]exact-vectors]
+    python scripts/index_sessions.py --recall-report [-k 10] [--queries 200]
+    python scripts/index_sessions.py --storage-benchmark [-k 10] [--queries 200]
+    python scripts/index_sessions.py --profile [trace.json]
 
 Options:
-    --rebuild   Force rebuild of entire index, ignoring cached state
+    --rebuild            Force rebuild of entire index, ignoring cached state
+    --batch-size N       Chunks per embedding batch (default: 256)
+    --workers N          Processes for reading and chunking files (default: CPU count)
+    --window-tokens N    Words per chunk window (default: 128)
+    --overlap-tokens N   Words shared by consecutive windows (default: 21)
+    --storage MODE       Flat-tier vector storage: float32, float16 or int8
+                         (default: as the index was last built, else float32)
+    --[no-]exact-vectors Keep (default) or skip the exact float32 copy kept for
+                         re-ranking lossy indexes; unset, as the index was last built
+    --recall-report      Measure recall@k and query latency against exact search
+    --storage-benchmark  Compare load time, RSS and recall per storage mode
+    --profile [FILE]     Time each stage (wall, CPU, peak RSS): print a summary and
+                         write a Chrome trace (default: .vector_index/trace.json)
+
+Incremental runs compare per-file and per-chunk content hashes recorded in
+manifest.json: only new or edited chunks are embedded, and vectors for chunks
+that were edited away or whose file was deleted are removed from the index.
+
+Before embedding, new chunks pass a MinHash/LSH dedup stage: a chunk that is
+nearly identical to an indexed one becomes another source of that vector
+instead of a vector of its own (see near_duplicates.py).
+
+Chunk metadata lives in a SQLite chunk store whose FTS5 table doubles as the
+BM25 index for lexical search (see search_sessions.py).
+
+The index type is picked by corpus size (see choose_index_params): exact flat
+search for small corpora, then IVF with scalar or product quantization. The
+chosen parameters, and the --storage and --exact-vectors settings they came
+from, are recorded in the manifest; later runs keep those settings unless
+the flags are passed again. Lossy indexes (float16 or
+int8 flat storage, and the IVF tiers) keep exact float32 vectors in
+exact.faiss; search memory-maps both files and re-ranks the quantized
+index's top candidates against the exact vectors.
 """
 
+import argparse
+import hashlib
 import json
 import os
+import math
 import re
 import sys
+import time
+from collections import deque
+from concurrent.futures import ProcessPoolExecutor
 from pathlib import Path
 
+from chunk_store import ChunkStore, migrate_json_metadata
+from embedding_cache import EmbeddingCache
+from near_duplicates import band_keys, find_near_duplicate, minhash_signature
+import tracing
+from tracing import span, traced_iter
+
 # Lazy imports for optional dependencies
 def get_dependencies():
     """Import heavy dependencies only when needed."""
@@ -31,55 +80,104 @@ def get_dependencies():
 
 # Configuration
 MODEL_NAME = "all-MiniLM-L6-v2"  # Fast, ~80MB, good quality
+MODEL_MAX_SEQ_LENGTH = 256       # Word pieces the model embeds before truncating
 SESSION_LOGS_DIR = ".session_logs"
 INDEX_DIR = f"{SESSION_LOGS_DIR}/.vector_index"
 INDEX_FILE = f"{INDEX_DIR}/index.faiss"
-METADATA_FILE = f"{INDEX_DIR}/metadata.json"
-INDEXED_FILES_FILE = f"{INDEX_DIR}/indexed_files.txt"
+CHUNK_STORE_FILE = f"{INDEX_DIR}/chunks.sqlite"
+METADATA_FILE = f"{INDEX_DIR}/metadata.json"  # Legacy; migrated into the chunk store
+MANIFEST_FILE = f"{INDEX_DIR}/manifest.json"
+MANIFEST_VERSION = 2  # 2: chunk IDs may be shared by near-duplicate chunks
+EMBEDDING_CACHE_DIR = f"{INDEX_DIR}/embedding_cache"
+EMBEDDING_CACHE_MAX_ENTRIES = 100_000  # ~150MB of float32 at 384 dims
+EXACT_INDEX_FILE = f"{INDEX_DIR}/exact.faiss"
+RECALL_REPORT_FILE = f"{INDEX_DIR}/recall_report.json"
+STORAGE_BENCHMARK_FILE = f"{INDEX_DIR}/storage_benchmark.json"
+TRACE_FILE = f"{INDEX_DIR}/trace.json"
+
+# Chunking: windows sized so a window of words stays within the model's
+# max sequence length. English prose averages ~1.3 word pieces per word, but
+# code, paths and tool output in session logs run far higher; windows the
+# model still truncates are counted and reported (see count_truncated)
+WORD_PIECES_PER_WORD = 2
+WINDOW_TOKENS = MODEL_MAX_SEQ_LENGTH // WORD_PIECES_PER_WORD
+OVERLAP_TOKENS = WINDOW_TOKENS // 6
+SECTION_HEADER = re.compile(r'^## (.*)$', re.MULTILINE)
+WORD = re.compile(r'\S+')
+
+# Indexing pipeline
+EMBED_BATCH_SIZE = 256                   # Chunks per model.encode call
+CHUNK_WORKERS = os.cpu_count() or 1      # Processes reading and chunking files
+PENDING_FILES_PER_WORKER = 4             # Bound on files in flight per worker
 
+# Index tiering by chunk count
+FLAT_MAX_CHUNKS = 50_000         # Exact search below this
+IVF_SQ_MAX_CHUNKS = 1_000_000    # IVF + 8-bit scalar quantization below this, IVF + PQ above
+IVF_NPROBE_FRACTION = 1 / 16     # Share of IVF lists probed per query
+IVF_MIN_NPROBE = 8
+IVF_RETRAIN_GROWTH = 4           # Retrain IVF once the corpus grows this many times over
+IVF_TRAIN_SAMPLE = 100_000       # Max vectors used to train IVF centroids
 
-def chunk_markdown(content: str, filepath: str) -> list[dict]:
+# Vector storage for the flat tier. Lossy storage (and IVF tiers) keep an
+# exact float32 copy in exact.faiss so search can re-rank top candidates.
+INDEX_STORAGE = "float32"
+STORAGE_FACTORIES = {"float32": "Flat", "float16": "SQfp16", "int8": "SQ8"}
+KEEP_EXACT_VECTORS = True
+RERANK_FACTOR = 4                # Candidates fetched per result when re-ranking
+
+
+def chunk_markdown(content: str, filepath: str,
+                   window_tokens: int = WINDOW_TOKENS,
+                   overlap_tokens: int = OVERLAP_TOKENS) -> list[dict]:
     """
     Chunk markdown content by ## headers for granular retrieval.
 
+    Sections longer than window_tokens are covered by overlapping windows
+    that advance window_tokens - overlap_tokens at a time, so no content is
+    dropped. Tokens are whitespace-separated words, found in one regex pass
+    per section over the original string; each window is sliced out once.
+
     Returns list of dicts with:
         - text: chunk content
         - file: source file path
         - section: section header (or "intro" for content before first header)
+        - section_index: ordinal of the section in the file (intro is 0)
+        - window: ordinal of the window within its section
+        - preview: first 200 characters of text, on one line
     """
     chunks = []
+    step = max(1, window_tokens - overlap_tokens)
 
-    # Split by ## headers (keep the header with the content)
-    sections = re.split(r'(?=^## )', content, flags=re.MULTILINE)
-
-    for section in sections:
-        section = section.strip()
-        if not section:
-            continue
-
-        # Extract section title
-        if section.startswith('## '):
-            lines = section.split('\n', 1)
-            title = lines[0].replace('## ', '').strip()
-            text = lines[1].strip() if len(lines) > 1 else ""
-        else:
-            title = "intro"
-            text = section
+    # Section boundaries as (body_start, body_end, title); headers are not
+    # part of the body, and nothing is copied out of content yet
+    headers = list(SECTION_HEADER.finditer(content))
+    sections = [(0, headers[0].start() if headers else len(content), "intro")]
+    for i, header in enumerate(headers):
+        end = headers[i + 1].start() if i + 1 < len(headers) else len(content)
+        sections.append((header.end(), end, header.group(1).strip()))
 
-        # Skip very short chunks (< 50 chars) as they're not useful for search
-        if len(text) < 50:
+    for section_index, (start, end, title) in enumerate(sections):
+        spans = [m.span() for m in WORD.finditer(content, start, end)]
+        if not spans:
             continue
 
-        # Truncate very long chunks to first 2000 chars for embedding efficiency
-        if len(text) > 2000:
-            text = text[:2000] + "..."
-
-        chunks.append({
-            "text": text,
-            "file": filepath,
-            "section": title,
-            "preview": text[:200].replace('\n', ' ')
-        })
+        first = 0
+        window = 0
+        while True:
+            last = min(first + window_tokens, len(spans)) - 1
+            text = content[spans[first][0]:spans[last][1]]
+            chunks.append({
+                "text": text,
+                "file": filepath,
+                "section": title,
+                "section_index": section_index,
+                "window": window,
+                "preview": text[:200].replace('\n', ' ')
+            })
+            if last == len(spans) - 1:
+                break
+            first += step
+            window += 1
 
     return chunks
 
@@ -101,45 +199,408 @@ def find_session_files(base_dir: str) -> list[Path]:
     return sorted(files)
 
 
-def load_indexed_files() -> set[str]:
-    """Load set of already-indexed file paths."""
-    if not os.path.exists(INDEXED_FILES_FILE):
-        return set()
+def content_hash(data: bytes) -> str:
+    """Return the hex SHA-256 digest of raw bytes."""
+    return hashlib.sha256(data).hexdigest()
+
+
+def chunk_hash(chunk: dict) -> str:
+    """Hash the parts of a chunk that determine its embedding and metadata."""
+    key = f"{chunk['section_index']}\0{chunk['window']}\0{chunk['section']}\0{chunk['text']}"
+    return content_hash(key.encode('utf-8'))
+
+
+def chunking_params(window_tokens: int, overlap_tokens: int) -> dict:
+    """Chunker settings recorded in the manifest; changing them forces a rebuild."""
+    return {"window_tokens": window_tokens, "overlap_tokens": overlap_tokens}
+
 
-    with open(INDEXED_FILES_FILE, 'r') as f:
-        return set(line.strip() for line in f if line.strip())
+def empty_manifest(chunking: dict) -> dict:
+    """Return a manifest describing an empty index."""
+    return {
+        "version": MANIFEST_VERSION,
+        "model": MODEL_NAME,
+        "chunking": chunking,
+        "next_id": 0,
+        "files": {},
+    }
 
 
-def save_indexed_files(files: set[str]):
-    """Save set of indexed file paths."""
-    with open(INDEXED_FILES_FILE, 'w') as f:
-        for filepath in sorted(files):
-            f.write(f"{filepath}\n")
+def load_manifest(chunking: dict = None) -> dict:
+    """
+    Load the index manifest.
+
+    The manifest maps each indexed file to its content hash and the list of
+    chunks it produced, each recorded as {"hash": ..., "id": ...} where id is
+    the vector ID in the FAISS index (shared by near-duplicate chunks). Returns None if there is no usable
+    manifest (missing, unreadable, or written for another model/version, or
+    for chunking settings other than chunking when given).
+    """
+    if not os.path.exists(MANIFEST_FILE):
+        return None
+
+    try:
+        with open(MANIFEST_FILE, 'r') as f:
+            manifest = json.load(f)
+    except Exception as e:
+        print(f"Warning: Could not load manifest: {e}")
+        return None
 
+    if manifest.get("version") != MANIFEST_VERSION or manifest.get("model") != MODEL_NAME:
+        return None
+    if chunking is not None and manifest.get("chunking") != chunking:
+        return None
+    return manifest
 
-def load_existing_index():
-    """Load existing FAISS index and metadata if they exist."""
+
+def save_manifest(manifest: dict):
+    """Save the index manifest."""
+    write_json_atomic(MANIFEST_FILE, manifest, sort_keys=True)
+
+
+def write_json_atomic(path: str, data, **kwargs):
+    """Write JSON via a temp file and rename, so readers never see a partial file."""
+    tmp_path = f"{path}.tmp"
+    with open(tmp_path, 'w') as f:
+        json.dump(data, f, indent=2, **kwargs)
+    os.replace(tmp_path, path)
+
+
+def write_index_atomic(faiss, index, path: str):
+    """Write a FAISS index via a temp file and rename (see write_json_atomic)."""
+    tmp_path = f"{path}.tmp"
+    faiss.write_index(index, tmp_path)
+    os.replace(tmp_path, path)
+
+
+def open_chunk_store() -> ChunkStore:
+    """Open the chunk store, migrating a legacy metadata.json on first use."""
+    os.makedirs(INDEX_DIR, exist_ok=True)
+    store = ChunkStore(CHUNK_STORE_FILE)
+    if os.path.exists(METADATA_FILE):
+        migrated = migrate_json_metadata(METADATA_FILE, store)
+        if migrated:
+            print(f"Migrated {migrated} chunks from {METADATA_FILE} to {CHUNK_STORE_FILE}")
+    return store
+
+
+def read_index_file(faiss, path: str, mmap: bool = False):
+    """
+    Read a FAISS index, optionally memory-mapped read-only.
+
+    Memory-mapped indexes share one page-cached copy across processes and
+    load in milliseconds, but cannot be modified.
+    """
+    if not mmap:
+        return faiss.read_index(path)
+    flag = getattr(faiss, "IO_FLAG_MMAP_IFC", faiss.IO_FLAG_MMAP)
+    return faiss.read_index(path, flag | faiss.IO_FLAG_READ_ONLY)
+
+
+def load_existing_index(mmap: bool = False):
+    """
+    Load existing FAISS index and open the chunk store.
+
+    Returns (index, store); index is None if there is no usable index.
+    Indexes written before vectors carried stable IDs are treated as missing
+    so the caller rebuilds them. With mmap, the index is memory-mapped
+    read-only (for searching, not updating).
+    """
     SentenceTransformer, faiss, np = get_dependencies()
 
-    if not os.path.exists(INDEX_FILE) or not os.path.exists(METADATA_FILE):
-        return None, []
+    store = open_chunk_store()
+    if not os.path.exists(INDEX_FILE):
+        return None, store
 
     try:
-        index = faiss.read_index(INDEX_FILE)
-        with open(METADATA_FILE, 'r') as f:
-            metadata = json.load(f)
-        return index, metadata
+        index = read_index_file(faiss, INDEX_FILE, mmap)
     except Exception as e:
         print(f"Warning: Could not load existing index: {e}")
-        return None, []
+        return None, store
+
+    if not isinstance(index, (faiss.IndexIDMap2, faiss.IndexIVF)):
+        print("Existing index predates the content-hash manifest; rebuilding.")
+        return None, store
+
+    return index, store
+
+
+def load_exact_index(mmap: bool = False):
+    """Load the exact float32 companion index, or None if there is none."""
+    SentenceTransformer, faiss, np = get_dependencies()
+
+    if not os.path.exists(EXACT_INDEX_FILE):
+        return None
+    try:
+        return read_index_file(faiss, EXACT_INDEX_FILE, mmap)
+    except Exception as e:
+        print(f"Warning: Could not load exact vectors: {e}")
+        return None
+
+
+def diff_file_chunks(chunks: list[dict], old_records: list[dict], manifest: dict):
+    """
+    Match a file's fresh chunks against the chunks recorded for it last run.
+
+    Chunks whose hash was already indexed keep their vector ID; the rest get
+    new IDs from the manifest counter (the dedup stage may later point a new
+    record at an existing near-duplicate's ID instead).
+
+    Returns (records, new_chunks, stale_records):
+        - records: manifest chunk records for the file, in chunk order
+        - new_chunks: (record, chunk) pairs that need deduplicating/embedding
+        - stale_records: records of previously indexed chunks that no longer exist
+    """
+    available = {}
+    for record in old_records:
+        available.setdefault(record["hash"], []).append(record)
+
+    records = []
+    new_chunks = []
+    for chunk in chunks:
+        h = chunk_hash(chunk)
+        if available.get(h):
+            record = available[h].pop(0)
+        else:
+            record = {"hash": h, "id": manifest["next_id"]}
+            manifest["next_id"] += 1
+            new_chunks.append((record, chunk))
+        records.append(record)
+
+    stale_records = [record for group in available.values() for record in group]
+    return records, new_chunks, stale_records
+
+
+def choose_index_params(num_chunks: int, dim: int, storage: str = INDEX_STORAGE,
+                        exact_vectors: bool = KEEP_EXACT_VECTORS) -> dict:
+    """
+    Pick the index type and tuning parameters for a corpus size.
+
+    storage selects float32, float16 or 8-bit codes for the flat tier; IVF
+    tiers always quantize. IVF variants are used rather than HNSW because IVF
+    supports remove_ids, which incremental updates rely on. exact_vectors
+    keeps an exact float32 copy alongside lossy indexes for re-ranking.
+    """
+    if num_chunks < FLAT_MAX_CHUNKS:
+        params = {"type": "flat", "storage": storage, "dim": dim,
+                  "factory": f"IDMap2,{STORAGE_FACTORIES[storage]}"}
+        if storage == "int8":
+            params["trained_on"] = num_chunks
+    else:
+        nlist = int(4 * math.sqrt(num_chunks))
+        nprobe = max(IVF_MIN_NPROBE, int(nlist * IVF_NPROBE_FRACTION))
+        params = {"dim": dim, "nlist": nlist, "nprobe": nprobe, "trained_on": num_chunks}
+
+        if num_chunks < IVF_SQ_MAX_CHUNKS:
+            params.update(type="ivf_sq8", storage="int8", factory=f"IVF{nlist},SQ8")
+        else:
+            # Largest sub-quantizer count of at most dim/8 that divides dim
+            pq_m = max(m for m in range(1, dim // 8 + 1) if dim % m == 0)
+            params.update(type="ivf_pq", storage="pq", factory=f"IVF{nlist},PQ{pq_m}", pq_m=pq_m)
+
+    params["exact_vectors"] = exact_vectors and params["storage"] != "float32"
+    return params
+
+
+def storage_settings(manifest: dict, storage: str = None,
+                     exact_vectors: bool = None) -> tuple[str, bool]:
+    """
+    Flat-tier storage and exact-vector settings for a run.
+
+    Settings left as None keep the values the manifest's index was built
+    with, so a plain run never undoes an earlier --storage. Manifests from
+    before the settings were recorded fall back to their index parameters.
+    """
+    recorded = dict(manifest.get("storage") or {})
+    params = manifest.get("index") or {}
+    if "storage" not in recorded and params.get("type") == "flat":
+        recorded["storage"] = params.get("storage", INDEX_STORAGE)
+    if "exact_vectors" not in recorded and params.get("storage", "float32") != "float32":
+        # Only lossy indexes record whether exact vectors were kept
+        recorded["exact_vectors"] = params.get("exact_vectors", False)
+    if storage is None:
+        storage = recorded.get("storage", INDEX_STORAGE)
+    if exact_vectors is None:
+        exact_vectors = recorded.get("exact_vectors", KEEP_EXACT_VECTORS)
+    return storage, exact_vectors
+
+
+def requires_training(params: dict) -> bool:
+    """Whether an index built from params must be trained before adding vectors."""
+    return "trained_on" in params
+
+
+def needs_retier(current: dict, target: dict) -> bool:
+    """Whether the index must be rebuilt to move from current to target params."""
+    if current is None:
+        return True
+    for key, default in (("type", None), ("dim", None), ("storage", "float32"),
+                         ("exact_vectors", False)):
+        if current.get(key, default) != target.get(key, default):
+            return True
+    if requires_training(current):
+        # Retrain once the corpus has outgrown the training sample
+        return target["trained_on"] >= IVF_RETRAIN_GROWTH * max(1, current["trained_on"])
+    return False
+
+
+def create_index(faiss, params: dict, training_vectors=None):
+    """Create an empty index for params, training it if it needs training."""
+    # Inner product on normalized vectors = cosine similarity
+    index = faiss.index_factory(params["dim"], params["factory"], faiss.METRIC_INNER_PRODUCT)
+    if requires_training(params):
+        print(f"Training {params['factory']} index on {len(training_vectors)} vectors...")
+        index.train(training_vectors)
+    if "nprobe" in params:
+        index.nprobe = params["nprobe"]
+    return index
+
+
+def create_exact_index(faiss, dim: int):
+    """Create the float32 companion index used to re-rank lossy search results."""
+    return faiss.IndexIDMap2(faiss.IndexFlatIP(dim))
+
+
+def rerank(exact_index, np, query, candidate_ids, limit: int) -> list[tuple[int, float]]:
+    """
+    Re-score candidate IDs with exact inner products against query.
+
+    With a memory-mapped exact index only the candidates' rows are read.
+    Returns the top limit (id, score) pairs, best first.
+    """
+    if not candidate_ids:
+        return []
+    vectors = np.vstack([exact_index.reconstruct(int(i)) for i in candidate_ids])
+    scores = vectors @ query.reshape(-1)
+    order = np.argsort(-scores)[:limit]
+    return [(int(candidate_ids[i]), float(scores[i])) for i in order]
+
+
+def count_truncated(model, texts: list[str]) -> int:
+    """
+    Number of texts longer than the model's max sequence length (embedded truncated).
+
+    Models without a word-piece tokenizer (such as the benchmark's offline
+    stand-in) do not truncate, so nothing is counted for them.
+    """
+    tokenizer = getattr(model, "tokenizer", None)
+    if tokenizer is None:
+        return 0
+    encoded = tokenizer(texts, add_special_tokens=True, truncation=False,
+                        return_attention_mask=False)
+    return sum(1 for ids in encoded["input_ids"] if len(ids) > model.max_seq_length)
+
+
+def embed_texts(texts: list[str], cache: EmbeddingCache, load_model, stats: dict = None):
+    """
+    Embed texts, encoding only those missing from the embedding cache.
+
+    load_model is called only if there are cache misses, so a fully cached
+    run never loads the embedding model. If stats is given, stats["truncated"]
+    is increased by the number of encoded texts the model had to truncate.
+    """
+    np = cache.np
+    with span("embedding cache lookup", texts=len(texts)):
+        found, misses = cache.lookup(texts)
+
+    if misses:
+        model = load_model()
+        if stats is not None:
+            with span("count truncated", texts=len(misses)):
+                stats["truncated"] += count_truncated(model, [texts[i] for i in misses])
+        with span("encode", texts=len(misses)):
+            encoded = np.array(model.encode([texts[i] for i in misses],
+                                            show_progress_bar=False)).astype('float32')
+        cache.store([texts[i] for i in misses], encoded)
+        found.update(zip(misses, encoded))
+
+    return np.array([found[i] for i in range(len(texts))], dtype='float32')
 
 
-def build_index(rebuild: bool = False):
+def read_and_chunk(filepath: str, known_digest: str, chunking: dict):
+    """
+    Pipeline worker: hash a session file and chunk it if it changed.
+
+    Runs in a worker process. Returns (filepath, digest, chunks, error);
+    chunks is None when the digest matches known_digest (file unchanged).
+    Each chunk carries its MinHash signature under "minhash".
+    """
+    try:
+        data = Path(filepath).read_bytes()
+        digest = content_hash(data)
+        if digest == known_digest:
+            return filepath, digest, None, None
+        with span("chunk_markdown"):
+            chunks = chunk_markdown(data.decode('utf-8'), filepath, **chunking)
+        with span("minhash", chunks=len(chunks)):
+            for chunk in chunks:
+                chunk["minhash"] = minhash_signature(chunk["text"])
+        return filepath, digest, chunks, None
+    except Exception as e:
+        return filepath, None, None, str(e)
+
+
+def iter_chunked_files(session_files: list[Path], manifest: dict, workers: int):
+    """
+    Chunking stage: yield read_and_chunk results in file order.
+
+    With workers > 1, files are chunked on a process pool with at most
+    PENDING_FILES_PER_WORKER files in flight per worker, so chunking runs
+    ahead of embedding without buffering the whole archive.
+    """
+    def known(filepath: Path):
+        entry = manifest["files"].get(str(filepath))
+        return entry["sha256"] if entry is not None else None
+
+    if workers <= 1:
+        for filepath in session_files:
+            yield read_and_chunk(str(filepath), known(filepath), manifest["chunking"])
+        return
+
+    with ProcessPoolExecutor(max_workers=workers) as pool:
+        pending = deque()
+        for filepath in session_files:
+            pending.append(pool.submit(read_and_chunk, str(filepath), known(filepath),
+                                       manifest["chunking"]))
+            if len(pending) >= workers * PENDING_FILES_PER_WORKER:
+                yield pending.popleft().result()
+        while pending:
+            yield pending.popleft().result()
+
+
+def iter_batches(items, batch_size: int):
+    """Group an iterable into lists of at most batch_size items."""
+    batch = []
+    for item in items:
+        batch.append(item)
+        if len(batch) >= batch_size:
+            yield batch
+            batch = []
+    if batch:
+        yield batch
+
+
+def build_index(rebuild: bool = False, batch_size: int = EMBED_BATCH_SIZE,
+                workers: int = CHUNK_WORKERS, window_tokens: int = WINDOW_TOKENS,
+                overlap_tokens: int = OVERLAP_TOKENS, storage: str = None,
+                exact_vectors: bool = None):
     """
     Build or update the FAISS index.
 
+    Files stream through a pipeline: discovery -> hash-and-chunk on a process
+    pool -> fixed-size embedding batches -> incremental index and store
+    writes. Only one batch of chunks is held in memory at a time.
+
     Args:
         rebuild: If True, rebuild entire index from scratch
+        batch_size: Chunks per embedding batch
+        workers: Processes used for reading and chunking files
+        window_tokens: Words per chunk window
+        overlap_tokens: Words shared by consecutive windows of a section
+        storage: Vector storage for the flat tier (see STORAGE_FACTORIES);
+            None keeps the storage the index was built with
+        exact_vectors: Keep exact float32 vectors beside lossy indexes for
+            re-ranking; None keeps the index's current setting
     """
     SentenceTransformer, faiss, np = get_dependencies()
 
@@ -147,85 +608,552 @@ def build_index(rebuild: bool = False):
     os.makedirs(INDEX_DIR, exist_ok=True)
 
     # Find all session files
-    session_files = find_session_files(SESSION_LOGS_DIR)
+    with span("discover files"):
+        session_files = find_session_files(SESSION_LOGS_DIR)
 
-    if not session_files:
+    if not session_files and not os.path.exists(MANIFEST_FILE):
         print("No session files found to index.")
         return
 
-    # Load existing state
-    if rebuild:
-        indexed_files = set()
-        existing_index = None
-        existing_metadata = []
-    else:
-        indexed_files = load_indexed_files()
-        existing_index, existing_metadata = load_existing_index()
+    # Load existing state; the index and manifest are only usable together
+    chunking = chunking_params(window_tokens, overlap_tokens)
+    with span("load index"):
+        previous = load_manifest()
+        manifest = previous if previous and previous.get("chunking") == chunking else None
+        index, store = load_existing_index()
+    # Settings not given keep the previous build's, even through a rebuild
+    storage, exact_vectors = storage_settings(previous or {}, storage, exact_vectors)
+    if rebuild or manifest is None or index is None:
+        manifest = empty_manifest(chunking)
+        index = None
+        store.clear()
+    manifest["storage"] = {"storage": storage, "exact_vectors": exact_vectors}
+
+    index_params = manifest.get("index")
+    if index is not None and index_params is None:
+        # Manifests written before tiering always describe a float32 flat index
+        index_params = choose_index_params(0, index.d, "float32", exact_vectors=False)
+    with span("load index"):
+        exact = load_exact_index() if index is not None and index_params.get("exact_vectors") else None
+    with span("load embedding cache"):
+        cache = EmbeddingCache(EMBEDDING_CACHE_DIR, MODEL_NAME, EMBEDDING_CACHE_MAX_ENTRIES)
+    model = None
+
+    def load_model():
+        nonlocal model
+        if model is None:
+            print(f"Loading embedding model: {MODEL_NAME}")
+            with span("model load"):
+                model = SentenceTransformer(MODEL_NAME)
+        return model
+
+    # Sources to release, as (id, file, chunk hash): start with files that
+    # disappeared since the last run
+    current_paths = {str(f) for f in session_files}
+    stale_sources = []
+    for filepath in list(manifest["files"]):
+        if filepath not in current_paths:
+            stale_sources.extend((r["id"], filepath, r["hash"])
+                                 for r in manifest["files"].pop(filepath)["chunks"])
+
+    changed_files = 0
+    collapsed = 0
+
+    def new_chunk_stream():
+        """
+        Diff each chunked file against the manifest; yield chunks to dedup.
+
+        Each chunk comes with the IDs its file's edited-away chunks had.
+        """
+        nonlocal changed_files
+        # With workers, "chunk" is time spent waiting on the pool
+        for filepath, digest, chunks, error in traced_iter(
+                "chunk", iter_chunked_files(session_files, manifest, workers)):
+            if error is not None:
+                print(f"  Warning: Could not process {filepath}: {error}")
+                continue
+            if chunks is None:
+                continue
+
+            entry = manifest["files"].get(filepath)
+            old_records = entry["chunks"] if entry is not None else []
+            records, file_new, file_stale = diff_file_chunks(chunks, old_records, manifest)
+            manifest["files"][filepath] = {"sha256": digest, "chunks": records}
+            stale_sources.extend((r["id"], filepath, r["hash"]) for r in file_stale)
+            changed_files += 1
+            replaced_ids = {r["id"] for r in file_stale}
+            for record, chunk in file_new:
+                yield record, chunk, replaced_ids
 
-    # Find new files to index
-    new_files = [f for f in session_files if str(f) not in indexed_files]
+    def dedup_stream(items):
+        """
+        Collapse near-duplicates into existing vectors; yield chunks to embed.
 
-    if not new_files and existing_index is not None:
-        print(f"Index up to date ({len(indexed_files)} files indexed)")
+        A chunk matching an indexed (or earlier in this run) chunk is recorded
+        as another source of that vector instead of being embedded. Rows the
+        chunk's own file is replacing are not candidates: a lightly edited
+        chunk would otherwise collapse onto its pre-edit text and vector, and
+        the edit would never be indexed.
+        """
+        nonlocal collapsed
+        for record, chunk, replaced_ids in items:
+            with span("dedup"):
+                signature = chunk.pop("minhash")
+                keys = band_keys(signature)
+                duplicate_of = find_near_duplicate(store, signature, keys, exclude=replaced_ids)
+                if duplicate_of is not None:
+                    record["id"] = duplicate_of
+                    collapsed += 1
+                else:
+                    store.add_signature(record["id"], signature, keys)
+                store.add_sources([(record["id"], record["hash"], chunk)])
+            if duplicate_of is None:
+                yield record["id"], chunk
+
+    # Embed and write new chunks batch by batch. A fresh build starts flat
+    # (float32 if the target storage needs training); it is re-tiered below
+    # once the final chunk count is known.
+    embedded = 0
+    embed_stats = {"truncated": 0}
+    for batch in iter_batches(dedup_stream(new_chunk_stream()), batch_size):
+        embeddings = embed_texts([c["text"] for _, c in batch], cache, load_model, embed_stats)
+        with span("index add", chunks=len(batch)):
+            # Normalize embeddings for cosine similarity (every batch, not just the first build)
+            faiss.normalize_L2(embeddings)
+
+            if index is None:
+                index_params = choose_index_params(0, embeddings.shape[1], storage, exact_vectors)
+                if requires_training(index_params):
+                    index_params = choose_index_params(0, embeddings.shape[1], "float32", False)
+                index = create_index(faiss, index_params)
+                exact = create_exact_index(faiss, index.d) if index_params["exact_vectors"] else None
+            batch_ids = np.array([i for i, _ in batch], dtype='int64')
+            index.add_with_ids(embeddings, batch_ids)
+            if exact is not None:
+                exact.add_with_ids(embeddings, batch_ids)
+            store.add(batch)
+
+        embedded += len(batch)
+        print(f"  Embedded {embedded} chunk(s)...")
+
+    # Drop vectors whose every source chunk was deleted or edited away
+    with span("remove stale", sources=len(stale_sources)):
+        orphaned_ids = store.remove_sources(stale_sources)
+        if orphaned_ids and index is not None:
+            index.remove_ids(np.array(orphaned_ids, dtype='int64'))
+            if exact is not None:
+                exact.remove_ids(np.array(orphaned_ids, dtype='int64'))
+        store.remove(orphaned_ids)
+        store.commit()
+
+    num_chunks = len({r["id"] for entry in manifest["files"].values() for r in entry["chunks"]})
+    retier = False
+    if index is not None:
+        target_params = choose_index_params(num_chunks, index.d, storage, exact_vectors)
+        retier = (needs_retier(index_params, target_params)
+                  or (target_params["exact_vectors"] and exact is None))
+
+    if not embedded and not orphaned_ids and not retier:
+        dedup_summary = dedup_report(store, collapsed)
+        store.close()
+        save_manifest(manifest)
+        if index is None:
+            print("No content to index.")
+        elif changed_files or stale_sources:
+            print(f"Indexed {changed_files} new or changed file(s): no vectors changed")
+            print(dedup_summary)
+        else:
+            print(f"Index up to date ({len(manifest['files'])} files indexed)")
         return
 
-    print(f"Found {len(new_files)} new file(s) to index...")
+    print(f"Indexed {changed_files} new or changed file(s): "
+          f"{embedded} chunk(s) embedded, {len(orphaned_ids)} removed")
+    if embed_stats["truncated"]:
+        print(f"  Warning: {embed_stats['truncated']} chunk(s) exceeded the model's "
+              f"{model.max_seq_length} word pieces and were embedded truncated; "
+              f"a smaller --window-tokens keeps them whole")
 
-    # Load model
-    print(f"Loading embedding model: {MODEL_NAME}")
-    model = SentenceTransformer(MODEL_NAME)
-    embedding_dim = model.get_sentence_embedding_dimension()
+    if retier:
+        print(f"Re-tiering index: {index_params['factory']} -> "
+              f"{target_params['factory']} ({num_chunks} chunks)")
+        with span("re-tier", factory=target_params["factory"]):
+            index, exact = build_tiered_index(faiss, np, target_params, store, cache,
+                                              load_model, batch_size)
+        index_params = target_params
 
-    # Process new files
-    new_chunks = []
-    for filepath in new_files:
-        try:
-            content = filepath.read_text(encoding='utf-8')
-            chunks = chunk_markdown(content, str(filepath))
-            new_chunks.extend(chunks)
-            indexed_files.add(str(filepath))
-        except Exception as e:
-            print(f"  Warning: Could not process {filepath}: {e}")
-
-    if not new_chunks and existing_index is not None:
-        print("No new content to index.")
-        save_indexed_files(indexed_files)
+    dedup_summary = dedup_report(store, collapsed)
+    store.close()
+    with span("save embedding cache"):
+        cache.save()
+
+    # Save index and manifest. Running search daemons notice the replaced
+    # index file and reload on their next query.
+    with span("write index"):
+        manifest["index"] = index_params
+        if exact is not None:
+            write_index_atomic(faiss, exact, EXACT_INDEX_FILE)
+        elif os.path.exists(EXACT_INDEX_FILE):
+            os.unlink(EXACT_INDEX_FILE)
+        write_index_atomic(faiss, index, INDEX_FILE)
+        save_manifest(manifest)
+
+    print(f"Index built: {index.ntotal} chunks from {len(manifest['files'])} files "
+          f"({index_params['factory']}"
+          f"{', exact vectors kept for re-ranking' if exact is not None else ''})")
+    print(f"Index saved to: {INDEX_DIR}/")
+    print(dedup_summary)
+    if cache.hits or cache.misses:
+        print(cache.stats())
+
+
+def dedup_report(store: ChunkStore, collapsed: int) -> str:
+    """Summarize how much near-duplicate collapsing shrank the index."""
+    sources = store.source_count()
+    vectors = store.count()
+    saved = 100 * (sources - vectors) / sources if sources else 0.0
+    return (f"Near-duplicates: {sources} chunks stored as {vectors} vectors "
+            f"({saved:.0f}% smaller); {collapsed} collapsed this run")
+
+
+def build_tiered_index(faiss, np, params, store, cache, load_model, batch_size):
+    """
+    Build a fresh index for params holding every chunk in the store.
+
+    Vectors are re-sourced from the embedding cache (or re-encoded on a miss)
+    rather than reconstructed, since quantized indexes only hold
+    approximations. Indexes that need training are trained on a sample of at
+    most IVF_TRAIN_SAMPLE vectors, then filled batch by batch.
+
+    Returns (index, exact): exact is the float32 companion index, or None
+    if params does not keep exact vectors.
+    """
+    ids = store.ids()
+
+    def vectors_for(batch_ids):
+        chunks = store.get(batch_ids, with_text=True)
+        vectors = embed_texts([chunks[i]["text"] for i in batch_ids], cache, load_model)
+        faiss.normalize_L2(vectors)
+        return vectors
+
+    training = None
+    if requires_training(params):
+        rng = np.random.default_rng(0)
+        sample = rng.choice(len(ids), size=min(IVF_TRAIN_SAMPLE, len(ids)), replace=False)
+        training = np.concatenate([
+            vectors_for(batch) for batch in iter_batches((ids[i] for i in sorted(sample)), batch_size)
+        ])
+    index = create_index(faiss, params, training_vectors=training)
+    exact = create_exact_index(faiss, params["dim"]) if params["exact_vectors"] else None
+    del training
+
+    for batch in iter_batches(ids, batch_size):
+        vectors = vectors_for(batch)
+        batch_ids = np.array(batch, dtype='int64')
+        index.add_with_ids(vectors, batch_ids)
+        if exact is not None:
+            exact.add_with_ids(vectors, batch_ids)
+    return index, exact
+
+
+def load_all_vectors(store: ChunkStore):
+    """
+    Exact normalized vectors for every chunk in the store, via the embedding cache.
+
+    Returns (ids, vectors) as an int64 array and a float32 matrix, in ID order.
+    """
+    SentenceTransformer, faiss, np = get_dependencies()
+
+    cache = EmbeddingCache(EMBEDDING_CACHE_DIR, MODEL_NAME, EMBEDDING_CACHE_MAX_ENTRIES)
+    model = None
+
+    def load_model():
+        nonlocal model
+        if model is None:
+            print(f"Loading embedding model: {MODEL_NAME}")
+            model = SentenceTransformer(MODEL_NAME)
+        return model
+
+    chunks = store.get(store.ids(), with_text=True)
+    ids = np.array(sorted(chunks), dtype='int64')
+    vectors = embed_texts([chunks[i]["text"] for i in ids.tolist()], cache, load_model)
+    faiss.normalize_L2(vectors)
+    cache.save()
+    return ids, vectors
+
+
+def recall_report(k: int = 10, num_queries: int = 200):
+    """
+    Compare the current index against exact search.
+
+    Uses a random sample of indexed chunks as queries, and reports recall@k
+    and per-query latency for the index as built, plus a sweep over nprobe
+    for IVF indexes. Results are printed and written to RECALL_REPORT_FILE.
+    """
+    SentenceTransformer, faiss, np = get_dependencies()
+
+    manifest = load_manifest()
+    index, store = load_existing_index()
+    if manifest is None or index is None or index.ntotal == 0:
+        print("No index to report on. Run index_sessions.py first.")
         return
+    exact_index = load_exact_index(mmap=True)
 
-    # Generate embeddings for new chunks
-    print(f"Generating embeddings for {len(new_chunks)} chunks...")
-    texts = [chunk["text"] for chunk in new_chunks]
-    new_embeddings = model.encode(texts, show_progress_bar=True)
-
-    # Combine with existing index or create new
-    if existing_index is not None and len(existing_metadata) > 0:
-        # Add new embeddings to existing index
-        existing_index.add(np.array(new_embeddings).astype('float32'))
-        all_metadata = existing_metadata + new_chunks
-        index = existing_index
+    ids, vectors = load_all_vectors(store)
+    store.close()
+
+    k = min(k, len(ids))
+    rng = np.random.default_rng(0)
+    queries = vectors[rng.choice(len(ids), size=min(num_queries, len(ids)), replace=False)]
+
+    exact = faiss.IndexFlatIP(vectors.shape[1])
+    exact.add(vectors)
+
+    def timed_search(idx, rerank_with=None):
+        latencies = []
+        results = []
+        for q in queries:
+            start = time.perf_counter()
+            if rerank_with is None:
+                _, found = idx.search(q.reshape(1, -1), k)
+                found = found[0]
+            else:
+                _, candidates = idx.search(q.reshape(1, -1), k * RERANK_FACTOR)
+                found = [i for i, _ in rerank(rerank_with, np, q,
+                                              [int(i) for i in candidates[0] if i >= 0], k)]
+            latencies.append((time.perf_counter() - start) * 1000)
+            results.append(found)
+        return results, np.array(latencies)
+
+    truth_rows, exact_ms = timed_search(exact)
+    truth = [set(ids[row].tolist()) for row in truth_rows]
+
+    def measure(label, rerank_with=None):
+        found, latencies = timed_search(index, rerank_with)
+        recall = np.mean([len(truth[i] & set(np.asarray(found[i]).tolist())) / k
+                          for i in range(len(found))])
+        return {
+            "setting": label,
+            f"recall@{k}": round(float(recall), 4),
+            "p50_ms": round(float(np.percentile(latencies, 50)), 3),
+            "p95_ms": round(float(np.percentile(latencies, 95)), 3),
+        }
+
+    params = manifest.get("index") or {"factory": "IDMap2,Flat"}
+    rows = [{
+        "setting": "exact",
+        f"recall@{k}": 1.0,
+        "p50_ms": round(float(np.percentile(exact_ms, 50)), 3),
+        "p95_ms": round(float(np.percentile(exact_ms, 95)), 3),
+    }]
+    if isinstance(index, faiss.IndexIVF):
+        built_nprobe = index.nprobe
+        nprobes = sorted({1, 2, 4, 8, 16, 32, 64, 128, built_nprobe} & set(range(1, index.nlist + 1)))
+        for nprobe in nprobes:
+            index.nprobe = nprobe
+            marker = " (built)" if nprobe == built_nprobe else ""
+            rows.append(measure(f"nprobe={nprobe}{marker}"))
+        index.nprobe = built_nprobe
     else:
-        # Create new index
-        index = faiss.IndexFlatIP(embedding_dim)  # Inner product for cosine similarity
-
-        # Normalize embeddings for cosine similarity
-        embeddings_array = np.array(new_embeddings).astype('float32')
-        faiss.normalize_L2(embeddings_array)
-        index.add(embeddings_array)
-        all_metadata = new_chunks
-
-    # Save index and metadata
-    faiss.write_index(index, INDEX_FILE)
-    with open(METADATA_FILE, 'w') as f:
-        json.dump(all_metadata, f, indent=2)
-    save_indexed_files(indexed_files)
-
-    print(f"Index built: {index.ntotal} chunks from {len(indexed_files)} files")
-    print(f"Index saved to: {INDEX_DIR}/")
+        rows.append(measure(params["factory"]))
+    if exact_index is not None:
+        rows.append(measure(f"+ rerank x{RERANK_FACTOR}", rerank_with=exact_index))
+
+    print(f"Recall report: {params['factory']}, {index.ntotal} chunks, "
+          f"{len(queries)} queries, k={k}")
+    print(f"  {'setting':<22} {'recall@' + str(k):>10} {'p50 ms':>9} {'p95 ms':>9}")
+    for row in rows:
+        print(f"  {row['setting']:<22} {row[f'recall@{k}']:>10.4f} "
+              f"{row['p50_ms']:>9.3f} {row['p95_ms']:>9.3f}")
+
+    write_json_atomic(RECALL_REPORT_FILE, {
+        "index": params,
+        "chunks": int(index.ntotal),
+        "queries": len(queries),
+        "k": k,
+        "results": rows,
+    })
+    print(f"Report saved to: {RECALL_REPORT_FILE}")
+
+
+def _memory_status() -> dict:
+    """Resident anonymous and file-backed memory of this process, in MB."""
+    status = {}
+    with open("/proc/self/status") as f:
+        for line in f:
+            key, _, value = line.partition(":")
+            if key in ("RssAnon", "RssFile"):
+                status[key] = int(value.split()[0]) / 1024
+    return status
+
+
+def _measure_index_file(path: str, mmap: bool, queries, k: int, exact_path: str = None):
+    """
+    Load an index file in a fresh process and search it (storage benchmark worker).
+
+    Returns load time, memory growth after loading and querying, per-query
+    latencies and the IDs found for each query; with exact_path, results are
+    re-ranked against that (memory-mapped) exact index.
+    """
+    import faiss
+    import numpy as np
+
+    before = _memory_status()
+    start = time.perf_counter()
+    index = read_index_file(faiss, path, mmap)
+    exact = read_index_file(faiss, exact_path, mmap=True) if exact_path else None
+    load_ms = (time.perf_counter() - start) * 1000
+
+    latencies = []
+    found = []
+    for q in queries:
+        start = time.perf_counter()
+        if exact is None:
+            _, ids = index.search(q.reshape(1, -1), k)
+            found.append([int(i) for i in ids[0]])
+        else:
+            _, ids = index.search(q.reshape(1, -1), k * RERANK_FACTOR)
+            found.append([i for i, _ in rerank(exact, np, q, [int(i) for i in ids[0] if i >= 0], k)])
+        latencies.append((time.perf_counter() - start) * 1000)
+
+    after = _memory_status()
+    return {
+        "load_ms": load_ms,
+        "anon_mb": after["RssAnon"] - before["RssAnon"],
+        "file_mb": after["RssFile"] - before["RssFile"],
+        "latencies": latencies,
+        "found": found,
+    }
+
+
+def storage_benchmark(k: int = 10, num_queries: int = 200):
+    """
+    Compare flat-index storage modes on the current corpus.
+
+    Builds a float32, float16 and int8 flat index from the indexed chunks and
+    measures each in a fresh process, loaded normally and memory-mapped: load
+    time, resident memory growth (anonymous vs page cache), p50 query latency,
+    and recall@k against exact search, with and without re-ranking against
+    exact vectors. Results are printed and written to STORAGE_BENCHMARK_FILE.
+    """
+    import multiprocessing
+    import tempfile
+
+    SentenceTransformer, faiss, np = get_dependencies()
+
+    store = open_chunk_store()
+    if store.count() == 0:
+        print("No chunks to benchmark. Run index_sessions.py first.")
+        return
+    ids, vectors = load_all_vectors(store)
+    store.close()
+
+    k = min(k, len(ids))
+    rng = np.random.default_rng(0)
+    queries = vectors[rng.choice(len(ids), size=min(num_queries, len(ids)), replace=False)]
+
+    exact = faiss.IndexFlatIP(vectors.shape[1])
+    exact.add(vectors)
+    _, truth_rows = exact.search(queries, k)
+    truth = [set(ids[row].tolist()) for row in truth_rows]
+    del exact
+
+    # Spawned workers start without this process's heap, so their memory
+    # figures reflect the index alone
+    context = multiprocessing.get_context("spawn")
+    rows = []
+    with tempfile.TemporaryDirectory(dir=INDEX_DIR) as tmp:
+        paths = {}
+        for storage in STORAGE_FACTORIES:
+            # Always the flat tier, whatever the corpus size
+            params = choose_index_params(0, vectors.shape[1], storage)
+            sample = vectors[:IVF_TRAIN_SAMPLE] if requires_training(params) else None
+            index = create_index(faiss, params, training_vectors=sample)
+            index.add_with_ids(vectors, ids)
+            paths[storage] = os.path.join(tmp, f"{storage}.faiss")
+            faiss.write_index(index, paths[storage])
+            del index
+
+        runs = [(storage, mmap, None) for storage in STORAGE_FACTORIES for mmap in (False, True)]
+        runs += [(storage, True, paths["float32"]) for storage in STORAGE_FACTORIES
+                 if storage != "float32"]
+        for storage, mmap, exact_path in runs:
+            with ProcessPoolExecutor(max_workers=1, mp_context=context) as pool:
+                result = pool.submit(_measure_index_file, paths[storage], mmap,
+                                     queries, k, exact_path).result()
+            recall = np.mean([len(truth[i] & set(found)) / k
+                              for i, found in enumerate(result["found"])])
+            rows.append({
+                "storage": storage,
+                "mmap": mmap,
+                "rerank": exact_path is not None,
+                "file_mb": round(os.path.getsize(paths[storage]) / 2**20, 2),
+                "load_ms": round(result["load_ms"], 2),
+                "rss_anon_mb": round(result["anon_mb"], 1),
+                "rss_file_mb": round(result["file_mb"], 1),
+                "p50_ms": round(float(np.percentile(result["latencies"], 50)), 3),
+                f"recall@{k}": round(float(recall), 4),
+            })
+
+    print(f"Storage benchmark: {len(ids)} chunks, dim {vectors.shape[1]}, "
+          f"{len(queries)} queries, k={k}")
+    print(f"  {'storage':<20} {'file MB':>8} {'load ms':>8} {'anon MB':>8} "
+          f"{'cache MB':>9} {'p50 ms':>8} {'recall@' + str(k):>10}")
+    for row in rows:
+        label = row["storage"] + (" mmap" if row["mmap"] else "") + (" +rerank" if row["rerank"] else "")
+        print(f"  {label:<20} {row['file_mb']:>8.2f} {row['load_ms']:>8.2f} "
+              f"{row['rss_anon_mb']:>8.1f} {row['rss_file_mb']:>9.1f} "
+              f"{row['p50_ms']:>8.3f} {row[f'recall@{k}']:>10.4f}")
+
+    write_json_atomic(STORAGE_BENCHMARK_FILE, {
+        "chunks": len(ids),
+        "dim": int(vectors.shape[1]),
+        "queries": len(queries),
+        "k": k,
+        "results": rows,
+    })
+    print(f"Report saved to: {STORAGE_BENCHMARK_FILE}")
 
 
 def main():
-    rebuild = "--rebuild" in sys.argv
-    build_index(rebuild=rebuild)
+    parser = argparse.ArgumentParser(description="Index session logs for semantic search")
+    parser.add_argument("--rebuild", action="store_true", help="Rebuild the index from scratch")
+    parser.add_argument("--batch-size", type=int, default=EMBED_BATCH_SIZE,
+                        help=f"Chunks per embedding batch (default: {EMBED_BATCH_SIZE})")
+    parser.add_argument("--workers", type=int, default=CHUNK_WORKERS,
+                        help=f"Processes for reading and chunking files (default: {CHUNK_WORKERS})")
+    parser.add_argument("--window-tokens", type=int, default=WINDOW_TOKENS,
+                        help=f"Words per chunk window (default: {WINDOW_TOKENS})")
+    parser.add_argument("--overlap-tokens", type=int, default=OVERLAP_TOKENS,
+                        help=f"Words shared by consecutive windows (default: {OVERLAP_TOKENS})")
+    parser.add_argument("--storage", choices=list(STORAGE_FACTORIES), default=None,
+                        help="Vector storage for the flat index tier (default: as the index "
+                             f"was last built, else {INDEX_STORAGE})")
+    parser.add_argument("--exact-vectors", action=argparse.BooleanOptionalAction, default=None,
+                        help="Keep exact vectors beside lossy indexes for re-ranking; "
+                             "--no-exact-vectors disables re-ranking (default: as the index "
+                             "was last built, else kept)")
+    parser.add_argument("--recall-report", action="store_true",
+                        help="Report recall@k and latency against exact search")
+    parser.add_argument("--storage-benchmark", action="store_true",
+                        help="Compare load time, memory and recall of each storage mode")
+    parser.add_argument("-k", type=int, default=10, help="k for the reports (default: 10)")
+    parser.add_argument("--queries", type=int, default=200,
+                        help="Sample queries for the reports (default: 200)")
+    parser.add_argument("--profile", nargs="?", const=TRACE_FILE, default=None, metavar="FILE",
+                        help=f"Write a Chrome trace of each stage and print a summary (default: {TRACE_FILE})")
+    args = parser.parse_args()
+
+    if args.profile:
+        tracing.enable()
+    if args.recall_report:
+        recall_report(k=args.k, num_queries=args.queries)
+    elif args.storage_benchmark:
+        storage_benchmark(k=args.k, num_queries=args.queries)
+    else:
+        build_index(rebuild=args.rebuild, batch_size=args.batch_size, workers=args.workers,
+                    window_tokens=args.window_tokens, overlap_tokens=args.overlap_tokens,
+                    storage=args.storage, exact_vectors=args.exact_vectors)
+    tracing.report(args.profile)
 
 
 if __name__ == "__main__":
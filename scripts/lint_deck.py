@@ -0,0 +1,409 @@
+#!/usr/bin/env python3
+"""
+Check a deck against the mechanical rules of the quality checklist.
+
+Usage:
+    python scripts/lint_deck.py <deck.md> [--json] [--no-cache]
+
+Encodes the checks from agent_docs/quality-checklist.md and
+agent_docs/slide-creation-rules.md that need no judgement:
+
+Per slide
+    title-missing     no heading (title, lead and transition slides exempt)
+    title-label       the title is a label, not a claim: under four words,
+                      ends in a colon, or a stock label like "Results"
+    one-idea          "and also" / "another thing", or a second `#` title
+    bullets           more than 6 bullet points
+    text-density      more than ~8 lines of body text (long lines count as
+                      the lines they wrap to)
+    table-rows        13+ rows (split the slide); 9-12 rows without a
+                      scoped font-size or a small/dense class
+    table-with-text   a table plus more than 3 lines of text
+    code-length       a code block over 12 lines (Mermaid excluded)
+    unclosed-fence    a code fence that never closes
+    image-size        an image with no size (w:, width:, bg, fit, ...)
+    speaker-notes     (info) a diagram, chart, table or code block with no
+                      speaker notes
+
+Per deck
+    frontmatter       `marp: true`, `theme` or `paginate` missing
+    theme-unknown     the theme is neither in themes/ nor built into Marp
+    image-missing     a referenced local image does not exist (run the
+                      chart scripts: python scripts/build_charts.py)
+
+Judgement calls (is the title a good claim, does the chart data match the
+text) stay with the reviewer.
+
+Per-slide findings are cached in .<deck>.lint-cache.json next to the deck,
+keyed by each slide's content hash, the class it inherits and this script's
+source, so re-linting after an edit only checks the slides that changed.
+Deck-level checks are cheap and always run.
+
+Exits 1 if there are errors.
+
+Options:
+    --json       Print findings as JSON (per slide, plus deck-level)
+    --no-cache   Lint every slide and leave the cache untouched
+"""
+
+import argparse
+import hashlib
+import json
+import math
+import os
+import re
+import sys
+import time
+from dataclasses import asdict, dataclass
+from functools import lru_cache
+from pathlib import Path
+from typing import Optional
+
+from build import theme_index
+from deck_parser import HEADING, SETEXT_UNDERLINE, Deck, Slide, parse_deck
+
+
+BUILTIN_THEMES = {"default", "gaia", "uncover"}
+EXEMPT_CLASSES = {"title", "lead", "transition"}  # slides whose heading is not a claim
+SMALL_CLASSES = {"small", "dense"}
+
+MIN_TITLE_WORDS = 4
+LABEL_TITLES = {"agenda", "architecture", "architecture overview", "background", "conclusion",
+                "conclusions", "context", "executive summary", "findings", "introduction",
+                "key findings", "key takeaways", "next steps", "outline", "overview",
+                "questions", "recommendations", "results", "summary", "takeaways"}
+SECOND_IDEA = re.compile(r"\b(and also|another thing)\b", re.IGNORECASE)
+
+MAX_BULLETS = 6
+MAX_TEXT_LINES = 8
+CHARS_PER_LINE = 80        # characters that fit on one line of body text
+MAX_TABLE_ROWS = 12        # 13+ rows: split
+SMALL_TABLE_ROWS = 9       # 9-12 rows: needs a smaller font
+TABLE_TEXT_LINES = 3       # text lines allowed beside a table
+MAX_CODE_LINES = 12
+
+BULLET = re.compile(r"^([-*+]|\d+[.)])\s")
+TABLE_SEPARATOR = re.compile(r"^\|?\s*:?-+:?\s*(\|\s*:?-+:?\s*)*\|?$")
+MARKDOWN_IMAGE = re.compile(r"!\[([^\]]*)\]\(")
+IMAGE_LINE = re.compile(r"^(!\[[^\]]*\]\([^)]*\)\s*)+$")
+IMAGE_SIZE = re.compile(r"\b(?:w|h|width|height):|\b(?:bg|fit|contain|cover|auto)\b|\d+%")
+FONT_SIZE = re.compile(r"font-size", re.IGNORECASE)
+
+SEVERITIES = ("error", "warning", "info")
+LINTER_FILES = [Path(__file__).resolve(), Path(__file__).resolve().with_name("deck_parser.py")]
+
+RED = '\033[0;31m'
+GREEN = '\033[0;32m'
+YELLOW = '\033[1;33m'
+NC = '\033[0m'
+SEVERITY_COLORS = {"error": RED, "warning": YELLOW, "info": NC}
+
+
+@dataclass
+class Finding:
+    rule: str
+    severity: str            # error, warning or info
+    message: str
+    line: int                # 0-based index into Deck.lines
+    slide: Optional[int]     # None for deck-level findings
+
+
+@lru_cache(maxsize=None)
+def linter_signature() -> str:
+    """Hash of the linter's and parser's source: any change invalidates the cache."""
+    digest = hashlib.sha256()
+    for path in LINTER_FILES:
+        digest.update(path.read_bytes())
+    return digest.hexdigest()
+
+
+def slide_classes(deck: Deck) -> list[set[str]]:
+    """Each slide's classes: its own `_class`, else the `class` inherited so far."""
+    classes = []
+    inherited = ""
+    for slide in deck.slides:
+        inherited = slide.directives.get("class", inherited)
+        classes.append(set(slide.directives.get("_class", inherited).split()))
+    return classes
+
+
+def slide_key(slide: Slide, classes: set[str]) -> str:
+    digest = hashlib.sha256()
+    for part in (linter_signature(), " ".join(sorted(classes)), slide.hash):
+        digest.update(part.encode('utf-8'))
+        digest.update(b'\0')
+    return digest.hexdigest()
+
+
+def lint_slide(slide: Slide, lines: list[str], classes: set[str]) -> list[Finding]:
+    """Findings for one slide; they depend only on its text and classes."""
+    findings = []
+
+    def add(rule: str, severity: str, message: str, line: int = slide.start):
+        findings.append(Finding(rule, severity, message, line, slide.index))
+
+    code_lines = set()
+    for block in slide.code_blocks:
+        end = block.end if block.end is not None else slide.end
+        code_lines.update(range(block.start, end + 1))
+        length = end - block.start - 1
+        if block.end is None:
+            add("unclosed-fence", "error", "Code fence opened here never closes", block.start)
+        elif block.language != "mermaid" and length > MAX_CODE_LINES:
+            add("code-length", "warning",
+                f"Code block has {length} lines (max {MAX_CODE_LINES}): trim it or move it to an appendix",
+                block.start)
+
+    title_line = None
+    titles = 0
+    bullets = 0
+    text_lines = 0
+    table_rows = []     # body rows of each table
+    table_line = None
+    in_comment = in_style = scoped = False
+    scoped_font = False
+    for number in range(slide.start, slide.end):
+        if number in code_lines:
+            continue
+        stripped = lines[number].strip()
+        if in_comment:
+            in_comment = '-->' not in stripped
+            continue
+        if in_style:
+            scoped_font = scoped_font or (scoped and bool(FONT_SIZE.search(stripped)))
+            in_style = '</style>' not in stripped.lower()
+            continue
+        if not stripped:
+            continue
+        if stripped.startswith('<!--'):
+            in_comment = '-->' not in stripped
+            continue
+        if stripped.lower().startswith('<style'):
+            scoped = "scoped" in stripped.lower()
+            scoped_font = scoped_font or (scoped and bool(FONT_SIZE.search(stripped)))
+            in_style = '</style>' not in stripped.lower()
+            continue
+
+        for match in MARKDOWN_IMAGE.finditer(stripped):
+            if not IMAGE_SIZE.search(match.group(1)):
+                add("image-size", "warning",
+                    "Image has no size: use ![w:900](...), ![bg](...) or similar", number)
+        if IMAGE_LINE.match(stripped) or (stripped.startswith('<') and stripped.endswith('>')):
+            continue
+
+        if HEADING.match(stripped):
+            if stripped.startswith('# '):
+                titles += 1
+            if title_line is None:
+                title_line = number
+                continue
+        elif title_line is None and slide.title is not None and stripped == slide.title:
+            title_line = number
+            continue
+        if SETEXT_UNDERLINE.match(stripped):
+            continue
+
+        if stripped.startswith('|'):
+            if table_line is None or table_line != number - 1:
+                table_rows.append(-1)  # the header row is not counted
+            table_line = number
+            if not TABLE_SEPARATOR.match(stripped):
+                table_rows[-1] += 1
+            continue
+
+        if BULLET.match(stripped):
+            bullets += 1
+        second_idea = SECOND_IDEA.search(stripped)
+        if second_idea:
+            add("one-idea", "warning",
+                f'"{second_idea.group(1)}" suggests a second idea: split the slide', number)
+        text_lines += max(1, math.ceil(len(stripped) / CHARS_PER_LINE))
+
+    exempt = bool(classes & EXEMPT_CLASSES)
+    title = slide.title
+    if title is None:
+        if not exempt:
+            add("title-missing", "warning", "Slide has no title")
+    elif not exempt:
+        words = title.split()
+        if title.strip().rstrip('*_').lower().rstrip('.:') in LABEL_TITLES \
+                or len(words) < MIN_TITLE_WORDS or title.rstrip('*_ ').endswith(':'):
+            add("title-label", "warning",
+                f'Title "{title}" is a label, not an assertion: state the slide\'s claim',
+                title_line if title_line is not None else slide.start)
+    if titles > 1:
+        add("one-idea", "warning", f"Slide has {titles} `#` titles: one idea per slide")
+
+    if bullets > MAX_BULLETS:
+        add("bullets", "warning",
+            f"{bullets} bullet points (max {MAX_BULLETS}): find the structure or split the slide")
+    if text_lines > MAX_TEXT_LINES:
+        add("text-density", "warning",
+            f"~{text_lines} lines of body text (max {MAX_TEXT_LINES}): the slide will overflow")
+
+    small = scoped_font or bool(classes & SMALL_CLASSES) or any(c.startswith("dense") for c in classes)
+    for rows in table_rows:
+        if rows > MAX_TABLE_ROWS:
+            add("table-rows", "error", f"Table has {rows} rows (max {MAX_TABLE_ROWS}): split it")
+        elif rows >= SMALL_TABLE_ROWS and not small:
+            add("table-rows", "warning",
+                f"Table has {rows} rows: add <style scoped>table {{ font-size: 0.75em; }}</style>")
+    if table_rows and text_lines > TABLE_TEXT_LINES:
+        add("table-with-text", "warning",
+            f"Table plus ~{text_lines} lines of text (max {TABLE_TEXT_LINES}): reduce one or the other")
+
+    visual = bool(slide.code_blocks or table_rows) or any(
+        not image.remote and Path(image.ref).suffix.lower() == ".svg" for image in slide.images)
+    if visual and not slide.notes:
+        add("speaker-notes", "info", "Diagram, chart, table or code with no speaker notes")
+    return findings
+
+
+def lint_deck_level(deck: Deck, deck_dir: Path) -> list[Finding]:
+    """Checks on the frontmatter and referenced files; not cached."""
+    findings = []
+    values = {**deck.frontmatter, **deck.global_directives()}
+    if values.get("marp") != "true":
+        findings.append(Finding("frontmatter", "error", "Frontmatter lacks `marp: true`", 0, None))
+    for key in ("theme", "paginate"):
+        if key not in values:
+            findings.append(Finding("frontmatter", "warning", f"Frontmatter lacks `{key}`", 0, None))
+    theme = values.get("theme")
+    if theme and theme not in BUILTIN_THEMES and theme not in theme_index():
+        findings.append(Finding("theme-unknown", "error",
+                                f"Theme '{theme}' is not in themes/ or built into Marp", 0, None))
+
+    seen = set()
+    for image in deck.images:
+        path = image.local_path(deck_dir)
+        if path is None or path in seen:
+            continue
+        seen.add(path)
+        if not path.exists():
+            findings.append(Finding("image-missing", "error",
+                                    f"Image not found: {image.ref}", image.line, image.slide))
+    return findings
+
+
+class LintCache:
+    """Per-slide findings by slide key, with lines relative to the slide's start."""
+
+    def __init__(self, path: Path):
+        self.path = path
+        try:
+            self.entries = json.loads(path.read_text())
+        except (OSError, ValueError):
+            self.entries = {}
+        self.used = {}
+
+    def lookup(self, key: str, slide: Slide) -> Optional[list[Finding]]:
+        entry = self.entries.get(key)
+        if entry is None:
+            return None
+        self.used[key] = entry
+        return [Finding(rule, severity, message, slide.start + offset, slide.index)
+                for rule, severity, message, offset in entry]
+
+    def store(self, key: str, slide: Slide, findings: list[Finding]):
+        self.used[key] = [[f.rule, f.severity, f.message, f.line - slide.start] for f in findings]
+
+    def save(self):
+        """Write the entries of the current slides only, so edits do not pile up."""
+        if self.used == self.entries:
+            return
+        tmp_path = self.path.with_name(f"{self.path.name}.tmp")
+        tmp_path.write_text(json.dumps(self.used))
+        os.replace(tmp_path, self.path)
+
+
+def cache_path(input_path: Path) -> Path:
+    return input_path.with_name(f".{input_path.stem}.lint-cache.json")
+
+
+def lint(input_path: Path, use_cache: bool = True) -> tuple[Deck, list[Finding], int]:
+    """Lint a deck; returns (deck, findings in line order, slides served from cache)."""
+    deck = parse_deck(input_path.read_text())
+    cache = LintCache(cache_path(input_path)) if use_cache else None
+    findings = lint_deck_level(deck, input_path.parent)
+    cached = 0
+    for slide, classes in zip(deck.slides, slide_classes(deck)):
+        key = slide_key(slide, classes)
+        result = cache.lookup(key, slide) if cache else None
+        if result is None:
+            result = lint_slide(slide, deck.lines, classes)
+            if cache:
+                cache.store(key, slide, result)
+        else:
+            cached += 1
+        findings.extend(result)
+    if cache:
+        cache.save()
+    findings.sort(key=lambda f: (f.line, SEVERITIES.index(f.severity)))
+    return deck, findings, cached
+
+
+def counts(findings: list[Finding]) -> dict[str, int]:
+    return {severity: sum(f.severity == severity for f in findings) for severity in SEVERITIES}
+
+
+def to_json(input_path: Path, deck: Deck, findings: list[Finding], cached: int) -> dict:
+    def entry(finding: Finding) -> dict:
+        data = asdict(finding)
+        data["line"] += 1
+        del data["slide"]
+        return data
+
+    return {
+        "deck": str(input_path),
+        "summary": {"slides": len(deck.slides), "cached": cached, **counts(findings)},
+        "deck_findings": [entry(f) for f in findings if f.slide is None],
+        "slides": [{"slide": slide.index + 1, "line": slide.start + 1, "title": slide.title,
+                    "hash": slide.hash,
+                    "findings": [entry(f) for f in findings if f.slide == slide.index]}
+                   for slide in deck.slides],
+    }
+
+
+def format_findings(input_path: Path, findings: list[Finding]) -> str:
+    rows = []
+    for f in findings:
+        where = "deck" if f.slide is None else f"slide {f.slide + 1}"
+        color = SEVERITY_COLORS[f.severity]
+        rows.append(f"{input_path}:{f.line + 1}: {color}{f.severity}{NC} [{f.rule}] {where}: {f.message}")
+    return '\n'.join(rows)
+
+
+def main():
+    parser = argparse.ArgumentParser(
+        description="Check a deck against the mechanical rules of the quality checklist"
+    )
+    parser.add_argument("input", help="Deck markdown file")
+    parser.add_argument("--json", action="store_true", help="Output findings as JSON")
+    parser.add_argument("--no-cache", action="store_true",
+                        help="Lint every slide, without reading or writing the cache")
+    args = parser.parse_args()
+
+    input_path = Path(args.input)
+    if not input_path.is_file():
+        print(f"{RED}Error: File not found: {input_path}{NC}")
+        sys.exit(1)
+
+    start_time = time.perf_counter()
+    deck, findings, cached = lint(input_path, use_cache=not args.no_cache)
+    elapsed = time.perf_counter() - start_time
+    totals = counts(findings)
+
+    if args.json:
+        print(json.dumps(to_json(input_path, deck, findings, cached), indent=2))
+    else:
+        if findings:
+            print(format_findings(input_path, findings))
+        color = RED if totals["error"] else YELLOW if totals["warning"] else GREEN
+        print(f"{color}{len(deck.slides)} slide(s): {totals['error']} error(s), "
+              f"{totals['warning']} warning(s), {totals['info']} note(s) "
+              f"({cached} cached, {len(deck.slides) - cached} linted, {elapsed * 1000:.0f} ms){NC}")
+    sys.exit(1 if totals["error"] else 0)
+
+
+if __name__ == "__main__":
+    main()
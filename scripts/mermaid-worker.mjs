@@ -0,0 +1,214 @@
+#!/usr/bin/env node
+// Long-lived Mermaid render worker.
+//
+// Keeps one headless browser warm and renders Mermaid sources sent as JSON
+// lines on stdin, answering each with a JSON line on stdout:
+//
+//   -> {"id": 1, "code": "flowchart LR\n  A --> B", "theme": "neutral",
+//       "background": "white", "timeout_ms": 30000}
+//   <- {"id": 1, "ok": true, "svg": "<svg ..."}
+//   <- {"id": 1, "ok": false, "error": "Parse error on line 2 ...", "timeout": false}
+//
+// On startup it prints {"ready": true, "version": "<mermaid-cli version>"}.
+// Up to CONCURRENCY diagrams render at once, each in its own page. A render
+// that exceeds its timeout is reported and its browser retired; a browser
+// that crashes is relaunched on the next request. The worker exits when
+// stdin closes. Driven by scripts/mermaid_renderer.py.
+
+import { execSync } from 'node:child_process';
+import { existsSync, readFileSync } from 'node:fs';
+import { createRequire } from 'node:module';
+import { join } from 'node:path';
+import { createInterface } from 'node:readline';
+import { pathToFileURL } from 'node:url';
+
+const CONCURRENCY = Number(process.env.MERMAID_WORKER_CONCURRENCY || 4);
+const DEFAULT_TIMEOUT_MS = 30000;
+const VIEWPORT = { width: 800, height: 600, deviceScaleFactor: 1 };  // mmdc defaults
+
+// Mermaid and puppeteer may log; stdout carries only protocol lines
+console.log = console.error;
+console.info = console.error;
+
+function send(message) {
+  process.stdout.write(JSON.stringify(message) + '\n');
+}
+
+// Locate the mermaid-cli package: MERMAID_CLI_DIR, a local node_modules, or
+// the global npm root (where `npm install -g` puts mmdc)
+function findCliDir() {
+  const candidates = [];
+  if (process.env.MERMAID_CLI_DIR) candidates.push(process.env.MERMAID_CLI_DIR);
+  candidates.push(join(process.cwd(), 'node_modules', '@mermaid-js', 'mermaid-cli'));
+  try {
+    const root = execSync('npm root -g', { encoding: 'utf8', stdio: ['ignore', 'pipe', 'ignore'] });
+    candidates.push(join(root.trim(), '@mermaid-js', 'mermaid-cli'));
+  } catch {
+    // npm not on PATH
+  }
+  return candidates.find((dir) => existsSync(join(dir, 'package.json'))) ?? null;
+}
+
+async function loadCli(dir) {
+  const pkg = JSON.parse(readFileSync(join(dir, 'package.json'), 'utf8'));
+  const entry = typeof pkg.exports === 'string' ? pkg.exports
+    : (typeof pkg.exports?.['.'] === 'string' ? pkg.exports['.'] : pkg.main ?? 'src/index.js');
+  const { renderMermaid } = await import(pathToFileURL(join(dir, entry)).href);
+  // puppeteer is a dependency of mermaid-cli, so resolve it from there
+  const puppeteerPath = createRequire(join(dir, 'package.json')).resolve('puppeteer');
+  const puppeteerModule = await import(pathToFileURL(puppeteerPath).href);
+  const puppeteer = puppeteerModule.default ?? puppeteerModule;
+  return { renderMermaid, puppeteer, version: pkg.version };
+}
+
+function launchOptions() {
+  // Same format as mmdc's --puppeteerConfigFile
+  const configFile = process.env.MERMAID_PUPPETEER_CONFIG;
+  const options = configFile ? JSON.parse(readFileSync(configFile, 'utf8')) : {};
+  return { headless: true, ...options };
+}
+
+class TimeoutError extends Error {}
+
+class BrowserPool {
+  // One live browser at a time. Retired browsers (after a timeout) close
+  // once the renders still using them finish.
+  constructor(puppeteer) {
+    this.puppeteer = puppeteer;
+    this.current = null;  // {promise, inflight, retired}
+  }
+
+  acquire() {
+    if (this.current === null) {
+      const slot = { inflight: 0, retired: false };
+      slot.promise = this.puppeteer.launch(launchOptions()).then((browser) => {
+        browser.on('disconnected', () => {
+          if (this.current === slot) this.current = null;
+        });
+        return browser;
+      });
+      slot.promise.catch(() => {
+        if (this.current === slot) this.current = null;
+      });
+      this.current = slot;
+    }
+    this.current.inflight += 1;
+    return this.current;
+  }
+
+  release(slot) {
+    slot.inflight -= 1;
+    if (slot.retired && slot.inflight === 0) {
+      slot.promise.then((browser) => browser.close()).catch(() => {});
+    }
+  }
+
+  retire(slot) {
+    slot.retired = true;
+    if (this.current === slot) this.current = null;
+  }
+
+  async close() {
+    if (this.current !== null) {
+      const slot = this.current;
+      this.current = null;
+      await slot.promise.then((browser) => browser.close()).catch(() => {});
+    }
+  }
+}
+
+async function renderOne(cli, pool, request) {
+  const timeoutMs = request.timeout_ms ?? DEFAULT_TIMEOUT_MS;
+  const slot = pool.acquire();
+  let timer;
+  try {
+    const browser = await slot.promise;
+    const timeout = new Promise((_, reject) => {
+      timer = setTimeout(() => reject(new TimeoutError()), timeoutMs);
+    });
+    const { data } = await Promise.race([
+      cli.renderMermaid(browser, request.code, 'svg', {
+        viewport: VIEWPORT,
+        backgroundColor: request.background ?? 'white',
+        mermaidConfig: { theme: request.theme ?? 'default' },
+      }),
+      timeout,
+    ]);
+    return { id: request.id, ok: true, svg: Buffer.from(data).toString('utf8') };
+  } catch (error) {
+    if (error instanceof TimeoutError) {
+      // The page may be wedged; send new work to a fresh browser
+      pool.retire(slot);
+      return { id: request.id, ok: false, timeout: true,
+               error: `render timed out after ${timeoutMs / 1000}s` };
+    }
+    return { id: request.id, ok: false, timeout: false, error: String(error?.message ?? error) };
+  } finally {
+    clearTimeout(timer);
+    pool.release(slot);
+  }
+}
+
+async function main() {
+  const dir = findCliDir();
+  if (dir === null) {
+    send({ ready: false, error: 'mermaid-cli not found (npm install -g @mermaid-js/mermaid-cli)' });
+    process.exit(1);
+  }
+
+  let cli;
+  try {
+    cli = await loadCli(dir);
+  } catch (error) {
+    send({ ready: false, error: `could not load mermaid-cli from ${dir}: ${error.message}` });
+    process.exit(1);
+  }
+
+  const pool = new BrowserPool(cli.puppeteer);
+  const queue = [];
+  const inflight = new Set();
+
+  function pump() {
+    while (inflight.size < CONCURRENCY && queue.length > 0) {
+      const request = queue.shift();
+      const task = renderOne(cli, pool, request).then(send, (error) => {
+        send({ id: request.id, ok: false, timeout: false, error: String(error) });
+      });
+      inflight.add(task);
+      task.finally(() => {
+        inflight.delete(task);
+        pump();
+      });
+    }
+  }
+
+  const lines = createInterface({ input: process.stdin });
+  lines.on('line', (line) => {
+    if (!line.trim()) return;
+    let request;
+    try {
+      request = JSON.parse(line);
+    } catch {
+      send({ ok: false, error: 'malformed request' });
+      return;
+    }
+    if (request.command === 'ping') {
+      send({ id: request.id, ok: true });
+      return;
+    }
+    queue.push(request);
+    pump();
+  });
+
+  lines.on('close', async () => {
+    while (queue.length > 0 || inflight.size > 0) {
+      await Promise.race(inflight);
+    }
+    await pool.close();
+    process.exit(0);
+  });
+
+  send({ ready: true, version: cli.version });
+}
+
+main();
@@ -0,0 +1,350 @@
+#!/usr/bin/env python3
+"""
+Render Mermaid diagrams on a long-lived worker instead of one mmdc per diagram.
+
+Each `mmdc` call starts (and tears down) a headless Chromium, which dominates
+render time. MermaidRenderer runs mermaid-worker.mjs once, keeps its browser
+warm, and sends it diagram sources over a JSON-lines pipe. Diagrams can be
+submitted in batches and render concurrently. A worker that crashes is
+restarted and the affected diagrams retried; a render that exceeds its
+timeout is reported as timed out.
+
+Usage:
+    python scripts/mermaid_renderer.py [-t neutral] [-b white] -o img/ a.mmd b.mmd ...
+
+Writes img/a.svg, img/b.svg, ... and reports diagrams that failed to render.
+Exits 1 if any diagram failed, 2 if the renderer is unavailable.
+"""
+
+import argparse
+import atexit
+import json
+import os
+import shutil
+import subprocess
+import sys
+import threading
+from collections import deque
+from concurrent.futures import Future, TimeoutError as FutureTimeout
+from dataclasses import dataclass
+from pathlib import Path
+from typing import Optional
+
+from tracing import span
+
+
+WORKER_SCRIPT = Path(__file__).with_name("mermaid-worker.mjs")
+DEFAULT_THEME = "neutral"
+DEFAULT_BACKGROUND = "white"
+RENDER_TIMEOUT = 30    # seconds per diagram, enforced by the worker
+STARTUP_TIMEOUT = 60   # seconds for the worker to load mermaid-cli
+HANG_GRACE = 15        # extra seconds before the client assumes the worker hung
+CRASH_RETRIES = 1      # times a diagram is retried after a worker crash
+STDERR_LINES = 20      # worker stderr lines kept for crash reports
+
+
+@dataclass
+class RenderResult:
+    svg: Optional[str] = None
+    error: Optional[str] = None
+    timed_out: bool = False
+
+    @property
+    def ok(self) -> bool:
+        return self.svg is not None
+
+
+class RendererUnavailable(Exception):
+    """Node or mermaid-cli is missing, or the worker failed to start."""
+
+
+class WorkerCrashed(Exception):
+    """The worker exited while requests were outstanding."""
+
+
+def find_cli_dir() -> Optional[str]:
+    """
+    Locate the installed mermaid-cli package.
+
+    Checks MERMAID_CLI_DIR, then the package behind the `mmdc` on PATH (which
+    covers custom npm prefixes), then the global npm root.
+    """
+    if os.environ.get("MERMAID_CLI_DIR"):
+        return os.environ["MERMAID_CLI_DIR"]
+
+    mmdc = shutil.which("mmdc")
+    if mmdc is not None:
+        for parent in Path(os.path.realpath(mmdc)).parents:
+            package = parent / "package.json"
+            if package.exists():
+                try:
+                    if json.loads(package.read_text()).get("name") == "@mermaid-js/mermaid-cli":
+                        return str(parent)
+                except (OSError, ValueError):
+                    pass
+                break
+
+    try:
+        root = subprocess.run(["npm", "root", "-g"], capture_output=True, text=True,
+                              check=True).stdout.strip()
+    except (subprocess.CalledProcessError, FileNotFoundError):
+        return None
+    cli_dir = Path(root) / "@mermaid-js" / "mermaid-cli"
+    return str(cli_dir) if (cli_dir / "package.json").exists() else None
+
+
+def cli_version() -> Optional[str]:
+    """Installed mermaid-cli version, read from its package.json without starting node."""
+    cli_dir = find_cli_dir()
+    if cli_dir is None:
+        return None
+    try:
+        return json.loads((Path(cli_dir) / "package.json").read_text()).get("version")
+    except (OSError, ValueError):
+        return None
+
+
+class MermaidRenderer:
+    """
+    Client for mermaid-worker.mjs.
+
+    Safe to share between threads: requests are multiplexed over one worker
+    and matched to replies by ID. The worker is started on first use and
+    stopped by close() (or when the interpreter exits).
+    """
+
+    def __init__(self, theme: str = DEFAULT_THEME, background: str = DEFAULT_BACKGROUND,
+                 timeout: float = RENDER_TIMEOUT):
+        self.theme = theme
+        self.background = background
+        self.timeout = timeout
+        self.version = None
+
+        self._lock = threading.Lock()
+        self._process = None
+        self._pending = {}  # request id -> Future
+        self._next_id = 0
+        self._stderr = deque(maxlen=STDERR_LINES)
+
+    def __enter__(self):
+        self.start()
+        return self
+
+    def __exit__(self, *exc):
+        self.close()
+
+    def start(self):
+        """Start the worker if it is not running. Raises RendererUnavailable."""
+        with self._lock:
+            self._ensure_started()
+
+    def _ensure_started(self):
+        """Start the worker; the caller holds self._lock."""
+        if self._process is not None and self._process.poll() is None:
+            return
+
+        with span("mmdc startup"):
+            node = shutil.which("node")
+            if node is None:
+                raise RendererUnavailable("node not found; install Node.js and mermaid-cli")
+
+            env = dict(os.environ)
+            cli_dir = find_cli_dir()
+            if cli_dir is not None:
+                env["MERMAID_CLI_DIR"] = cli_dir
+
+            process = subprocess.Popen(
+                [node, str(WORKER_SCRIPT)],
+                stdin=subprocess.PIPE, stdout=subprocess.PIPE, stderr=subprocess.PIPE,
+                text=True, encoding="utf-8", env=env,
+            )
+            ready = Future()
+            self._stderr.clear()
+            threading.Thread(target=self._read_replies, args=(process, ready), daemon=True).start()
+            threading.Thread(target=self._read_stderr, args=(process,), daemon=True).start()
+
+            try:
+                message = ready.result(timeout=STARTUP_TIMEOUT)
+            except (FutureTimeout, WorkerCrashed) as e:
+                process.kill()
+                raise RendererUnavailable(f"mermaid worker failed to start: {e or 'timed out'}")
+            if not message.get("ready"):
+                process.wait()
+                raise RendererUnavailable(message.get("error", "mermaid worker failed to start"))
+
+            self._process = process
+            self.version = message.get("version")
+
+    def _read_replies(self, process, ready: Future):
+        """Dispatch worker replies to their futures until the worker exits."""
+        for line in process.stdout:
+            try:
+                message = json.loads(line)
+            except ValueError:
+                continue
+            if "ready" in message:
+                ready.set_result(message)
+                continue
+            with self._lock:
+                future = self._pending.pop(message.get("id"), None)
+            if future is not None:
+                future.set_result(message)
+
+        # EOF: the worker exited (or was killed); fail whatever it still owed
+        process.wait()
+        error = WorkerCrashed(f"mermaid worker exited with status {process.returncode}"
+                              + (f": {self._stderr[-1]}" if self._stderr else ""))
+        if not ready.done():
+            ready.set_exception(error)
+        with self._lock:
+            if self._process is process:
+                self._process = None
+            orphaned = [f for f in self._pending.values() if getattr(f, "process", None) is process]
+            for request_id in [i for i, f in self._pending.items() if f in orphaned]:
+                del self._pending[request_id]
+        for future in orphaned:
+            future.set_exception(error)
+
+    def _read_stderr(self, process):
+        for line in process.stderr:
+            self._stderr.append(line.rstrip())
+
+    def _submit(self, code: str) -> Future:
+        """Send one render request; the future resolves to the worker's reply."""
+        with self._lock:
+            self._ensure_started()
+            self._next_id += 1
+            future = Future()
+            future.process = self._process
+            self._pending[self._next_id] = future
+            request = {
+                "id": self._next_id,
+                "code": code,
+                "theme": self.theme,
+                "background": self.background,
+                "timeout_ms": int(self.timeout * 1000),
+            }
+            try:
+                self._process.stdin.write(json.dumps(request) + "\n")
+                self._process.stdin.flush()
+            except (BrokenPipeError, OSError):
+                # The reader thread fails this future once it sees EOF
+                pass
+        return future
+
+    def _kill(self, process):
+        """Kill a hung worker; its outstanding requests fail as crashed."""
+        with self._lock:
+            if self._process is process:
+                self._process = None
+        process.kill()
+
+    def _wait(self, future: Future) -> RenderResult:
+        """Turn a reply into a RenderResult, killing the worker if it hung."""
+        try:
+            reply = future.result(timeout=self.timeout + HANG_GRACE)
+        except FutureTimeout:
+            self._kill(future.process)
+            return RenderResult(error=f"render timed out after {self.timeout:g}s", timed_out=True)
+
+        if reply.get("ok"):
+            return RenderResult(svg=reply["svg"])
+        return RenderResult(error=reply.get("error", "render failed"),
+                            timed_out=bool(reply.get("timeout")))
+
+    def render_batch(self, sources: list[str]) -> list[RenderResult]:
+        """
+        Render Mermaid sources concurrently on the warm worker.
+
+        Returns one RenderResult per source, in order. Diagrams lost to a
+        worker crash are retried one at a time on a fresh worker (up to
+        CRASH_RETRIES times), so a diagram that crashes the worker only
+        fails itself. Raises RendererUnavailable if the worker cannot be
+        started.
+        """
+        results = [None] * len(sources)
+        crashed = []
+        with span("mmdc render", diagrams=len(sources)):
+            for i, future in [(i, self._submit(source)) for i, source in enumerate(sources)]:
+                try:
+                    results[i] = self._wait(future)
+                except WorkerCrashed as e:
+                    results[i] = RenderResult(error=str(e))
+                    crashed.append(i)
+
+        for i in crashed:
+            for attempt in range(CRASH_RETRIES):
+                try:
+                    results[i] = self._wait(self._submit(sources[i]))
+                    break
+                except WorkerCrashed as e:
+                    results[i] = RenderResult(error=str(e))
+        return results
+
+    def render(self, source: str) -> RenderResult:
+        """Render one Mermaid source. See render_batch."""
+        return self.render_batch([source])[0]
+
+    def close(self):
+        """Stop the worker, letting it finish in-flight renders."""
+        with self._lock:
+            process, self._process = self._process, None
+        if process is None:
+            return
+        try:
+            process.stdin.close()
+            process.wait(timeout=self.timeout + HANG_GRACE)
+        except (OSError, subprocess.TimeoutExpired):
+            process.kill()
+
+
+_shared = None
+_shared_lock = threading.Lock()
+
+
+def shared_renderer() -> MermaidRenderer:
+    """Process-wide renderer with the deck theme, stopped at interpreter exit."""
+    global _shared
+    with _shared_lock:
+        if _shared is None:
+            _shared = MermaidRenderer()
+            atexit.register(_shared.close)
+        return _shared
+
+
+def main():
+    parser = argparse.ArgumentParser(description="Render Mermaid files to SVG on a warm browser")
+    parser.add_argument("inputs", nargs="+", help="Mermaid source files (.mmd)")
+    parser.add_argument("-o", "--out-dir", required=True, help="Directory for the SVG files")
+    parser.add_argument("-t", "--theme", default=DEFAULT_THEME,
+                        help=f"Mermaid theme (default: {DEFAULT_THEME})")
+    parser.add_argument("-b", "--background", default=DEFAULT_BACKGROUND,
+                        help=f"Background color (default: {DEFAULT_BACKGROUND})")
+    parser.add_argument("--timeout", type=float, default=RENDER_TIMEOUT,
+                        help=f"Seconds allowed per diagram (default: {RENDER_TIMEOUT})")
+    args = parser.parse_args()
+
+    sources = [Path(p).read_text() for p in args.inputs]
+    out_dir = Path(args.out_dir)
+    out_dir.mkdir(parents=True, exist_ok=True)
+
+    try:
+        with MermaidRenderer(args.theme, args.background, args.timeout) as renderer:
+            results = renderer.render_batch(sources)
+    except RendererUnavailable as e:
+        print(f"Error: {e}", file=sys.stderr)
+        sys.exit(2)
+
+    failed = 0
+    for path, result in zip(args.inputs, results):
+        if result.ok:
+            (out_dir / f"{Path(path).stem}.svg").write_text(result.svg)
+        else:
+            failed += 1
+            print(f"  Failed to render {Path(path).name}: {result.error}", file=sys.stderr)
+
+    sys.exit(1 if failed else 0)
+
+
+if __name__ == "__main__":
+    main()
@@ -0,0 +1,635 @@
+#!/usr/bin/env python3
+"""
+Fast, in-process syntax checks for Mermaid diagrams.
+
+Covers the diagram kinds the deck tooling uses (flowchart, sequence, state
+and block-beta) and catches the mistakes that most often break rendering in
+microseconds, with line and column numbers: unbalanced or unquoted brackets
+in labels, invalid arrows, messages without text, unmatched `end`/`}`,
+reserved words and similar. It is a first tier, not the full grammar:
+statements it does not recognize are reported as unrecognized issues, which
+callers leave for mermaid-cli to judge, so a diagram that passes here still
+needs a real render to be sure.
+
+Multi-line markdown-string labels ("`...`") are joined into the statement
+they belong to before it is checked.
+
+Usage:
+    python scripts/mermaid_syntax.py diagram.mmd [...]   # or - for stdin
+
+Prints the diagram kind or each issue as file:line:column: message, and
+exits 1 if any file has issues other than unrecognized ones.
+"""
+
+import re
+import sys
+from dataclasses import dataclass
+from typing import Optional
+
+
+@dataclass(frozen=True)
+class SyntaxIssue:
+    line: int     # 1-based
+    column: int   # 1-based
+    message: str
+    unrecognized: bool = False  # syntax this checker does not know; mermaid-cli decides
+
+    def __str__(self) -> str:
+        return f"line {self.line}, column {self.column}: {self.message}"
+
+
+HEADERS = [
+    (re.compile(r'(flowchart|graph)(?![\w-])'), "flowchart"),
+    (re.compile(r'sequenceDiagram(?![\w-])'), "sequence"),
+    (re.compile(r'stateDiagram(-v2)?(?![\w-])'), "state"),
+    (re.compile(r'block(-beta)?(?![\w-])'), "block"),
+]
+DIRECTIONS = {"TB", "TD", "BT", "LR", "RL"}
+
+# Node ids: word characters and dots, with single hyphens between them
+NODE_ID = re.compile(r'\w[\w.]*(?:-(?=\w)[\w.]*)*')
+CLASS_SUFFIX = re.compile(r':::[\w-]+')
+WIDTH_SUFFIX = re.compile(r':\d+')
+
+# Node shapes as (opener, closers), longest openers first
+SHAPES = [
+    ('(((', (')))',)), ('([', ('])',)), ('[[', (']]',)), ('[(', (')]',)),
+    ('((', ('))',)), ('[/', ('/]', '\\]')), ('[\\', ('\\]', '/]')), ('{{', ('}}',)),
+    ('(', (')',)), ('[', (']',)), ('{', ('}',)), ('>', (']',)),
+]
+BLOCK_ARROW = ('<[', (']>',))
+BLOCK_ARROW_DIRECTION = re.compile(r'\([\w, ]+\)')
+TEXT_SPECIAL = set('()[]{}"')
+MARKDOWN_OPEN = '"`'     # markdown-string labels, which may span lines
+MARKDOWN_CLOSE = '`"'
+
+# Flowchart links: --> --- ==> -.-> <--> o--o --x ~~~ and the open halves
+# of text-in-link forms (-- text -->, == text ==>, -. text .->)
+LINK = re.compile(r'[<ox]?(?:-{2,}|={2,}|-\.+-)[>ox]?|~{3,}|-\.')
+LINK_TEXT_CLOSE = {
+    '--': re.compile(r'-{2,}[>ox]|-{3,}'),
+    '==': re.compile(r'={2,}[>ox]|={3,}'),
+    '-.': re.compile(r'\.+-[>ox]?'),
+}
+
+FLOWCHART_SKIP = {"classDef", "class", "style", "linkStyle", "click", "accTitle", "accDescr"}
+
+SEQUENCE_ARROW = r'<<-->>|<<->>|-->>|->>|--x|-x|--\)|-\)|-->|->'
+SEQUENCE_MESSAGE = re.compile(
+    rf'(?P<src>[^:]+?)\s*(?P<arrow>{SEQUENCE_ARROW})(?P<act>[+-]?)\s*(?P<dst>[^:]*?)\s*(?P<colon>:|$)'
+)
+SEQUENCE_PARTICIPANT = re.compile(
+    r'(?:create\s+)?(?:participant|actor)\s+(?P<name>.+?)(?:\s+as\s+.*)?$'
+)
+SEQUENCE_NOTE = re.compile(r'note\s+(?:left of|right of|over)\s+[^:]+:', re.IGNORECASE)
+SEQUENCE_BLOCKS = {"loop", "alt", "opt", "par", "par_over", "critical", "break", "rect", "box"}
+SEQUENCE_BRANCHES = {"else": ("alt",), "and": ("par", "par_over"), "option": ("critical",)}
+SEQUENCE_SKIP = {"autonumber", "title", "accTitle", "accDescr", "link", "links",
+                 "properties", "details", "destroy"}
+
+STATE_ID = re.compile(r'\[\*\]|\w[\w.-]*(?::::[\w-]+)?')
+STATE_TYPES = {"choice", "fork", "join"}
+STATE_SKIP = {"classDef", "class", "style", "accTitle", "accDescr", "hide", "scale", "direction"}
+
+BLOCK_START = re.compile(r'block(?::[\w-]+)?(?::\d+)?$')
+BLOCK_SKIP = {"classDef", "class", "style"}
+
+
+def _meaningful_lines(source: str):
+    """
+    Return ([(line number, text), ...], issue) for non-blank, non-comment lines.
+
+    Skips YAML frontmatter and %% comments / %%{init}%% directives.
+    """
+    lines = source.split('\n')
+    i = 0
+    while i < len(lines) and not lines[i].strip():
+        i += 1
+    if i < len(lines) and lines[i].strip() == '---':
+        close = next((j for j in range(i + 1, len(lines)) if lines[j].strip() == '---'), None)
+        if close is None:
+            return [], SyntaxIssue(i + 1, 1, "frontmatter '---' is never closed")
+        i = close + 1
+
+    result = []
+    for j in range(i, len(lines)):
+        stripped = lines[j].strip()
+        if stripped and not stripped.startswith('%%'):
+            result.append((j + 1, lines[j].rstrip()))
+    return result, None
+
+
+def _indent(text: str) -> int:
+    return len(text) - len(text.lstrip())
+
+
+def _unclosed_markdown_string(text: str) -> bool:
+    pos = 0
+    while True:
+        start = text.find(MARKDOWN_OPEN, pos)
+        if start < 0:
+            return False
+        end = text.find(MARKDOWN_CLOSE, start + len(MARKDOWN_OPEN))
+        if end < 0:
+            return True
+        pos = end + len(MARKDOWN_CLOSE)
+
+
+def _join_markdown_strings(lines: list) -> list:
+    """Join each multi-line markdown-string label's lines into one statement."""
+    result = []
+    pending = None
+    for lineno, text in lines:
+        pending = (lineno, text) if pending is None else (pending[0], f"{pending[1]}\n{text}")
+        if not _unclosed_markdown_string(pending[1]):
+            result.append(pending)
+            pending = None
+    if pending is not None:
+        result.append(pending)  # Never closed: the statement check reports it
+    return result
+
+
+def classify(source: str) -> Optional[str]:
+    """
+    Diagram kind from the header line: "flowchart", "sequence", "state",
+    "block", or None if the source does not start with one of those headers.
+    """
+    lines, _ = _meaningful_lines(source)
+    if not lines:
+        return None
+    header = lines[0][1].strip()
+    for pattern, kind in HEADERS:
+        if pattern.match(header):
+            return kind
+    return None
+
+
+def check(source: str) -> tuple[Optional[str], list[SyntaxIssue]]:
+    """
+    Check a Mermaid source.
+
+    Returns (kind, issues); kind is as for classify(), and issues is empty
+    if nothing wrong was found. Issues marked unrecognized are statements
+    outside what this checker models: mermaid-cli has to decide those.
+    """
+    lines, issue = _meaningful_lines(source)
+    if issue is not None:
+        return None, [issue]
+    if not lines:
+        return None, [SyntaxIssue(1, 1, "empty diagram")]
+
+    header_no, header = lines[0]
+    kind = classify(source)
+    if kind is None:
+        word = header.split()[0]
+        return None, [SyntaxIssue(header_no, _indent(header) + 1,
+                                  f"unknown diagram type '{word}' (expected flowchart, "
+                                  f"sequenceDiagram, stateDiagram-v2 or block-beta)")]
+    return kind, CHECKERS[kind](header_no, header, lines[1:])
+
+
+# ---------------------------------------------------------------------------
+# Flowchart and block-beta statements
+
+
+class _Statement:
+    """Cursor over one line, collecting issues (stops at the first)."""
+
+    def __init__(self, text: str, lineno: int, issues: list):
+        self.text = text
+        self.lineno = lineno
+        self.issues = issues
+        self.pos = _indent(text)
+        self.failed = False
+
+    def fail(self, column: int, message: str, unrecognized: bool = False):
+        # Statements joined from several lines report the line the column is on
+        line_start = self.text.rfind('\n', 0, column) + 1
+        self.issues.append(SyntaxIssue(self.lineno + self.text.count('\n', 0, column),
+                                       column - line_start + 1, message, unrecognized))
+        self.failed = True
+
+    def skip_spaces(self):
+        while self.pos < len(self.text) and self.text[self.pos] in ' \t':
+            self.pos += 1
+
+    def at_end(self) -> bool:
+        return self.pos >= len(self.text)
+
+    def peek(self, s: str) -> bool:
+        return self.text.startswith(s, self.pos)
+
+
+def _parse_shape(st: _Statement, opener: str, closers: tuple):
+    """Parse a node shape's text, from its opener to its closer."""
+    start = st.pos
+    st.pos += len(opener)
+    text = st.text
+
+    if st.peek(MARKDOWN_OPEN) or st.peek('"'):
+        quote, end_quote = (MARKDOWN_OPEN, MARKDOWN_CLOSE) if st.peek(MARKDOWN_OPEN) else ('"', '"')
+        close = text.find(end_quote, st.pos + len(quote))
+        if close < 0:
+            st.fail(st.pos, f"unclosed '{quote}' in node text")
+            return
+        st.pos = close + len(end_quote)
+        for closer in closers:
+            if st.peek(closer):
+                st.pos += len(closer)
+                return
+        st.fail(st.pos, f"expected '{closers[0]}' after quoted node text")
+        return
+
+    while st.pos < len(text):
+        for closer in closers:
+            if st.peek(closer):
+                st.pos += len(closer)
+                return
+        ch = text[st.pos]
+        if ch in TEXT_SPECIAL:
+            st.fail(st.pos, f"'{ch}' in unquoted node text; wrap the text in double quotes "
+                            f"(e.g. A[\"...\"])")
+            return
+        st.pos += 1
+    st.fail(start, f"unclosed '{opener}' in node; expected '{closers[0]}'")
+
+
+def _parse_node(st: _Statement, block: bool):
+    """Parse a node reference: id, optional shape, class and (block) width."""
+    match = NODE_ID.match(st.text, st.pos)
+    if match is None:
+        st.fail(st.pos, f"expected a node id, found '{st.text[st.pos]}'", unrecognized=True)
+        return
+    if match.group() == "end":
+        st.fail(st.pos, "'end' is reserved; use another node id (e.g. 'End')")
+        return
+    st.pos = match.end()
+
+    if st.peek('@{'):
+        close = st.text.find('}', st.pos)
+        if close < 0:
+            st.fail(st.pos, "unclosed '@{' in node")
+            return
+        st.pos = close + 1
+    elif block and st.peek(BLOCK_ARROW[0]):
+        _parse_shape(st, *BLOCK_ARROW)
+        if st.failed:
+            return
+        direction = BLOCK_ARROW_DIRECTION.match(st.text, st.pos)
+        if direction is not None:
+            st.pos = direction.end()
+    else:
+        for opener, closers in SHAPES:
+            if st.peek(opener):
+                _parse_shape(st, opener, closers)
+                break
+        if st.failed:
+            return
+
+    for suffix in (CLASS_SUFFIX, WIDTH_SUFFIX if block else None):
+        if suffix is not None:
+            match = suffix.match(st.text, st.pos)
+            if match is not None:
+                st.pos = match.end()
+
+
+def _parse_link(st: _Statement) -> bool:
+    """Parse a link and its optional |label|. Returns False if there is none."""
+    start = st.pos
+    match = LINK.match(st.text, st.pos)
+    if match is None:
+        if st.peek('->') or st.peek('=>'):
+            st.fail(start, f"invalid arrow '{st.text[start:start + 2]}'; use '-->'")
+        return False
+    st.pos = match.end()
+
+    link = match.group()
+    if link in LINK_TEXT_CLOSE and (st.at_end() or st.text[st.pos] in ' \t'):
+        # Text-in-link form: "-- text -->"
+        close = LINK_TEXT_CLOSE[link].search(st.text, st.pos)
+        if close is None:
+            st.fail(start, f"link '{link}' needs an arrow (e.g. '-->' or '---'), "
+                           f"or text closed by one ('{link} text -->')")
+            return True
+        st.pos = close.end()
+
+    st.skip_spaces()
+    if st.peek('|'):
+        close = st.text.find('|', st.pos + 1)
+        if close < 0:
+            st.fail(st.pos, "unclosed '|' in link label")
+            return True
+        st.pos = close + 1
+    return True
+
+
+def _parse_statement(st: _Statement, block: bool = False):
+    """
+    Parse node groups joined by links: A & B --> C -->|label| D ; E --> F.
+
+    In block diagrams, several nodes may also stand side by side: a b["B"]:2.
+    """
+    expect_node = True
+    link_start = None
+    while not st.failed:
+        st.skip_spaces()
+        if st.at_end():
+            if expect_node and link_start is not None:
+                st.fail(link_start, "link has no target node")
+            return
+        if st.peek(';'):
+            st.pos += 1
+            expect_node, link_start = True, None
+            continue
+
+        if expect_node:
+            _parse_node(st, block)
+            expect_node = False
+            continue
+
+        if st.peek('&'):
+            st.pos += 1
+            expect_node = True
+            continue
+        link_start = st.pos
+        if _parse_link(st):
+            expect_node = True
+            continue
+        if st.failed:
+            return
+        if block:
+            link_start = None
+            _parse_node(st, block)
+            continue
+        st.fail(st.pos, f"unexpected '{st.text[st.pos]}'; expected a link (e.g. '-->') "
+                        f"or the end of the statement", unrecognized=True)
+
+
+def _check_direction(text: str, lineno: int, issues: list, keyword_end: int):
+    rest = text[keyword_end:]
+    direction = rest.strip().rstrip(';').strip()
+    if direction and direction not in DIRECTIONS:
+        issues.append(SyntaxIssue(lineno, keyword_end + _indent(rest) + 1,
+                                  f"unknown direction '{direction}' (use TB, TD, BT, LR or RL)"))
+
+
+def _check_flowchart(header_no: int, header: str, lines: list) -> list[SyntaxIssue]:
+    issues = []
+    keyword = re.match(r'\s*(flowchart|graph)', header)
+    _check_direction(header, header_no, issues, keyword.end())
+
+    subgraphs = []
+    in_description = False
+    for lineno, text in _join_markdown_strings(lines):
+        stripped = text.strip()
+        if in_description:
+            in_description = '}' not in stripped
+            continue
+        word = re.match(r'[\w-]+', stripped)
+        word = word.group() if word else ""
+
+        if word == "subgraph":
+            subgraphs.append((lineno, _indent(text) + 1))
+        elif stripped.rstrip(';') == "end":
+            if subgraphs:
+                subgraphs.pop()
+            else:
+                issues.append(SyntaxIssue(lineno, _indent(text) + 1,
+                                          "'end' without a matching 'subgraph'"))
+        elif word == "direction":
+            _check_direction(text, lineno, issues, _indent(text) + len(word))
+        elif word in FLOWCHART_SKIP:
+            in_description = word == "accDescr" and '{' in stripped and '}' not in stripped
+        else:
+            _parse_statement(_Statement(text, lineno, issues))
+
+    for lineno, column in subgraphs:
+        issues.append(SyntaxIssue(lineno, column, "'subgraph' is never closed with 'end'"))
+    return issues
+
+
+def _check_block(header_no: int, header: str, lines: list) -> list[SyntaxIssue]:
+    issues = []
+    blocks = []
+    for lineno, text in _join_markdown_strings(lines):
+        stripped = text.strip()
+        column = _indent(text) + 1
+        word = re.match(r'[\w-]+', stripped)
+        word = word.group() if word else ""
+
+        if BLOCK_START.match(stripped):
+            blocks.append((lineno, column))
+        elif stripped == "end":
+            if blocks:
+                blocks.pop()
+            else:
+                issues.append(SyntaxIssue(lineno, column, "'end' without a matching 'block'"))
+        elif word == "columns":
+            value = stripped[len(word):].strip()
+            if value != "auto" and not value.isdigit():
+                issues.append(SyntaxIssue(lineno, column + len(word) + 1,
+                                          f"'columns' needs a number or 'auto', got '{value}'"))
+        elif word in BLOCK_SKIP:
+            continue
+        else:
+            _parse_statement(_Statement(text, lineno, issues), block=True)
+
+    for lineno, column in blocks:
+        issues.append(SyntaxIssue(lineno, column, "'block' is never closed with 'end'"))
+    return issues
+
+
+# ---------------------------------------------------------------------------
+# Sequence diagrams
+
+
+def _check_sequence(header_no: int, header: str, lines: list) -> list[SyntaxIssue]:
+    issues = []
+    blocks = []   # (keyword, line, column)
+    active = {}   # participant -> activation depth
+
+    def deactivate(name: str, lineno: int, column: int):
+        if active.get(name, 0) == 0:
+            issues.append(SyntaxIssue(lineno, column,
+                                      f"'{name}' is deactivated but is not active"))
+        else:
+            active[name] -= 1
+
+    for lineno, text in lines:
+        stripped = text.strip()
+        column = _indent(text) + 1
+        word = re.match(r'[\w-]+', stripped)
+        word = word.group() if word else ""
+
+        if word in SEQUENCE_BLOCKS:
+            blocks.append((word, lineno, column))
+        elif stripped == "end":
+            if blocks:
+                blocks.pop()
+            else:
+                issues.append(SyntaxIssue(lineno, column, "'end' without a matching block "
+                                                          "(loop, alt, opt, par, ...)"))
+        elif word in SEQUENCE_BRANCHES:
+            allowed = SEQUENCE_BRANCHES[word]
+            if not blocks or blocks[-1][0] not in allowed:
+                issues.append(SyntaxIssue(lineno, column,
+                                          f"'{word}' is only valid inside '{allowed[0]}'"))
+        elif word in ("participant", "actor", "create"):
+            if not SEQUENCE_PARTICIPANT.match(stripped):
+                issues.append(SyntaxIssue(lineno, column, f"'{word}' needs a participant name"))
+        elif word == "activate":
+            name = stripped[len(word):].strip()
+            active[name] = active.get(name, 0) + 1
+        elif word == "deactivate":
+            deactivate(stripped[len(word):].strip(), lineno, column)
+        elif word.lower() == "note":
+            if not SEQUENCE_NOTE.match(stripped):
+                issues.append(SyntaxIssue(lineno, column,
+                                          "malformed note; use 'Note right of A: text' "
+                                          "(or 'left of' / 'over A,B')"))
+        elif word in SEQUENCE_SKIP:
+            continue
+        else:
+            _check_message(stripped, lineno, column, issues, active, deactivate)
+
+    for keyword, lineno, column in blocks:
+        issues.append(SyntaxIssue(lineno, column, f"'{keyword}' block is never closed with 'end'"))
+    return issues
+
+
+def _check_message(stripped: str, lineno: int, column: int, issues: list, active: dict,
+                   deactivate):
+    """Check one `A->>B: text` message line."""
+    match = SEQUENCE_MESSAGE.match(stripped)
+    if match is None:
+        if ':' in stripped:
+            issues.append(SyntaxIssue(lineno, column,
+                                      "no valid arrow in message (use ->>, -->>, ->, -->, "
+                                      "-x, --x, -) or --))"))
+        return
+
+    if not match.group("dst"):
+        issues.append(SyntaxIssue(lineno, column + match.end("act"), "message has no target"))
+        return
+    if match.group("colon") != ':':
+        issues.append(SyntaxIssue(lineno, column + match.end("dst"),
+                                  "message needs ':' and text (e.g. 'A->>B: text')"))
+        return
+    semicolon = stripped.find(';', match.end())
+    if semicolon >= 0:
+        issues.append(SyntaxIssue(lineno, column + semicolon,
+                                  "';' ends a statement; write '#59;' for a literal semicolon"))
+
+    if match.group("act") == '+':
+        active[match.group("dst")] = active.get(match.group("dst"), 0) + 1
+    elif match.group("act") == '-':
+        deactivate(match.group("src"), lineno, column)
+
+
+# ---------------------------------------------------------------------------
+# State diagrams
+
+
+def _check_state_ref(ref: str, lineno: int, column: int, issues: list) -> bool:
+    if STATE_ID.fullmatch(ref):
+        return True
+    if ' ' in ref:
+        issues.append(SyntaxIssue(lineno, column,
+                                  f"state id '{ref}' contains spaces; declare it with "
+                                  f"state \"{ref}\" as SomeId and use the id"))
+    else:
+        issues.append(SyntaxIssue(lineno, column, f"invalid state id '{ref}'", unrecognized=True))
+    return False
+
+
+def _check_state(header_no: int, header: str, lines: list) -> list[SyntaxIssue]:
+    issues = []
+    composites = []
+    note = None
+    for lineno, text in lines:
+        stripped = text.strip()
+        column = _indent(text) + 1
+        word = re.match(r'[\w-]+', stripped)
+        word = word.group() if word else ""
+
+        if note is not None:
+            if stripped.lower() == "end note":
+                note = None
+            continue
+
+        if stripped == '}':
+            if composites:
+                composites.pop()
+            else:
+                issues.append(SyntaxIssue(lineno, column, "'}' without a matching '{'"))
+        elif stripped == '--':
+            continue
+        elif word == "state":
+            kind = re.search(r'<<(\w+)>>', stripped)
+            if kind is not None and kind.group(1) not in STATE_TYPES:
+                issues.append(SyntaxIssue(lineno, column + kind.start(),
+                                          f"unknown state type '<<{kind.group(1)}>>' "
+                                          f"(use <<choice>>, <<fork>> or <<join>>)"))
+            if stripped.endswith('{'):
+                composites.append((lineno, column))
+        elif word.lower() == "note":
+            match = re.match(r'note\s+(left|right)\s+of\s+[^\s:]+', stripped, re.IGNORECASE)
+            if match is None:
+                issues.append(SyntaxIssue(lineno, column,
+                                          "malformed note; use 'note right of State: text'"))
+            elif ':' not in stripped[match.end():]:
+                note = (lineno, column)
+        elif word in STATE_SKIP:
+            continue
+        elif '-->' in stripped:
+            arrow = stripped.index('-->')
+            src = stripped[:arrow].strip()
+            rest = stripped[arrow + 3:]
+            dst = rest.split(':', 1)[0].strip()
+            if not src:
+                issues.append(SyntaxIssue(lineno, column, "transition has no source state"))
+            elif not dst:
+                issues.append(SyntaxIssue(lineno, column + arrow, "transition has no target state"))
+            elif _check_state_ref(src, lineno, column, issues):
+                _check_state_ref(dst, lineno, column + arrow + 3 + _indent(rest), issues)
+        elif re.search(r'(?<!-)->', stripped):
+            arrow = re.search(r'(?<!-)->', stripped).start()
+            issues.append(SyntaxIssue(lineno, column + arrow, "invalid arrow '->'; use '-->'"))
+        elif ':' in stripped:
+            _check_state_ref(stripped.split(':', 1)[0].strip(), lineno, column, issues)
+        elif not STATE_ID.fullmatch(stripped):
+            _check_state_ref(stripped, lineno, column, issues)
+
+    for lineno, column in composites:
+        issues.append(SyntaxIssue(lineno, column, "'{' is never closed with '}'"))
+    if note is not None:
+        issues.append(SyntaxIssue(note[0], note[1], "note is never closed with 'end note'"))
+    return issues
+
+
+CHECKERS = {
+    "flowchart": _check_flowchart,
+    "sequence": _check_sequence,
+    "state": _check_state,
+    "block": _check_block,
+}
+
+
+def main():
+    paths = sys.argv[1:] or ['-']
+    failed = False
+    for path in paths:
+        source = sys.stdin.read() if path == '-' else open(path).read()
+        kind, issues = check(source)
+        for issue in issues:
+            note = " (not recognized; mermaid-cli decides)" if issue.unrecognized else ""
+            print(f"{path}:{issue.line}:{issue.column}: {issue.message}{note}")
+        if any(not issue.unrecognized for issue in issues):
+            failed = True
+        elif not issues:
+            print(f"{path}: {kind} OK")
+    sys.exit(1 if failed else 0)
+
+
+if __name__ == "__main__":
+    main()
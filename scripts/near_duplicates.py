@@ -0,0 +1,81 @@
+"""
+MinHash/LSH near-duplicate detection for session chunks.
+
+Session logs repeat a lot of text (the same file reads, STARTUP_PROTOCOL,
+re-pasted outlines). Each chunk gets a MinHash signature over word shingles;
+signatures are split into LSH bands so near-identical chunks share a bucket,
+and candidates are confirmed by the fraction of matching signature slots
+(an estimate of the Jaccard similarity of their shingle sets).
+"""
+
+import hashlib
+import zlib
+
+
+NUM_PERM = 64          # Signature length
+BANDS = 8              # LSH bands of NUM_PERM // BANDS rows: ~0.77 Jaccard collision threshold
+SHINGLE_WORDS = 5      # Words per shingle
+DEDUP_THRESHOLD = 0.85 # Estimated Jaccard similarity needed to collapse two chunks
+
+_MERSENNE_PRIME = (1 << 31) - 1
+_permutations = None
+
+
+def _get_permutations():
+    """Fixed (a, b) coefficients for the NUM_PERM universal hash permutations."""
+    global _permutations
+    if _permutations is None:
+        import numpy as np
+        rng = np.random.default_rng(0x5EED)
+        a = rng.integers(1, _MERSENNE_PRIME, size=NUM_PERM, dtype=np.uint64)
+        b = rng.integers(0, _MERSENNE_PRIME, size=NUM_PERM, dtype=np.uint64)
+        _permutations = (np, a, b)
+    return _permutations
+
+
+def minhash_signature(text: str) -> bytes:
+    """MinHash signature of text's word shingles, as NUM_PERM packed uint32s."""
+    np, a, b = _get_permutations()
+    words = text.split()
+    width = min(SHINGLE_WORDS, len(words)) or 1
+    shingles = {
+        zlib.crc32(' '.join(words[i:i + width]).encode('utf-8')) % _MERSENNE_PRIME
+        for i in range(max(1, len(words) - width + 1))
+    }
+    x = np.fromiter(shingles, dtype=np.uint64, count=len(shingles)).reshape(-1, 1)
+    # Products stay below 2^62, so uint64 arithmetic cannot overflow
+    return ((a * x + b) % _MERSENNE_PRIME).min(axis=0).astype(np.uint32).tobytes()
+
+
+def band_keys(signature: bytes) -> list[int]:
+    """LSH bucket keys, one signed 64-bit key per band."""
+    band_bytes = len(signature) // BANDS
+    keys = []
+    for band in range(BANDS):
+        chunk = signature[band * band_bytes:(band + 1) * band_bytes]
+        digest = hashlib.blake2b(bytes([band]) + chunk, digest_size=8).digest()
+        keys.append(int.from_bytes(digest, 'little', signed=True))
+    return keys
+
+
+def similarity(sig_a: bytes, sig_b: bytes) -> float:
+    """Estimated Jaccard similarity: fraction of matching signature slots."""
+    np, _, _ = _get_permutations()
+    return float(np.mean(np.frombuffer(sig_a, dtype=np.uint32) == np.frombuffer(sig_b, dtype=np.uint32)))
+
+
+def find_near_duplicate(store, signature: bytes, keys: list[int],
+                        threshold: float = DEDUP_THRESHOLD, exclude=()):
+    """
+    Return the ID of the most similar stored chunk at or above threshold.
+
+    Candidates come from the store's LSH buckets, minus the IDs in exclude;
+    returns None if no candidate is similar enough.
+    """
+    best_id, best_score = None, threshold
+    candidates = [i for i in store.lsh_candidates(keys) if i not in exclude]
+    for chunk_id, candidate in store.get_signatures(candidates).items():
+        score = similarity(signature, candidate)
+        if score >= best_score:
+            best_id, best_score = chunk_id, score
+    return best_id
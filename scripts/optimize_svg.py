@@ -0,0 +1,438 @@
+#!/usr/bin/env python3
+"""
+Shrink a deck's SVGs in place and rasterize them to PNG for PPTX export.
+
+Usage:
+    python scripts/optimize_svg.py <deck.md or deck folder> [--png-dpi DPI] [--force]
+
+Mermaid diagrams (render_mermaid.py) and Matplotlib charts (build_charts.py)
+come out with metadata, comments, indentation, repeated CSS rules and
+coordinates to six decimals. Each SVG this project generated in the deck's
+img/ folder (diagram-<hash>.svg files and the outputs recorded in
+.charts-manifest.json) is rewritten in place with:
+
+- comments, <metadata> and the DOCTYPE removed
+- coordinates and lengths in geometry and style attributes rounded to
+  COORD_PRECISION decimals (hundredths of a pixel), path whitespace
+  collapsed; in transforms only translate() and rotate() are rounded, as
+  scale(), matrix() and skew factors multiply everything they apply to
+  (Matplotlib draws glyphs with scale(0.015625))
+- CSS rules and @font-face embeds that repeat within the file kept once
+  (the last occurrence, which is the one that applies), CSS whitespace
+  and comments removed, emptied <style> elements dropped
+- indentation between tags removed
+
+Other SVGs, such as hand-drawn ones kept under version control, are never
+modified. The result must still parse as XML, otherwise the file is left
+as it was. The hash of each optimized file and OPTIMIZER_VERSION are kept
+in img/.svg-manifest.json, and a file whose hash matches is skipped, so
+only SVGs rendered or regenerated since the last run are processed. The
+version is also part of the diagram and chart cache keys, so a new
+optimizer re-renders them from source rather than re-minifying its own
+output.
+
+With --png-dpi, each SVG (generated or not) is also rendered to img/.png-cache/<name>@<dpi>.png
+(cairosvg) and the PNG is recorded as cheaper when it is smaller than the
+SVG. build.py --png-dpi exports PPTX from a copy of the deck that points
+at the cheaper PNGs, so Marp's PPTX export has less to render. SVGs using
+<foreignObject> (Mermaid's HTML labels) need a browser to render and keep
+their SVG.
+
+build.py runs the optimization before every build; render_mermaid.py
+optimizes diagrams as it writes them.
+
+Options:
+    --png-dpi DPI   Also rasterize to PNG at this DPI (needs: pip install cairosvg)
+    --force         Re-process every SVG, ignoring the manifest
+"""
+
+import argparse
+import hashlib
+import json
+import os
+import re
+import sys
+import xml.etree.ElementTree as ET
+from dataclasses import dataclass
+from pathlib import Path
+from typing import Optional
+
+from deck_parser import parse_deck
+
+
+IMG_DIRNAME = "img"
+MANIFEST_NAME = ".svg-manifest.json"
+PNG_CACHE_DIRNAME = ".png-cache"
+OPTIMIZER_VERSION = "2"   # bump when the output changes; part of diagram and chart cache keys
+COORD_PRECISION = 2
+CSS_PIXELS_PER_INCH = 96
+# Marp renders PPTX slides at --image-scale 2, i.e. 2 image pixels per CSS pixel
+DEFAULT_PNG_DPI = 2 * CSS_PIXELS_PER_INCH
+
+COMMENT = re.compile(r"<!--.*?-->", re.DOTALL)
+METADATA = re.compile(r"<metadata\b.*?</metadata>|<metadata\b[^>]*/>", re.DOTALL)
+DOCTYPE = re.compile(r"<!DOCTYPE[^\[>]*>")   # only without an internal subset
+STYLE_ELEMENT = re.compile(r"(<style\b[^>]*>)(.*?)(</style>)", re.DOTALL)
+CDATA = re.compile(r"^\s*<!\[CDATA\[(.*)\]\]>\s*$", re.DOTALL)
+CSS_COMMENT = re.compile(r"/\*.*?\*/", re.DOTALL)
+# Attributes holding coordinates, lengths or inline CSS
+NUMERIC_ATTRIBUTE = re.compile(
+    r"""(\s(?:d|points|transform|gradientTransform|patternTransform|viewBox|x|y|x1|x2|y1|y2"""
+    r"""|cx|cy|r|rx|ry|dx|dy|width|height|stroke-width|stroke-dasharray|stroke-dashoffset"""
+    r"""|font-size|style)=")([^"]*)(")"""
+)
+# Functions in transforms and inline CSS: only those taking pixels or degrees are rounded
+FUNCTION = re.compile(r"([A-Za-z-]+)\s*\(([^)]*)\)")
+ROUNDED_FUNCTIONS = {"translate", "translateX", "translateY", "rotate"}
+LONG_DECIMAL = re.compile(r"-?\d*\.\d+(?:[eE][-+]?\d+)?")
+PATH_ATTRIBUTE = re.compile(r"(\s(?:d|points)=\")([^\"]*)(\")")
+INDENT = re.compile(r">\s*\n\s*<")
+
+RED = '\033[0;31m'
+GREEN = '\033[0;32m'
+YELLOW = '\033[1;33m'
+NC = '\033[0m'
+
+
+def get_dependencies():
+    """Import cairosvg only when rasterizing."""
+    try:
+        import cairosvg
+        return cairosvg
+    except ImportError as e:
+        print(f"Missing dependency: {e}")
+        print("Install with: pip install cairosvg")
+        sys.exit(1)
+
+
+def _round_number(match: re.Match, precision: int) -> str:
+    text = match.group(0)
+    mantissa = text.lower().split('e')[0]
+    if 'e' not in text.lower() and len(mantissa.split('.')[1]) <= precision:
+        return text
+    value = f"{round(float(text), precision):.{precision}f}".rstrip('0').rstrip('.')
+    return "0" if value in ("-0", "") else value
+
+
+def _round_values(value: str, precision: int) -> str:
+    """Round the numbers in an attribute value, leaving scale(), matrix() and the like alone."""
+    def round_all(text: str) -> str:
+        return LONG_DECIMAL.sub(lambda n: _round_number(n, precision), text)
+
+    output = []
+    position = 0
+    for match in FUNCTION.finditer(value):
+        output.append(round_all(value[position:match.start()]))
+        if match.group(1) in ROUNDED_FUNCTIONS:
+            output.append(f"{match.group(1)}({round_all(match.group(2))})")
+        else:
+            output.append(match.group(0))
+        position = match.end()
+    output.append(round_all(value[position:]))
+    return ''.join(output)
+
+
+def _css_rules(css: str) -> list[str]:
+    """Top-level rules and at-rules of a stylesheet, with their nested blocks."""
+    rules = []
+    depth = 0
+    start = 0
+    for i, char in enumerate(css):
+        if char == '{':
+            depth += 1
+        elif char == '}':
+            depth -= 1
+            if depth == 0:
+                rules.append(css[start:i + 1].strip())
+                start = i + 1
+        elif char == ';' and depth == 0:
+            # @import and @charset end at a semicolon
+            rules.append(css[start:i + 1].strip())
+            start = i + 1
+    if css[start:].strip():
+        rules.append(css[start:].strip())
+    return [rule for rule in rules if rule]
+
+
+def _minify_css(rule: str) -> str:
+    rule = re.sub(r"\s+", " ", rule)
+    return re.sub(r"\s*([{};])\s*", r"\1", rule).replace(";}", "}")
+
+
+def _dedupe_styles(svg: str) -> str:
+    """Keep each CSS rule once across the file's <style> elements: its last occurrence."""
+    blocks = []
+    for match in STYLE_ELEMENT.finditer(svg):
+        css = match.group(2)
+        cdata = CDATA.match(css)
+        css = CSS_COMMENT.sub("", cdata.group(1) if cdata else css)
+        blocks.append((match, bool(cdata), [_minify_css(rule) for rule in _css_rules(css)]))
+    if not blocks:
+        return svg
+
+    last_seen = {}
+    for index, (_, _, rules) in enumerate(blocks):
+        for position, rule in enumerate(rules):
+            last_seen[rule] = (index, position)
+
+    output = []
+    position = 0
+    for index, (match, cdata, rules) in enumerate(blocks):
+        output.append(svg[position:match.start()])
+        kept = ''.join(rule for i, rule in enumerate(rules) if last_seen[rule] == (index, i))
+        if kept:
+            if cdata:
+                kept = f"<![CDATA[{kept}]]>"
+            output.append(match.group(1) + kept + match.group(3))
+        position = match.end()
+    output.append(svg[position:])
+    return ''.join(output)
+
+
+def _strip_indent(match: re.Match) -> str:
+    # Between inline text spans the newline renders as a space: keep it
+    text = match.string
+    if text.startswith("span>", match.start() - 4) or text.startswith("span", match.end()) \
+            or text.startswith("/tspan", match.end()) or text.startswith("/span", match.end()):
+        return ">\n<"
+    return "><"
+
+
+def optimize_svg(svg: str, precision: int = COORD_PRECISION) -> str:
+    """Minified SVG text; the input unchanged if either does not parse as XML."""
+    try:
+        ET.fromstring(svg.encode('utf-8'))
+    except ET.ParseError:
+        return svg
+
+    result = COMMENT.sub("", svg)
+    result = METADATA.sub("", result)
+    result = DOCTYPE.sub("", result)
+    result = PATH_ATTRIBUTE.sub(
+        lambda m: m.group(1) + re.sub(r"\s+", " ", m.group(2)).strip() + m.group(3), result)
+    result = NUMERIC_ATTRIBUTE.sub(
+        lambda m: m.group(1) + _round_values(m.group(2), precision) + m.group(3), result)
+    result = _dedupe_styles(result)
+    if 'xml:space="preserve"' not in result:
+        result = INDENT.sub(_strip_indent, result)
+    result = result.strip() + "\n"
+
+    try:
+        ET.fromstring(result.encode('utf-8'))
+    except ET.ParseError:
+        return svg
+    return result
+
+
+@dataclass
+class OptimizeStats:
+    optimized: int = 0       # SVGs processed this run
+    cached: int = 0          # SVGs already optimized
+    bytes_before: int = 0    # sizes of the processed SVGs
+    bytes_after: int = 0
+    rasterized: int = 0      # PNGs rendered this run
+    raster_skipped: int = 0  # SVGs that need a browser to render
+
+    @property
+    def saved(self) -> int:
+        return self.bytes_before - self.bytes_after
+
+
+def format_bytes(count: int) -> str:
+    if abs(count) < 1024:
+        return f"{count} B"
+    if abs(count) < 1024 ** 2:
+        return f"{count / 1024:.1f} KB"
+    return f"{count / 1024 ** 2:.1f} MB"
+
+
+def png_path(svg_path: Path, dpi: int) -> Path:
+    return svg_path.parent / PNG_CACHE_DIRNAME / f"{svg_path.stem}@{dpi}.png"
+
+
+def load_manifest(img_dir: Path) -> dict:
+    try:
+        return json.loads((img_dir / MANIFEST_NAME).read_text())
+    except (OSError, ValueError):
+        return {}
+
+
+def save_manifest(img_dir: Path, manifest: dict):
+    path = img_dir / MANIFEST_NAME
+    tmp_path = path.with_name(f"{path.name}.tmp")
+    tmp_path.write_text(json.dumps(manifest, indent=2, sort_keys=True))
+    os.replace(tmp_path, path)
+
+
+def write_atomic(path: Path, content: bytes):
+    tmp_path = path.with_name(f".{path.name}.tmp")
+    tmp_path.write_bytes(content)
+    os.replace(tmp_path, path)
+
+
+def rasterize(svg_path: Path, output: Path, dpi: int, cairosvg) -> int:
+    """Render an SVG to PNG at dpi (CSS pixels are 1/96 inch); returns the PNG's size."""
+    output.parent.mkdir(parents=True, exist_ok=True)
+    tmp_path = output.with_name(f".{output.name}.tmp")
+    cairosvg.svg2png(url=str(svg_path), write_to=str(tmp_path),
+                     dpi=CSS_PIXELS_PER_INCH, scale=dpi / CSS_PIXELS_PER_INCH)
+    os.replace(tmp_path, output)
+    return output.stat().st_size
+
+
+def generated_svgs(img_dir: Path) -> set[str]:
+    """Names of the SVGs in img_dir written by render_mermaid.py or a chart script."""
+    # Imported here: both modules import this one
+    from build_charts import MANIFEST_NAME as CHARTS_MANIFEST_NAME
+    from render_mermaid import HASHED_SVG
+
+    names = {path.name for path in img_dir.glob("*.svg") if HASHED_SVG.match(path.name)}
+    try:
+        charts = json.loads((img_dir / CHARTS_MANIFEST_NAME).read_text())
+    except (OSError, ValueError):
+        charts = {}
+    for entry in charts.values():
+        names.update(name for name in entry.get("outputs", []) if name.endswith(".svg"))
+    return names
+
+
+def optimize_images(img_dir: Path, png_dpi: Optional[int] = None, force: bool = False,
+                    quiet: bool = False) -> OptimizeStats:
+    """
+    Optimize the generated SVGs in img_dir that changed since the last run.
+
+    Other SVGs are left untouched. With png_dpi, every SVG is also
+    rasterized (into the PNG cache; the SVG is not modified).
+    """
+    stats = OptimizeStats()
+    if not img_dir.is_dir():
+        return stats
+    svgs = sorted(path for path in img_dir.glob("*.svg") if not path.name.startswith('.'))
+    if not svgs:
+        return stats
+    generated = generated_svgs(img_dir)
+    previous = load_manifest(img_dir)
+    manifest = {}
+    cairosvg = None
+
+    for path in svgs:
+        data = path.read_bytes()
+        digest = hashlib.sha256(data).hexdigest()
+        entry = previous.get(path.name, {})
+        if path.name not in generated:
+            if entry.get("hash") != digest:
+                entry = {}
+        elif not force and entry.get("hash") == digest and entry.get("version") == OPTIMIZER_VERSION:
+            stats.cached += 1
+        else:
+            optimized = optimize_svg(data.decode('utf-8')).encode('utf-8')
+            stats.optimized += 1
+            stats.bytes_before += len(data)
+            stats.bytes_after += len(optimized)
+            if optimized != data:
+                write_atomic(path, optimized)
+                if not quiet:
+                    print(f"  {path.name}: {format_bytes(len(data))} -> {format_bytes(len(optimized))}")
+            data = optimized
+            digest = hashlib.sha256(data).hexdigest()
+            entry = {"hash": digest}
+        manifest[path.name] = {"hash": digest, "bytes": len(data)}
+        if path.name in generated:
+            manifest[path.name]["version"] = OPTIMIZER_VERSION
+
+        if png_dpi is None:
+            if "png" in entry:
+                manifest[path.name]["png"] = entry["png"]
+            continue
+        png = png_path(path, png_dpi)
+        raster = entry.get("png", {})
+        if not force and raster.get("dpi") == png_dpi and raster.get("svg") == digest \
+                and (png.exists() or raster.get("bytes") is None):
+            manifest[path.name]["png"] = raster
+            stats.raster_skipped += raster.get("bytes") is None
+            continue
+        if b"<foreignObject" in data:
+            manifest[path.name]["png"] = {"dpi": png_dpi, "svg": digest, "bytes": None}
+            stats.raster_skipped += 1
+            continue
+        cairosvg = cairosvg or get_dependencies()
+        size = rasterize(path, png, png_dpi, cairosvg)
+        stats.rasterized += 1
+        manifest[path.name]["png"] = {"dpi": png_dpi, "svg": digest, "bytes": size}
+
+    # Drop PNGs of SVGs that are gone or were re-rendered at another DPI
+    png_dir = img_dir / PNG_CACHE_DIRNAME
+    if png_dir.is_dir():
+        kept = {png_path(img_dir / name, entry["png"]["dpi"]).name
+                for name, entry in manifest.items() if entry.get("png", {}).get("bytes")}
+        for png in png_dir.glob("*.png"):
+            if png.name not in kept:
+                png.unlink()
+    if manifest != previous:
+        save_manifest(img_dir, manifest)
+    return stats
+
+
+def cheaper_pngs(img_dir: Path, dpi: int) -> dict[Path, Path]:
+    """SVG -> PNG for each SVG whose PNG at dpi is smaller than the SVG itself."""
+    pngs = {}
+    for name, entry in load_manifest(img_dir).items():
+        raster = entry.get("png", {})
+        svg = (img_dir / name).resolve()
+        png = png_path(svg, dpi)
+        if raster.get("dpi") == dpi and raster.get("bytes") and raster["bytes"] < entry["bytes"] \
+                and png.exists():
+            pngs[svg] = png
+    return pngs
+
+
+def with_pngs(text: str, deck_dir: Path, pngs: dict[Path, Path]) -> Optional[str]:
+    """The deck with references to SVGs in pngs pointed at the PNGs (None if none apply)."""
+    deck = parse_deck(text)
+    lines = list(deck.lines)
+    replaced = False
+    for image in deck.images:
+        png = pngs.get(image.local_path(deck_dir))
+        if png is not None:
+            lines[image.line] = lines[image.line].replace(
+                image.ref, os.path.relpath(png, deck_dir.resolve()).replace(os.sep, '/'))
+            replaced = True
+    return '\n'.join(lines) if replaced else None
+
+
+def main():
+    parser = argparse.ArgumentParser(
+        description="Minify a deck's SVGs in place and optionally rasterize them for PPTX"
+    )
+    parser.add_argument("input", help="Deck markdown file or deck folder")
+    parser.add_argument("--png-dpi", type=int, nargs="?", const=DEFAULT_PNG_DPI, default=None,
+                        help=f"Also render PNGs at this DPI (default when given: {DEFAULT_PNG_DPI})")
+    parser.add_argument("--force", action="store_true",
+                        help="Re-process every SVG, ignoring the manifest")
+    args = parser.parse_args()
+
+    input_path = Path(args.input)
+    if not input_path.exists():
+        print(f"{RED}Error: Not found: {input_path}{NC}")
+        sys.exit(1)
+    img_dir = (input_path if input_path.is_dir() else input_path.parent) / IMG_DIRNAME
+    if not img_dir.is_dir():
+        print(f"{YELLOW}No {IMG_DIRNAME}/ folder next to {input_path}{NC}")
+        return
+
+    stats = optimize_images(img_dir, args.png_dpi, args.force)
+    if stats.optimized:
+        print(f"{GREEN}{stats.optimized} SVG(s) optimized, {stats.cached} unchanged: "
+              f"{format_bytes(stats.bytes_before)} -> {format_bytes(stats.bytes_after)} "
+              f"({format_bytes(stats.saved)} saved){NC}")
+    else:
+        print(f"{GREEN}{stats.cached} SVG(s) already optimized{NC}")
+    if args.png_dpi:
+        cheaper = cheaper_pngs(img_dir, args.png_dpi)
+        print(f"{GREEN}{stats.rasterized} PNG(s) rendered at {args.png_dpi} DPI, "
+              f"{len(cheaper)} smaller than their SVG, "
+              f"{stats.raster_skipped} SVG(s) need a browser to render{NC}")
+
+
+if __name__ == "__main__":
+    main()
@@ -0,0 +1,185 @@
+#!/usr/bin/env python3
+"""
+Render Mermaid diagrams in a deck to SVG and write deck.rendered.md.
+
+Usage:
+    python scripts/render_mermaid.py <deck.md> [--prune]
+
+Extracts ```mermaid blocks, renders them to SVG in img/, and writes a copy
+of the deck (deck.rendered.md) with image references in place of the code
+blocks. Blocks that fail to render are kept as code and reported.
+
+SVGs are content-addressed: each is named img/diagram-<hash>.svg, where the
+hash covers the diagram source, the theme and background (`-t neutral -b
+white`), the mermaid-cli version and the SVG optimizer's version. An existing file is a cache hit, so only
+new or edited diagrams are rendered (in one parallel batch on the warm
+worker from mermaid_renderer.py), and inserting a diagram no longer renames
+every one after it. A rerun with no changes never starts a browser. New
+SVGs are minified as they are written (see optimize_svg.py).
+
+Text after the opening fence becomes the image's alt text, so Marp image
+options carry over: ```mermaid bg right:50% contain renders as
+![bg right:50% contain](img/diagram-<hash>.svg). Plain blocks get
+"Diagram N".
+
+Options:
+    --prune   Delete img/diagram-<hash>.svg files the deck no longer references
+"""
+
+import argparse
+import hashlib
+import os
+import re
+import sys
+import time
+from pathlib import Path
+from typing import Optional
+
+from deck_parser import parse_deck
+from mermaid_renderer import (
+    DEFAULT_BACKGROUND,
+    DEFAULT_THEME,
+    MermaidRenderer,
+    RendererUnavailable,
+    cli_version,
+)
+from optimize_svg import OPTIMIZER_VERSION, optimize_svg
+
+
+IMG_DIRNAME = "img"
+HASH_LENGTH = 16
+HASHED_SVG = re.compile(rf"^diagram-[0-9a-f]{{{HASH_LENGTH}}}\.svg$")
+
+RED = '\033[0;31m'
+GREEN = '\033[0;32m'
+YELLOW = '\033[1;33m'
+NC = '\033[0m'
+
+
+def diagram_key(source: str, theme: str, background: str, version: str) -> str:
+    """Cache key for a rendered diagram."""
+    digest = hashlib.sha256()
+    for part in (version, OPTIMIZER_VERSION, theme, background, source):
+        digest.update(part.encode('utf-8'))
+        digest.update(b'\0')
+    return digest.hexdigest()[:HASH_LENGTH]
+
+
+def write_atomic(path: Path, content: str):
+    """Write via a temp file and rename, so readers never see a partial file."""
+    tmp_path = path.with_name(f".{path.name}.tmp")
+    tmp_path.write_text(content)
+    os.replace(tmp_path, path)
+
+
+def render_deck(input_path: Path, theme: str = DEFAULT_THEME,
+                background: str = DEFAULT_BACKGROUND, prune: bool = False,
+                renderer: Optional[MermaidRenderer] = None) -> int:
+    """
+    Render a deck's Mermaid diagrams and write its .rendered.md.
+
+    Pass a running renderer to reuse its warm browser across calls (its
+    theme and background then apply); otherwise one is started for this
+    call and stopped after it. Returns the number of diagrams that failed
+    to render. Raises RendererUnavailable if diagrams need rendering and
+    mermaid-cli or its worker is missing; nothing is written then.
+    """
+    if renderer is not None:
+        theme, background = renderer.theme, renderer.background
+    start_time = time.perf_counter()
+    deck = parse_deck(input_path.read_text())
+    lines = deck.lines
+    # An unclosed fence is left as written
+    blocks = [block for block in deck.code_blocks.get("mermaid", []) if block.end is not None]
+
+    img_dir = input_path.parent / IMG_DIRNAME
+    output_path = input_path.with_name(f"{input_path.stem}.rendered.md")
+
+    names = []
+    misses = {}  # file name -> source, deduplicated
+    if blocks:
+        version = cli_version()
+        if version is None:
+            raise RendererUnavailable("Mermaid CLI not found. Install with: "
+                                      "npm install -g @mermaid-js/mermaid-cli")
+        for block in blocks:
+            name = f"diagram-{diagram_key(block.source, theme, background, version)}.svg"
+            names.append(name)
+            if not (img_dir / name).exists():
+                misses[name] = block.source
+
+    failed = set()
+    if misses:
+        img_dir.mkdir(parents=True, exist_ok=True)
+        print(f"{YELLOW}Rendering {len(misses)} new or changed diagram(s)...{NC}")
+        if renderer is None:
+            with MermaidRenderer(theme, background) as own_renderer:
+                results = own_renderer.render_batch(list(misses.values()))
+        else:
+            results = renderer.render_batch(list(misses.values()))
+        for name, result in zip(misses, results):
+            if result.ok:
+                write_atomic(img_dir / name, optimize_svg(result.svg))
+            else:
+                failed.add(name)
+
+    # Replace each rendered block with an image reference
+    output = []
+    position = 0
+    for number, (block, name) in enumerate(zip(blocks, names), 1):
+        output.extend(lines[position:block.start])
+        if name in failed:
+            print(f"{RED}  Failed to render diagram {number}{NC}", file=sys.stderr)
+            output.extend(lines[block.start:block.end + 1])
+        else:
+            output.append(f"![{block.info or f'Diagram {number}'}]({IMG_DIRNAME}/{name})")
+        position = block.end + 1
+    output.extend(lines[position:])
+
+    rendered = '\n'.join(output)
+    if not output_path.exists() or output_path.read_text() != rendered:
+        write_atomic(output_path, rendered)
+
+    if prune and img_dir.is_dir():
+        referenced = set(names)
+        for path in img_dir.iterdir():
+            if HASHED_SVG.match(path.name) and path.name not in referenced:
+                path.unlink()
+
+    elapsed = time.perf_counter() - start_time
+    hits = len(set(names)) - len(misses)
+    print(f"{GREEN}Created: {output_path}{NC}")
+    print(f"{GREEN}{len(blocks)} diagram(s): {hits} cached, {len(misses) - len(failed)} rendered, "
+          f"{len(failed)} failed ({elapsed:.2f}s){NC}")
+    return len(failed)
+
+
+def main():
+    parser = argparse.ArgumentParser(
+        description="Render Mermaid diagrams to SVG and create deck.rendered.md"
+    )
+    parser.add_argument("input", help="Deck markdown file")
+    parser.add_argument("-t", "--theme", default=DEFAULT_THEME,
+                        help=f"Mermaid theme (default: {DEFAULT_THEME})")
+    parser.add_argument("-b", "--background", default=DEFAULT_BACKGROUND,
+                        help=f"Background color (default: {DEFAULT_BACKGROUND})")
+    parser.add_argument("--prune", action="store_true",
+                        help="Delete rendered diagrams the deck no longer references")
+    args = parser.parse_args()
+
+    input_path = Path(args.input)
+    if not input_path.is_file():
+        print(f"{RED}Error: File not found: {input_path}{NC}")
+        sys.exit(1)
+
+    try:
+        render_deck(input_path, args.theme, args.background, args.prune)
+    except RendererUnavailable as e:
+        print(f"{RED}Error: {e}{NC}")
+        sys.exit(1)
+    print()
+    print(f"To preview: ./scripts/build.sh preview {input_path.with_name(input_path.stem + '.rendered.md')}")
+
+
+if __name__ == "__main__":
+    main()
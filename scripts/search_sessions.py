@@ -0,0 +1,367 @@
+#!/usr/bin/env python3
+"""
+Search the session memory index built by index_sessions.py.
+
+Queries are answered by a warm search daemon when one is running, and
+in-process otherwise. The daemon keeps the embedding model, FAISS index and
+chunk store open, so repeated queries skip the multi-second model load.
+
+Usage:
+    python scripts/search_sessions.py "query" [-k 5] [--mode hybrid] [--json]
+    python scripts/search_sessions.py --serve     # Start the warm daemon
+    python scripts/search_sessions.py --stop      # Stop a running daemon
+
+Options:
+    -k N          Number of results to return (default: 5)
+    --mode MODE   hybrid (default), vector, or lexical. Lexical (BM25) finds
+                  exact identifiers and never loads the embedding model
+    --json        Output results as JSON
+    --no-daemon   Always search in-process, even if a daemon is running
+    --no-rerank   Skip re-ranking lossy-index results against exact vectors
+
+The FAISS index is memory-mapped read-only, so the daemon and one-off
+searches share a single page-cached copy and start without reading it all.
+"""
+
+import argparse
+import json
+import os
+import socket
+import socketserver
+import threading
+import time
+
+from index_sessions import (
+    EXACT_INDEX_FILE,
+    INDEX_DIR,
+    INDEX_FILE,
+    MODEL_NAME,
+    RERANK_FACTOR,
+    get_dependencies,
+    load_exact_index,
+    load_existing_index,
+    open_chunk_store,
+    rerank,
+)
+
+
+SOCKET_PATH = f"{INDEX_DIR}/search.sock"
+CLIENT_TIMEOUT = 30  # seconds to wait for a daemon reply
+SEARCH_MODES = ("hybrid", "vector", "lexical")
+
+# Each ranking contributes max(k * factor, min) candidates before windows of
+# the same section are collapsed and hybrid rankings are fused
+HYBRID_DEPTH_FACTOR = 4
+HYBRID_MIN_DEPTH = 20
+RRF_K = 60  # Standard reciprocal rank fusion constant
+
+
+class SessionSearcher:
+    """
+    Vector and lexical search over the session index.
+
+    The embedding model and FAISS index are loaded on first vector query, so
+    lexical-only searches never pay for them. The index is reloaded when
+    build_index writes a new one. When the index is lossy and exact vectors
+    were kept, vector results are re-ranked against them.
+    """
+
+    def __init__(self, use_rerank: bool = True):
+        self.model = None
+        self.index = None
+        self.exact = None
+        self.store = None
+        self.use_rerank = use_rerank
+        self._signature = None
+
+    def warm(self):
+        """Load everything up front (used by the daemon)."""
+        self._load_model()
+        self.reload_if_changed()
+
+    def _load_model(self):
+        if self.model is None:
+            SentenceTransformer, self.faiss, self.np = get_dependencies()
+            self.model = SentenceTransformer(MODEL_NAME)
+        return self.model
+
+    def _index_signature(self):
+        """Identify the on-disk index generation by file mtimes and sizes."""
+        signature = []
+        for path in (INDEX_FILE, EXACT_INDEX_FILE):
+            try:
+                stat = os.stat(path)
+            except FileNotFoundError:
+                if path == INDEX_FILE:
+                    return None
+                signature.append(None)
+                continue
+            signature.append((stat.st_mtime_ns, stat.st_size))
+        return tuple(signature)
+
+    def reload_if_changed(self) -> bool:
+        """
+        Reload the index if build_index wrote a new generation.
+
+        The chunk store is read live, so only the FAISS index needs reloading.
+        """
+        signature = self._index_signature()
+        if signature == self._signature and self.index is not None:
+            return False
+
+        if self.store is not None:
+            self.store.close()
+        self.index, self.store = load_existing_index(mmap=True)
+        self.exact = load_exact_index(mmap=True) if self.use_rerank else None
+        self._signature = signature
+        return True
+
+    def _open_store(self):
+        if self.store is None:
+            self.store = open_chunk_store()
+        return self.store
+
+    def vector_search(self, query: str, limit: int) -> list[tuple[int, float]]:
+        """Dense cosine-similarity search. Returns (id, score) pairs, best first."""
+        self._load_model()
+        self.reload_if_changed()
+        if self.index is None or self.index.ntotal == 0:
+            return []
+
+        embedding = self.np.array(self.model.encode([query])).astype('float32')
+        self.faiss.normalize_L2(embedding)
+        if self.exact is None:
+            scores, ids = self.index.search(embedding, limit)
+            return [(int(i), float(score)) for score, i in zip(scores[0], ids[0]) if i >= 0]
+
+        # Quantized scores only pick candidates; exact vectors order them
+        _, ids = self.index.search(embedding, limit * RERANK_FACTOR)
+        return rerank(self.exact, self.np, embedding[0], [int(i) for i in ids[0] if i >= 0], limit)
+
+    def lexical_search(self, query: str, limit: int) -> list[tuple[int, float]]:
+        """BM25 search. Returns (id, score) pairs, best first."""
+        return self._open_store().lexical_search(query, limit)
+
+    def search(self, query: str, k: int = 5, mode: str = "hybrid") -> list[dict]:
+        """
+        Return the top-k chunks for a query, best first.
+
+        mode is "vector", "lexical", or "hybrid" (both rankings combined with
+        reciprocal rank fusion). Overlapping windows of one section collapse
+        into a single hit, its best-ranked window.
+        """
+        # Over-fetch: overlapping windows of one section collapse to one hit
+        depth = max(k * HYBRID_DEPTH_FACTOR, HYBRID_MIN_DEPTH)
+        if mode == "vector":
+            ranked = self.vector_search(query, depth)
+        elif mode == "lexical":
+            ranked = self.lexical_search(query, depth)
+        elif mode == "hybrid":
+            ranked = reciprocal_rank_fusion([
+                self.vector_search(query, depth),
+                self.lexical_search(query, depth),
+            ])
+        else:
+            raise ValueError(f"unknown search mode: {mode}")
+
+        store = self._open_store()
+        chunks = store.get([chunk_id for chunk_id, _ in ranked])
+        hits = []
+        seen_sections = set()
+        for chunk_id, score in ranked:
+            chunk = chunks.get(chunk_id)
+            if chunk is None:
+                continue
+            section_key = (chunk["file"], chunk["section_index"])
+            if section_key in seen_sections:
+                continue
+            seen_sections.add(section_key)
+            hits.append((chunk_id, score, chunk))
+            if len(hits) == k:
+                break
+
+        # Every file/section a (near-duplicate-collapsed) hit came from
+        sources = store.sources([chunk_id for chunk_id, _, _ in hits])
+        return [{
+            "score": score,
+            "file": chunk["file"],
+            "section": chunk["section"],
+            "preview": chunk["preview"],
+            "sources": [{"file": src["file"], "section": src["section"]}
+                        for src in sources.get(chunk_id, [])],
+        } for chunk_id, score, chunk in hits]
+
+
+def reciprocal_rank_fusion(rankings: list[list[tuple[int, float]]]) -> list[tuple[int, float]]:
+    """Fuse ranked (id, score) lists by summing 1 / (RRF_K + rank) per list."""
+    fused = {}
+    for ranking in rankings:
+        for rank, (chunk_id, _) in enumerate(ranking, 1):
+            fused[chunk_id] = fused.get(chunk_id, 0.0) + 1.0 / (RRF_K + rank)
+    return sorted(fused.items(), key=lambda item: item[1], reverse=True)
+
+
+class SearchRequestHandler(socketserver.StreamRequestHandler):
+    """
+    Answer one JSON-line request.
+
+    Requests are {"query": ..., "k": ..., "mode": ...}, {"command": "ping"} or
+    {"command": "stop"}; the reply is a single JSON line.
+    """
+
+    def handle(self):
+        line = self.rfile.readline()
+        if not line:
+            return
+
+        try:
+            request = json.loads(line)
+            command = request.get("command")
+            if command == "ping":
+                response = {"ok": True}
+            elif command == "stop":
+                response = {"stopped": True}
+                # shutdown() blocks until serve_forever returns, so it must
+                # not run on the serving thread
+                threading.Thread(target=self.server.shutdown).start()
+            else:
+                results = self.server.searcher.search(
+                    request["query"], int(request.get("k", 5)), request.get("mode", "hybrid")
+                )
+                response = {"results": results}
+        except Exception as e:
+            response = {"error": str(e)}
+
+        self.wfile.write(json.dumps(response).encode('utf-8') + b"\n")
+
+
+class SearchServer(socketserver.UnixStreamServer):
+    """Unix-socket server that serves queries from a resident SessionSearcher."""
+
+    def __init__(self, path: str, searcher: SessionSearcher):
+        self.searcher = searcher
+        super().__init__(path, SearchRequestHandler)
+
+
+def daemon_request(request: dict, timeout: float = CLIENT_TIMEOUT):
+    """Send a request to the daemon. Returns None if no daemon is listening."""
+    if not os.path.exists(SOCKET_PATH):
+        return None
+
+    try:
+        with socket.socket(socket.AF_UNIX, socket.SOCK_STREAM) as sock:
+            sock.settimeout(timeout)
+            sock.connect(SOCKET_PATH)
+            sock.sendall(json.dumps(request).encode('utf-8') + b"\n")
+            with sock.makefile('rb') as f:
+                line = f.readline()
+    except (ConnectionRefusedError, FileNotFoundError, socket.timeout):
+        return None
+
+    return json.loads(line) if line else None
+
+
+def search(query: str, k: int = 5, mode: str = "hybrid", use_daemon: bool = True,
+           use_rerank: bool = True) -> list[dict]:
+    """
+    Search session memory, via the daemon if available, else in-process.
+
+    In-process lexical searches only open the chunk store; they never load
+    the embedding model or the FAISS index. Turning off re-ranking always
+    searches in-process, since the daemon re-ranks.
+    """
+    if use_daemon and use_rerank:
+        response = daemon_request({"query": query, "k": k, "mode": mode})
+        if response is not None:
+            if "error" in response:
+                raise RuntimeError(f"search daemon error: {response['error']}")
+            return response["results"]
+
+    return SessionSearcher(use_rerank).search(query, k, mode)
+
+
+def serve():
+    """Run the warm search daemon until stopped."""
+    if daemon_request({"command": "ping"}, timeout=2) is not None:
+        print(f"Search daemon already running on {SOCKET_PATH}")
+        return
+
+    # A socket file with nobody listening is left over from a crashed daemon
+    if os.path.exists(SOCKET_PATH):
+        os.unlink(SOCKET_PATH)
+
+    os.makedirs(INDEX_DIR, exist_ok=True)
+    start = time.perf_counter()
+    print(f"Loading embedding model: {MODEL_NAME}")
+    searcher = SessionSearcher()
+    searcher.warm()
+    chunks = searcher.index.ntotal if searcher.index is not None else 0
+    print(f"Ready in {time.perf_counter() - start:.1f}s ({chunks} chunks); "
+          f"listening on {SOCKET_PATH}")
+
+    server = SearchServer(SOCKET_PATH, searcher)
+    try:
+        server.serve_forever(poll_interval=0.5)
+    except KeyboardInterrupt:
+        pass
+    finally:
+        server.server_close()
+        if os.path.exists(SOCKET_PATH):
+            os.unlink(SOCKET_PATH)
+    print("Search daemon stopped")
+
+
+def format_results(results: list[dict]) -> str:
+    """Format search results for terminal output."""
+    if not results:
+        return "No results."
+
+    lines = []
+    for rank, r in enumerate(results, 1):
+        lines.append(f"{rank}. [{r['score']:.3f}] {r['file']} — {r['section']}")
+        lines.append(f"   {r['preview']}")
+        others = sorted({src["file"] for src in r.get("sources", [])} - {r["file"]})
+        if others:
+            lines.append(f"   also in: {', '.join(others[:3])}"
+                         + (f" (+{len(others) - 3} more)" if len(others) > 3 else ""))
+    return '\n'.join(lines)
+
+
+def main():
+    parser = argparse.ArgumentParser(description="Search session memory")
+    parser.add_argument("query", nargs="?", help="Search query")
+    parser.add_argument("-k", type=int, default=5, help="Number of results (default: 5)")
+    parser.add_argument("--mode", choices=SEARCH_MODES, default="hybrid",
+                        help="Ranking to use (default: hybrid)")
+    parser.add_argument("--json", action="store_true", help="Output results as JSON")
+    parser.add_argument("--serve", action="store_true", help="Run the warm search daemon")
+    parser.add_argument("--stop", action="store_true", help="Stop a running search daemon")
+    parser.add_argument("--no-daemon", action="store_true", help="Search in-process only")
+    parser.add_argument("--no-rerank", action="store_true",
+                        help="Don't re-rank lossy-index results against exact vectors")
+    args = parser.parse_args()
+
+    if args.serve:
+        serve()
+        return
+
+    if args.stop:
+        if daemon_request({"command": "stop"}, timeout=5) is None:
+            print("No search daemon running")
+        else:
+            print("Search daemon stopping")
+        return
+
+    if not args.query:
+        parser.error("a query is required (or use --serve / --stop)")
+
+    results = search(args.query, args.k, args.mode, use_daemon=not args.no_daemon,
+                     use_rerank=not args.no_rerank)
+    if args.json:
+        print(json.dumps(results, indent=2))
+    else:
+        print(format_results(results))
+
+
+if __name__ == "__main__":
+    main()
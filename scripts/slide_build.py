@@ -0,0 +1,300 @@
+"""
+Slide-level incremental PDF and PPTX export for build.py --per-slide.
+
+The deck is split on its `---` separators into one standalone document per
+slide. Each document carries the deck's frontmatter, global directives and
+unscoped <style> blocks from any slide, and the local directives the slide
+inherits from earlier slides. When the deck is paginated, the slide is
+placed at its own position among blank pages that keep each page's
+paginate value, so its page number comes out as in a full build.
+
+Rendered pages are cached in output_dir/.slide-cache/<deck>/, keyed by the
+document, the theme and image files it uses, the Marp version and the
+format. Only changed slides are rendered, in one Marp run, and the output
+is stitched from cached pages: PDF pages are copied as-is (pypdf), and
+PPTX is assembled from the same full-slide images Marp's own PPTX export
+uses, with speaker notes (python-pptx). When most slides miss, the whole
+deck is rendered once and split into the cache instead.
+
+A paginated slide's document is as long as the deck, so for paginated
+decks the whole deck is rendered once as soon as two slides miss. (Marpit
+drops section::after content declarations that do not use
+attr(data-marpit-pagination), so a slide's page number cannot simply be
+overridden in a one-page document.)
+
+Decks using headingDivider (slides not split on `---`) are exported whole.
+"""
+
+import glob
+import hashlib
+import os
+import re
+import shutil
+import struct
+import subprocess
+import sys
+import tempfile
+from pathlib import Path
+from typing import Optional
+
+from build import dependency_hash, export
+from deck_parser import LOCAL_DIRECTIVES, Deck, Slide, parse_deck
+
+
+CACHE_DIRNAME = ".slide-cache"
+FULL_RENDER_FRACTION = 0.25  # render the whole deck once when more slides than this miss
+PAGINATED_FULL_RENDER = 2    # ... or at least this many, when each document holds every page
+PPTX_IMAGE_SCALE = 2         # Marp's default --image-scale for PPTX
+PPTX_WIDTH_INCHES = 10       # Marp's PPTX slide width
+SLIDE_FORMATS = {"pdf": ".pdf", "pptx": ".png"}
+
+
+def get_dependencies(fmt: str):
+    """Import the stitching library for a format only when needed."""
+    try:
+        if fmt == "pdf":
+            import pypdf
+            return pypdf
+        import pptx
+        return pptx
+    except ImportError as e:
+        print(f"Missing dependency: {e}")
+        print("Install with: pip install pypdf python-pptx")
+        sys.exit(1)
+
+
+def _comment(values: dict[str, str]) -> str:
+    return "<!--\n" + '\n'.join(f"{key}: {value}" for key, value in values.items()) + "\n-->"
+
+
+def slide_documents(deck: Deck) -> Optional[list[tuple[str, int, Slide]]]:
+    """
+    Standalone documents for each slide of a deck.
+
+    Returns (document, page, slide) per slide, where page is the 0-based
+    page of the document holding the slide, or None if the deck uses
+    headingDivider and cannot be split on `---`.
+    """
+    frontmatter = deck.frontmatter_text
+    slides = deck.slides
+    global_values = deck.global_directives()
+    if "headingDivider" in global_values or "headingDivider" in deck.frontmatter:
+        return None
+
+    # Local directives each slide inherits, and each page's paginate value
+    inherited = []
+    paginate = []
+    state = {}
+    default_paginate = deck.frontmatter.get("paginate", "false")
+    for slide in slides:
+        inherited.append(dict(state))
+        state.update({k: v for k, v in slide.directives.items() if k in LOCAL_DIRECTIVES})
+        paginate.append(slide.directives.get("_paginate", state.get("paginate", default_paginate)))
+    padded = any(value != "false" for value in paginate)
+
+    documents = []
+    for i, slide in enumerate(slides):
+        prelude = []
+        if global_values:
+            prelude.append(_comment(global_values))
+        if inherited[i]:
+            prelude.append(_comment(inherited[i]))
+        for j, other in enumerate(slides):
+            if j != i:
+                prelude.extend(style for style in other.styles if style not in slide.styles)
+        target = '\n\n'.join(prelude + [slide.body])
+
+        if padded:
+            pages = [f"\n<!-- _paginate: {value} -->\n" for value in paginate]
+            pages[i] = target
+            documents.append((frontmatter + '\n' + '\n---\n'.join(pages), i, slide))
+        else:
+            documents.append((frontmatter + '\n' + target, 0, slide))
+    return documents
+
+
+def render_whole_deck(documents: list[tuple[str, int, Slide]], missed: int) -> bool:
+    """Whether rendering the whole deck once is cheaper than rendering missed documents."""
+    # Only padded documents (paginated decks) hold their slide past page 0
+    padded = any(page for _, page, _ in documents)
+    if padded and missed >= PAGINATED_FULL_RENDER:
+        return True
+    return missed > FULL_RENDER_FRACTION * len(documents)
+
+
+def page_key(document: str, files: list[Path], version: Optional[str], fmt: str) -> str:
+    """Cache key for one rendered page."""
+    digest = hashlib.sha256()
+    digest.update(f"{fmt}\0{dependency_hash(files, version)}\0".encode())
+    digest.update(document.encode('utf-8'))
+    return digest.hexdigest()[:32]
+
+
+def _marp(inputs: list[Path], fmt: str, theme_files: list[Path], output: Optional[Path] = None):
+    """Run Marp on several documents at once; outputs land next to each input."""
+    args = ["--pdf"] if fmt == "pdf" else ["--images", "png", "--image-scale", str(PPTX_IMAGE_SCALE)]
+    command = ["marp", *map(str, inputs), *args]
+    if output is not None:
+        command += ["-o", str(output)]
+    if theme_files:
+        command += ["--theme-set", *map(str, theme_files)]
+    result = subprocess.run(command, capture_output=True, text=True)
+    if result.returncode != 0:
+        raise RuntimeError((result.stderr or result.stdout).strip())
+
+
+def _rendered_pages(document_path: Path, fmt: str, lib) -> list:
+    """Pages Marp produced for a document: pypdf pages, or PNG paths in page order."""
+    if fmt == "pdf":
+        return list(lib.PdfReader(str(document_path.with_suffix(".pdf"))).pages)
+    pattern = re.compile(re.escape(document_path.stem) + r"\.(\d+)\.png$")
+    images = [(int(m.group(1)), path) for path in document_path.parent.iterdir()
+              if (m := pattern.match(path.name))]
+    return [path for _, path in sorted(images)]
+
+
+def _store_page(page, fmt: str, lib, cache_file: Path, metadata=None):
+    """Write one rendered page into the cache atomically."""
+    tmp_path = cache_file.with_name(f".{cache_file.name}.tmp")
+    if fmt == "pdf":
+        writer = lib.PdfWriter()
+        writer.add_page(page)
+        if metadata:
+            writer.add_metadata({k: v for k, v in metadata.items() if v is not None})
+        with open(tmp_path, "wb") as f:
+            writer.write(f)
+    else:
+        shutil.copyfile(page, tmp_path)
+    os.replace(tmp_path, cache_file)
+
+
+def _png_size(path: Path) -> tuple[int, int]:
+    with open(path, "rb") as f:
+        header = f.read(24)
+    return struct.unpack(">II", header[16:24])
+
+
+def _stitch_pdf(pages: list[Path], output_file: Path, lib):
+    writer = lib.PdfWriter()
+    for path in pages:
+        writer.append(str(path))
+    metadata = lib.PdfReader(str(pages[0])).metadata
+    if metadata:
+        writer.add_metadata({k: v for k, v in metadata.items() if v is not None})
+    tmp_path = output_file.with_name(f".{output_file.name}.tmp")
+    with open(tmp_path, "wb") as f:
+        writer.write(f)
+    os.replace(tmp_path, output_file)
+
+
+def _stitch_pptx(pages: list[Path], slides: list[Slide], globals_: dict, output_file: Path, lib):
+    from pptx.util import Inches
+
+    presentation = lib.Presentation()
+    width, height = _png_size(pages[0])
+    presentation.slide_width = Inches(PPTX_WIDTH_INCHES)
+    presentation.slide_height = int(presentation.slide_width * height / width)
+    blank = presentation.slide_layouts[6]
+    for path, slide in zip(pages, slides):
+        pptx_slide = presentation.slides.add_slide(blank)
+        pptx_slide.shapes.add_picture(str(path), 0, 0, presentation.slide_width,
+                                      presentation.slide_height)
+        if slide.notes:
+            pptx_slide.notes_slide.notes_text_frame.text = '\n\n'.join(slide.notes)
+    presentation.core_properties.title = globals_.get("title", "").strip("'\"")
+    presentation.core_properties.author = globals_.get("author", "").strip("'\"")
+
+    tmp_path = output_file.with_name(f".{output_file.name}.tmp")
+    presentation.save(str(tmp_path))
+    os.replace(tmp_path, output_file)
+
+
+def export_slides(input_path: Path, fmt: str, output_file: Path, theme_files: list[Path],
+                  version: Optional[str]) -> tuple[bool, str]:
+    """
+    Export a deck to PDF or PPTX from per-slide cached pages.
+
+    Same contract as build.export: returns (ok, error output).
+    """
+    lib = get_dependencies(fmt)
+    deck = parse_deck(input_path.read_text())
+    documents = slide_documents(deck)
+    if documents is None:
+        print(f"Deck uses headingDivider; exporting {fmt} whole")
+        return export(input_path, fmt, output_file, theme_files)
+
+    deck_dir = input_path.parent
+    cache_dir = output_file.parent / CACHE_DIRNAME / input_path.stem
+    cache_dir.mkdir(parents=True, exist_ok=True)
+    suffix = SLIDE_FORMATS[fmt]
+    keys = [page_key(document, [*theme_files, *parse_deck(document).local_files(deck_dir)], version, fmt)
+            for document, _, _ in documents]
+    misses = {key: (document, page) for key, (document, page, _) in zip(keys, documents)
+              if not (cache_dir / f"{key}{suffix}").exists()}
+
+    full_render = render_whole_deck(documents, len(misses))
+    try:
+        if full_render:
+            _render_full(input_path, fmt, theme_files, keys, cache_dir, lib)
+        elif misses:
+            _render_misses(input_path, fmt, theme_files, misses, cache_dir, lib)
+    except RuntimeError as e:
+        return False, str(e)
+    except ValueError as e:
+        # The deck did not split the way Marp split it
+        print(f"{e}; exporting {fmt} whole")
+        return export(input_path, fmt, output_file, theme_files)
+
+    pages = [cache_dir / f"{key}{suffix}" for key in keys]
+    slides = [slide for _, _, slide in documents]
+    if fmt == "pdf":
+        _stitch_pdf(pages, output_file, lib)
+    else:
+        global_values = {**deck.frontmatter, **deck.global_directives()}
+        _stitch_pptx(pages, slides, global_values, output_file, lib)
+
+    # Drop pages no slide uses any more
+    current = {page.name for page in pages}
+    for path in cache_dir.glob(f"*{suffix}"):
+        if path.name not in current:
+            path.unlink()
+
+    hits = len(documents) - len(misses)
+    print(f"{fmt}: {hits}/{len(documents)} slides cached ({100 * hits / len(documents):.0f}%), "
+          f"{len(misses)} rendered" + (" in a full render" if full_render and misses else ""))
+    return True, ""
+
+
+def _render_full(input_path: Path, fmt: str, theme_files: list[Path], keys: list[str],
+                 cache_dir: Path, lib):
+    """Render the whole deck once and split its pages into the cache."""
+    with tempfile.TemporaryDirectory(dir=cache_dir) as tmpdir:
+        output = Path(tmpdir) / f"full{'.pdf' if fmt == 'pdf' else '.png'}"
+        _marp([input_path], fmt, theme_files, output)
+        pages = _rendered_pages(Path(tmpdir) / "full.md", fmt, lib)
+        if len(pages) != len(keys):
+            raise ValueError(f"Marp rendered {len(pages)} pages for {len(keys)} slides")
+        metadata = lib.PdfReader(str(output)).metadata if fmt == "pdf" else None
+        for key, page in zip(keys, pages):
+            _store_page(page, fmt, lib, cache_dir / f"{key}{SLIDE_FORMATS[fmt]}", metadata)
+
+
+def _render_misses(input_path: Path, fmt: str, theme_files: list[Path],
+                   misses: dict[str, tuple[str, int]], cache_dir: Path, lib):
+    """Render changed slides' documents in one Marp run and cache their pages."""
+    # Documents sit beside the deck so relative image paths still resolve
+    paths = {key: input_path.with_name(f".{input_path.stem}.{fmt}.slide-{key[:12]}.md")
+             for key in misses}
+    try:
+        for key, (document, _) in misses.items():
+            paths[key].write_text(document)
+        _marp(list(paths.values()), fmt, theme_files)
+        for key, (_, page) in misses.items():
+            pages = _rendered_pages(paths[key], fmt, lib)
+            metadata = (lib.PdfReader(str(paths[key].with_suffix(".pdf"))).metadata
+                        if fmt == "pdf" else None)
+            _store_page(pages[page], fmt, lib, cache_dir / f"{key}{SLIDE_FORMATS[fmt]}", metadata)
+    finally:
+        for path in paths.values():
+            for output in path.parent.glob(f"{glob.escape(path.stem)}*"):
+                output.unlink()
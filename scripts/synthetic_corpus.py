@@ -0,0 +1,266 @@
+#!/usr/bin/env python3
+"""
+Generate synthetic session archives and Marp decks for benchmarking.
+
+Usage:
+    python scripts/synthetic_corpus.py <output_dir> [--sessions 200] [--decks 1]
+                                       [--slides 30] [--seed 0]
+
+Writes output_dir/.session_logs/YYYY-MM/YYYYMMDD_HHMM_<id>.md files shaped
+like the exported sessions: a "# Session:" title, alternating "## User" and
+"## Claude" turns, "### Actions" lists of tool calls and fenced code. A
+share of turns repeat earlier text with small edits, as real sessions do,
+so the near-duplicate stage has work to do.
+
+Decks go to output_dir/decks/deck-NN/deck.md with a theme from themes/,
+speaker notes, Mermaid flowchart and sequence blocks, tables and chart
+images produced by an img/generate_charts.py script.
+
+Output is deterministic for a given seed, so benchmark runs on different
+commits measure the same corpus.
+"""
+
+import argparse
+import random
+from datetime import datetime, timedelta
+from pathlib import Path
+
+
+SESSION_LOGS_DIRNAME = ".session_logs"
+DECKS_DIRNAME = "decks"
+DEFAULT_SESSIONS = 200
+DEFAULT_SLIDES = 30
+TURNS_PER_SESSION = (6, 40)      # range of User/Claude turns per session
+WORDS_PER_PARAGRAPH = (15, 90)
+REPEAT_FRACTION = 0.1            # turns that re-use an earlier turn with small edits
+CHARTS_PER_DECK = 3
+THEMES = ("plato", "turing", "heidegger")
+
+# Vocabulary drawn from the kind of work sessions record; sampled with a
+# Zipf-like skew so term frequencies look like real text to BM25
+VOCABULARY = """
+the a to of and in is for that it with on this we be as can by not are from
+deck slide slides theme marp build export pdf pptx html preview render diagram
+mermaid flowchart sequence chart matplotlib svg png figure axis legend color
+font title assertion evidence bullet layout column image table speaker notes
+session index search query embedding vector chunk faiss model cache manifest
+hash file folder script error warning install version command output input
+test fixture validate syntax node edge subgraph participant message state
+rhetoric audience argument structure template transition section summary
+update change fix check run again works now looks better instead because
+python npm node css import config option flag default path directory line
+""".split()
+COMMANDS = [
+    ("./scripts/build.sh pdf {deck}", "Build the deck to PDF"),
+    ("python scripts/render_mermaid.py {deck}", "Render Mermaid diagrams"),
+    ("python scripts/index_sessions.py", "Update the session index"),
+    ("python tests/diagrams/run_tests.py --fast", "Check diagram syntax"),
+    ("marp --version", "Check Marp CLI version"),
+    ("ls -la {folder}", "List deck files"),
+    ("git status", "Check working tree"),
+]
+READ_PATHS = ["scripts/build.py", "themes/corporate/plato.css", "agent_docs/slide-creation-rules.md",
+              "{deck}", "{folder}/img/generate_charts.py", "CLAUDE.md"]
+CODE_SNIPPETS = [
+    ("mermaid", "flowchart LR\n    A[Draft] --> B{Review}\n    B -->|Approve| C[Publish]\n"
+                "    B -->|Revise| A"),
+    ("python", "fig, ax = plt.subplots(figsize=(10, 6))\nax.bar(labels, values, color='#2563eb')\n"
+               "fig.savefig('chart.svg', bbox_inches='tight')"),
+    ("bash", "./scripts/build.sh all examples/deck-forge-overview.md output/"),
+    ("css", "section h1 {\n  color: var(--color-accent);\n  font-size: 1.6em;\n}"),
+]
+
+MERMAID_FLOWCHART = """flowchart LR
+    A[{a}] --> B{{{b}?}}
+    B -->|Yes| C[{c}]
+    B -->|No| D[{d}]
+    D --> A"""
+MERMAID_SEQUENCE = """sequenceDiagram
+    participant U as User
+    participant S as Server
+    U->>S: {a}
+    S-->>U: {b}
+    alt {c}
+        U->>S: Retry
+    else Otherwise
+        S-->>U: {d}
+    end"""
+CHART_SCRIPT = '''import matplotlib
+matplotlib.use('Agg')
+import matplotlib.pyplot as plt
+
+LABELS = {labels!r}
+SERIES = {series!r}
+
+for i, values in enumerate(SERIES):
+    fig, ax = plt.subplots(figsize=(10, 6))
+    if i % 2:
+        ax.plot(LABELS, values, marker='o')
+    else:
+        ax.bar(LABELS, values)
+    ax.set_title(f"Series {{i + 1}}")
+    fig.savefig(f"chart-{{i + 1}}.svg", bbox_inches='tight')
+    plt.close(fig)
+'''
+
+
+class TextSource:
+    """Seeded generator of words, sentences and paragraphs."""
+
+    def __init__(self, rng: random.Random):
+        self.rng = rng
+        # Zipf-like weights: the k-th word is drawn with weight 1/k
+        self.weights = [1 / (rank + 1) for rank in range(len(VOCABULARY))]
+
+    def words(self, count: int) -> list[str]:
+        return self.rng.choices(VOCABULARY, weights=self.weights, k=count)
+
+    def sentence(self, low: int = 5, high: int = 14) -> str:
+        text = " ".join(self.words(self.rng.randint(low, high)))
+        return text[0].upper() + text[1:] + "."
+
+    def paragraph(self) -> str:
+        remaining = self.rng.randint(*WORDS_PER_PARAGRAPH)
+        sentences = []
+        while remaining > 0:
+            length = min(remaining, self.rng.randint(5, 14))
+            sentences.append(self.sentence(length, length))
+            remaining -= length
+        return " ".join(sentences)
+
+    def phrase(self) -> str:
+        return " ".join(self.words(self.rng.randint(1, 3))).capitalize()
+
+
+def edit_slightly(text: str, rng: random.Random) -> str:
+    """Change a few words of text, as a re-asked question or re-run step would."""
+    header, _, body = text.partition("\n")
+    words = body.split(" ")
+    # Only plain words, so headings, commands and code stay intact
+    editable = [i for i, word in enumerate(words) if word.isalpha() and word.islower()]
+    for i in rng.sample(editable, min(len(editable), max(1, len(words) // 40))):
+        words[i] = rng.choice(VOCABULARY)
+    return header + "\n" + " ".join(words)
+
+
+def session_turn(text: TextSource, role: str) -> str:
+    rng = text.rng
+    lines = [f"## {role}", ""]
+    for _ in range(rng.randint(1, 3)):
+        lines += [text.paragraph(), ""]
+    if role == "Claude" and rng.random() < 0.3:
+        language, code = rng.choice(CODE_SNIPPETS)
+        lines += [f"```{language}", code, "```", ""]
+    if role == "Claude" and rng.random() < 0.6:
+        folder = f"decks/{'-'.join(text.words(2))}"
+        lines += ["### Actions", ""]
+        for _ in range(rng.randint(1, 4)):
+            if rng.random() < 0.6:
+                command, description = rng.choice(COMMANDS)
+                command = command.format(deck=f"{folder}/deck.md", folder=folder)
+                lines.append(f"- 💻 `{command}` — {description}")
+            else:
+                path = rng.choice(READ_PATHS).format(deck=f"{folder}/deck.md", folder=folder)
+                lines.append(f"- 📖 Read `{path}`")
+        lines.append("")
+    return "\n".join(lines)
+
+
+def session_markdown(text: TextSource, started: datetime) -> str:
+    rng = text.rng
+    turns = []
+    for i in range(rng.randint(*TURNS_PER_SESSION)):
+        if turns and rng.random() < REPEAT_FRACTION:
+            turns.append(edit_slightly(rng.choice(turns), rng))
+        else:
+            turns.append(session_turn(text, "User" if i % 2 == 0 else "Claude"))
+    return f"# Session: {started:%Y-%m-%d %H:%M}\n\n" + "\n".join(turns)
+
+
+def generate_sessions(output_dir: Path, count: int = DEFAULT_SESSIONS, seed: int = 0) -> list[Path]:
+    """Write `count` session files under output_dir/.session_logs; returns their paths."""
+    rng = random.Random(seed)
+    text = TextSource(rng)
+    started = datetime(2026, 1, 5, 9, 0)
+    paths = []
+    for _ in range(count):
+        started += timedelta(minutes=rng.randint(20, 60 * 30))
+        session_id = f"{rng.getrandbits(32):08x}"
+        path = (output_dir / SESSION_LOGS_DIRNAME / f"{started:%Y-%m}"
+                / f"{started:%Y%m%d_%H%M}_{session_id}.md")
+        path.parent.mkdir(parents=True, exist_ok=True)
+        path.write_text(session_markdown(text, started))
+        paths.append(path)
+    return paths
+
+
+def deck_slide(text: TextSource, number: int, charts: int) -> str:
+    rng = text.rng
+    lines = [f"# {text.sentence(4, 9)[:-1]}", ""]
+    kind = number % 5
+    if kind == 1:
+        template = MERMAID_FLOWCHART if rng.random() < 0.5 else MERMAID_SEQUENCE
+        phrases = {key: text.phrase() for key in "abcd"}
+        lines += ["```mermaid", template.format(**phrases), "```"]
+    elif kind == 2 and charts:
+        lines += [f"![w:900](img/chart-{rng.randint(1, charts)}.svg)"]
+    elif kind == 3:
+        lines += ["| Option | Cost | Benefit |", "|---|---|---|"]
+        for _ in range(rng.randint(2, 4)):
+            lines.append(f"| {text.phrase()} | {rng.randint(1, 99)}k | {text.phrase()} |")
+    else:
+        lines += [f"- {text.sentence()}" for _ in range(rng.randint(2, 5))]
+    lines += ["", f"<!-- {text.sentence()} -->"]
+    return "\n".join(lines)
+
+
+def generate_deck(deck_dir: Path, slides: int = DEFAULT_SLIDES, seed: int = 0) -> Path:
+    """Write a deck with chart scripts to deck_dir; returns the deck file."""
+    rng = random.Random(seed)
+    text = TextSource(rng)
+    img_dir = deck_dir / "img"
+    img_dir.mkdir(parents=True, exist_ok=True)
+
+    labels = [f"Q{i}" for i in range(1, 5)]
+    series = [[rng.randint(10, 100) for _ in labels] for _ in range(CHARTS_PER_DECK)]
+    (img_dir / "generate_charts.py").write_text(CHART_SCRIPT.format(labels=labels, series=series))
+
+    frontmatter = (f"---\nmarp: true\ntheme: {rng.choice(THEMES)}\npaginate: true\n"
+                   f"header: '{text.phrase()}'\n---\n\n")
+    title = f"<!-- _class: title -->\n\n# {text.sentence(3, 6)[:-1]}\n\n**{text.sentence()}**"
+    body = [title] + [deck_slide(text, i, CHARTS_PER_DECK) for i in range(1, slides)]
+    deck = deck_dir / "deck.md"
+    deck.write_text(frontmatter + "\n\n---\n\n".join(body) + "\n")
+    return deck
+
+
+def generate_decks(output_dir: Path, count: int = 1, slides: int = DEFAULT_SLIDES,
+                   seed: int = 0) -> list[Path]:
+    """Write `count` decks under output_dir/decks; returns the deck files."""
+    return [generate_deck(output_dir / DECKS_DIRNAME / f"deck-{i + 1:02d}", slides, seed + i)
+            for i in range(count)]
+
+
+def main():
+    parser = argparse.ArgumentParser(
+        description="Generate synthetic session archives and decks for benchmarks"
+    )
+    parser.add_argument("output_dir", help="Folder to write the corpus to")
+    parser.add_argument("--sessions", type=int, default=DEFAULT_SESSIONS,
+                        help=f"Session files to write (default: {DEFAULT_SESSIONS})")
+    parser.add_argument("--decks", type=int, default=1, help="Decks to write (default: 1)")
+    parser.add_argument("--slides", type=int, default=DEFAULT_SLIDES,
+                        help=f"Slides per deck (default: {DEFAULT_SLIDES})")
+    parser.add_argument("--seed", type=int, default=0, help="Random seed (default: 0)")
+    args = parser.parse_args()
+
+    output_dir = Path(args.output_dir)
+    sessions = generate_sessions(output_dir, args.sessions, args.seed)
+    decks = generate_decks(output_dir, args.decks, args.slides, args.seed)
+    size = sum(path.stat().st_size for path in sessions)
+    print(f"Wrote {len(sessions)} session file(s) ({size / 2**20:.1f} MB) "
+          f"and {len(decks)} deck(s) to {output_dir}")
+
+
+if __name__ == "__main__":
+    main()
@@ -0,0 +1,178 @@
+"""
+Named spans for finding where a run's time goes.
+
+    from tracing import span
+
+    with span("encode", chunks=len(batch)):
+        model.encode(texts)
+
+Tracing is off unless enable() is called (the --profile flag of
+index_sessions.py and run_tests.py); span() then returns a shared no-op
+context, so instrumented code costs one global lookup per span.
+
+When on, each span records wall time, process CPU time and the peak
+resident set size at its end (plus how much the span raised it). Spans
+nest and may come from any thread. report() writes them as a Chrome
+trace-event file (open in chrome://tracing or https://ui.perfetto.dev)
+and prints a per-span summary table. Totals are inclusive: a span's time
+includes the spans nested inside it.
+
+CPU time is the whole process's: spans overlapping on several threads
+each see the others' CPU, and work in child processes (mmdc, chart runs,
+chunking workers) shows up as wall time only.
+"""
+
+import contextlib
+import json
+import os
+import sys
+import threading
+import time
+from collections import defaultdict
+from typing import Optional
+
+try:
+    import resource
+except ImportError:  # Windows
+    resource = None
+
+
+DEFAULT_TRACE_FILE = "trace.json"
+# ru_maxrss is in kilobytes on Linux and bytes on macOS
+RSS_UNIT = 1 if sys.platform == "darwin" else 1024
+
+_tracer = None
+_NO_SPAN = contextlib.nullcontext()
+
+
+def _peak_rss() -> int:
+    """Peak resident set size of this process so far, in bytes (0 if unknown)."""
+    if resource is None:
+        return 0
+    return resource.getrusage(resource.RUSAGE_SELF).ru_maxrss * RSS_UNIT
+
+
+class Tracer:
+    """Collects finished spans from every thread."""
+
+    def __init__(self):
+        self.origin = time.perf_counter()
+        self.pid = os.getpid()
+        self.events = []
+        self.threads = {}
+        self._lock = threading.Lock()
+
+    def record(self, name: str, args: dict, start: float, wall: float, cpu: float,
+               peak_rss: int, rss_growth: int):
+        thread = threading.current_thread()
+        with self._lock:
+            self.threads.setdefault(thread.ident, thread.name)
+            self.events.append((name, args, start - self.origin, wall, cpu,
+                                peak_rss, rss_growth, thread.ident))
+
+    def chrome_trace(self) -> dict:
+        """The spans as Chrome trace-event JSON (complete events, microseconds)."""
+        events = [{"name": "thread_name", "ph": "M", "pid": self.pid, "tid": tid,
+                   "args": {"name": name}} for tid, name in self.threads.items()]
+        for name, args, start, wall, cpu, peak_rss, rss_growth, tid in self.events:
+            events.append({
+                "name": name, "ph": "X", "pid": self.pid, "tid": tid,
+                "ts": round(start * 1e6, 1), "dur": round(wall * 1e6, 1),
+                "args": {**args, "cpu_ms": round(cpu * 1000, 3),
+                         "peak_rss_mb": round(peak_rss / 2**20, 1),
+                         "rss_growth_mb": round(rss_growth / 2**20, 1)},
+            })
+        return {"traceEvents": events, "displayTimeUnit": "ms"}
+
+    def summary(self) -> str:
+        """Per span name: calls, total wall and CPU time, peak RSS and its growth."""
+        rows = defaultdict(lambda: [0, 0.0, 0.0, 0, 0])
+        for name, _, _, wall, cpu, peak_rss, rss_growth, _ in self.events:
+            row = rows[name]
+            row[0] += 1
+            row[1] += wall
+            row[2] += cpu
+            row[3] = max(row[3], peak_rss)
+            row[4] += rss_growth
+        width = max([len(name) for name in rows] + [4])
+        lines = [f"  {'span':<{width}} {'calls':>7} {'wall ms':>10} {'cpu ms':>10} "
+                 f"{'peak MB':>8} {'+RSS MB':>8}"]
+        for name, (calls, wall, cpu, peak_rss, rss_growth) in sorted(
+                rows.items(), key=lambda item: -item[1][1]):
+            lines.append(f"  {name:<{width}} {calls:>7} {wall * 1000:>10.1f} {cpu * 1000:>10.1f} "
+                         f"{peak_rss / 2**20:>8.1f} {rss_growth / 2**20:>8.1f}")
+        return "\n".join(lines)
+
+
+class _Span:
+    __slots__ = ("tracer", "name", "args", "start", "cpu", "rss")
+
+    def __init__(self, tracer: Tracer, name: str, args: dict):
+        self.tracer = tracer
+        self.name = name
+        self.args = args
+
+    def __enter__(self):
+        self.rss = _peak_rss()
+        self.cpu = time.process_time()
+        self.start = time.perf_counter()
+        return self
+
+    def __exit__(self, *exc):
+        wall = time.perf_counter() - self.start
+        cpu = time.process_time() - self.cpu
+        rss = _peak_rss()
+        self.tracer.record(self.name, self.args, self.start, wall, cpu, rss, rss - self.rss)
+        return False
+
+
+def enable() -> Tracer:
+    """Start recording spans (for the rest of the process)."""
+    global _tracer
+    if _tracer is None:
+        _tracer = Tracer()
+    return _tracer
+
+
+def enabled() -> bool:
+    return _tracer is not None
+
+
+def span(name: str, **args):
+    """Context manager timing a named stage; args are shown in the trace viewer."""
+    if _tracer is None:
+        return _NO_SPAN
+    return _Span(_tracer, name, args)
+
+
+def traced_iter(name: str, iterable):
+    """Yield from iterable, timing each step as a span (producer time, not consumer)."""
+    if _tracer is None:
+        return iterable
+    return _traced_iter(name, iter(iterable))
+
+
+def _traced_iter(name: str, iterator):
+    while True:
+        with span(name):
+            try:
+                item = next(iterator)
+            except StopIteration:
+                return
+        yield item
+
+
+def report(path: Optional[str] = DEFAULT_TRACE_FILE, out=None):
+    """Write the Chrome trace to path and print the summary table to out (stdout)."""
+    if _tracer is None:
+        return
+    out = out or sys.stdout
+    if path:
+        tmp_path = f"{path}.tmp"
+        with open(tmp_path, 'w') as f:
+            json.dump(_tracer.chrome_trace(), f)
+        os.replace(tmp_path, path)
+    print("\nProfile:", file=out)
+    print(_tracer.summary(), file=out)
+    if path:
+        print(f"Trace saved to: {path} (open in chrome://tracing or ui.perfetto.dev)", file=out)
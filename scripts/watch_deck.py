@@ -0,0 +1,282 @@
+#!/usr/bin/env python3
+"""
+Watch a deck and keep its rendered version and preview up to date on save.
+
+Usage:
+    python scripts/watch_deck.py <deck.md> [--no-preview]
+
+Automates the two-file workflow. Renders deck.rendered.md once, starts the
+Marp preview on it, then watches the deck, the chart scripts in its img/
+folder and its theme CSS:
+
+- deck.md saved: re-renders only new or changed Mermaid blocks (on a
+  browser kept warm for the whole session) and rewrites deck.rendered.md
+  if it changed
+- a chart script or its data saved in img/: re-runs the charts whose
+  inputs changed (build_charts.py) and refreshes the preview
+- theme CSS saved: the preview reloads it; if the deck names a different
+  theme, the preview restarts with it
+
+Changes are detected with inotify on Linux (polling elsewhere) and
+debounced, so an editor's burst of writes counts as one change. Each
+change reports its edit-to-refresh latency: from the first filesystem
+event to the rendered files being written.
+
+Options:
+    --no-preview   Only keep deck.rendered.md and the charts up to date
+"""
+
+import argparse
+import ctypes
+import ctypes.util
+import os
+import select
+import struct
+import subprocess
+import sys
+import time
+from pathlib import Path
+from typing import Optional
+
+from build import marp_command, resolve_theme, theme_index
+from build_charts import build_charts
+from chart_runner import shared_runner
+from deck_parser import parse_frontmatter
+from mermaid_renderer import MermaidRenderer, RendererUnavailable
+from render_mermaid import IMG_DIRNAME, render_deck
+
+
+DEBOUNCE = 0.15        # seconds of quiet that end a burst of events
+POLL_INTERVAL = 0.25   # seconds between scans when inotify is unavailable
+
+# inotify(7) flags
+IN_MODIFY = 0x002
+IN_CLOSE_WRITE = 0x008
+IN_MOVED_TO = 0x080
+IN_CREATE = 0x100
+IN_DELETE = 0x200
+IN_CLOEXEC = 0o2000000
+EVENT_HEADER = struct.Struct("iIII")  # wd, mask, cookie, name length
+
+RED = '\033[0;31m'
+GREEN = '\033[0;32m'
+YELLOW = '\033[1;33m'
+NC = '\033[0m'
+
+
+class InotifyWatcher:
+    """Directory watches through the inotify syscalls (Linux)."""
+
+    def __init__(self):
+        self.libc = ctypes.CDLL(ctypes.util.find_library("c") or "libc.so.6", use_errno=True)
+        self.fd = self.libc.inotify_init1(IN_CLOEXEC)
+        if self.fd < 0:
+            raise OSError(ctypes.get_errno(), "inotify_init1 failed")
+        self.dirs = {}  # watch descriptor -> directory
+
+    def watch(self, directory: Path):
+        if directory in self.dirs.values():
+            return
+        # Editors that save by renaming a temp file show up as IN_MOVED_TO
+        mask = IN_CLOSE_WRITE | IN_MOVED_TO | IN_CREATE | IN_DELETE | IN_MODIFY
+        wd = self.libc.inotify_add_watch(self.fd, str(directory).encode(), mask)
+        if wd < 0:
+            raise OSError(ctypes.get_errno(), f"cannot watch {directory}")
+        self.dirs[wd] = directory
+
+    def wait(self, timeout: Optional[float]) -> set[Path]:
+        """Paths changed within `timeout` seconds (None waits indefinitely)."""
+        ready, _, _ = select.select([self.fd], [], [], timeout)
+        if not ready:
+            return set()
+        data = os.read(self.fd, 64 * 1024)
+        changed = set()
+        offset = 0
+        while offset < len(data):
+            wd, _, _, length = EVENT_HEADER.unpack_from(data, offset)
+            offset += EVENT_HEADER.size
+            name = data[offset:offset + length].rstrip(b"\0").decode(errors="replace")
+            offset += length
+            if wd in self.dirs and name:
+                changed.add(self.dirs[wd] / name)
+        return changed
+
+
+class PollingWatcher:
+    """Fallback watcher comparing file modification times."""
+
+    def __init__(self):
+        self.dirs = []
+        self.mtimes = {}
+
+    def _scan(self) -> dict[Path, float]:
+        mtimes = {}
+        for directory in self.dirs:
+            for path in directory.iterdir():
+                try:
+                    mtimes[path] = path.stat().st_mtime_ns
+                except OSError:
+                    pass
+        return mtimes
+
+    def watch(self, directory: Path):
+        if directory not in self.dirs:
+            self.dirs.append(directory)
+            self.mtimes = self._scan()
+
+    def wait(self, timeout: Optional[float]) -> set[Path]:
+        deadline = None if timeout is None else time.monotonic() + timeout
+        while True:
+            mtimes = self._scan()
+            changed = {p for p in mtimes.keys() | self.mtimes.keys()
+                       if mtimes.get(p) != self.mtimes.get(p)}
+            self.mtimes = mtimes
+            if changed:
+                return changed
+            if deadline is not None and time.monotonic() >= deadline:
+                return set()
+            time.sleep(POLL_INTERVAL)
+
+
+def make_watcher():
+    try:
+        return InotifyWatcher()
+    except (OSError, AttributeError):
+        return PollingWatcher()
+
+
+class DeckWatcher:
+    """Keeps one deck's rendered markdown, charts and preview current."""
+
+    def __init__(self, deck: Path, preview: bool = True):
+        self.deck = deck.resolve()
+        self.img_dir = self.deck.parent / IMG_DIRNAME
+        self.rendered = self.deck.with_name(f"{self.deck.stem}.rendered.md")
+        self.show_preview = preview
+        self.renderer = MermaidRenderer()
+        self.watcher = make_watcher()
+        self.theme_files = []
+        self.preview_process = None
+
+    def resolve_theme(self) -> bool:
+        """Re-read the deck's theme; returns True if its CSS files changed."""
+        theme = parse_frontmatter(self.deck.read_text()).get("theme")
+        theme_files = resolve_theme(theme, theme_index())
+        changed = theme_files != self.theme_files
+        self.theme_files = theme_files
+        for path in theme_files:
+            self.watcher.watch(path.parent)
+        return changed
+
+    def start_preview(self):
+        self.stop_preview()
+        if self.show_preview:
+            self.preview_process = subprocess.Popen(
+                marp_command(self.rendered, self.theme_files, "--preview", "--html"))
+
+    def stop_preview(self):
+        if self.preview_process is not None:
+            self.preview_process.terminate()
+            self.preview_process.wait()
+            self.preview_process = None
+
+    def refresh_preview(self):
+        """Make Marp reload: it watches the markdown, not the images it references."""
+        if self.rendered.exists():
+            os.utime(self.rendered)
+
+    def render(self) -> str:
+        try:
+            failed = render_deck(self.deck, renderer=self.renderer)
+        except RendererUnavailable as e:
+            # Keep watching: the next save retries, e.g. once mermaid-cli is installed
+            print(f"{RED}Error: {e}{NC}")
+            return f"{RED}diagrams not rendered{NC}"
+        return f"{failed} diagram(s) failed" if failed else "rendered"
+
+    def run_charts(self) -> Optional[str]:
+        _, ran, failed = build_charts(self.img_dir, quiet=True)
+        if ran:
+            self.refresh_preview()
+        if failed:
+            return f"{RED}{failed} chart(s) failed{NC}"
+        return f"{ran} chart(s) re-run" if ran else None
+
+    def handle(self, changed: set[Path]) -> list[str]:
+        """React to a debounced batch of changed paths; returns what was done."""
+        actions = []
+        if self.deck in changed:
+            if self.resolve_theme():
+                self.start_preview()
+                actions.append("theme switched")
+            actions.append(self.render())
+        # Ignore the SVGs and temp files that rendering itself writes
+        if any(p.parent == self.img_dir and p.suffix != ".svg" and not p.name.startswith('.')
+               for p in changed):
+            result = self.run_charts()
+            if result:
+                actions.append(result)
+        if any(path in self.theme_files for path in changed):
+            actions.append("theme reloaded")
+        return actions
+
+    def run(self):
+        self.watcher.watch(self.deck.parent)
+        if self.img_dir.is_dir():
+            self.watcher.watch(self.img_dir)
+        self.resolve_theme()
+        shared_runner().warm()
+        self.run_charts()
+        self.render()
+        self.start_preview()
+        print(f"{YELLOW}Watching {self.deck.name}, charts in {IMG_DIRNAME}/ and theme CSS... "
+              f"Press Ctrl+C to stop{NC}")
+
+        while True:
+            changed = self.watcher.wait(None)
+            first_event = time.perf_counter()
+            # Debounce: keep collecting until the writes stop
+            while True:
+                more = self.watcher.wait(DEBOUNCE)
+                if not more:
+                    break
+                changed |= more
+            if self.img_dir.is_dir():
+                self.watcher.watch(self.img_dir)
+
+            actions = self.handle({path.resolve() for path in changed})
+            if actions:
+                latency = time.perf_counter() - first_event
+                print(f"{GREEN}[{time.strftime('%H:%M:%S')}] {', '.join(actions)} "
+                      f"({latency * 1000:.0f} ms edit-to-refresh){NC}")
+
+    def close(self):
+        self.stop_preview()
+        self.renderer.close()
+
+
+def main():
+    parser = argparse.ArgumentParser(
+        description="Re-render a deck's diagrams, charts and preview whenever they change"
+    )
+    parser.add_argument("input", help="Deck markdown file")
+    parser.add_argument("--no-preview", action="store_true",
+                        help="Do not start the Marp preview")
+    args = parser.parse_args()
+
+    input_path = Path(args.input)
+    if not input_path.is_file():
+        print(f"{RED}Error: File not found: {input_path}{NC}")
+        sys.exit(1)
+
+    watcher = DeckWatcher(input_path, preview=not args.no_preview)
+    try:
+        watcher.run()
+    except KeyboardInterrupt:
+        print()
+    finally:
+        watcher.close()
+
+
+if __name__ == "__main__":
+    main()
@@ -9,20 +9,64 @@ Usage:
     python run_tests.py                    # Run all tests
     python run_tests.py mermaid_flowchart_01  # Run specific test
     python run_tests.py --validate CODE    # Validate inline code
+    python run_tests.py --jobs 4           # Run tests on 4 parallel workers
+    python run_tests.py --fast             # Syntax checks only, no mmdc or chart runs
+    python run_tests.py --profile          # Time each stage, write a Chrome trace
+    python run_tests.py --changed-only     # Only new, edited or failing fixtures
+
+Mermaid sources are first checked in-process (scripts/mermaid_syntax.py),
+which catches common mistakes in microseconds with line and column numbers;
+only sources that pass, or that use syntax the checker does not recognize,
+go on to mermaid-cli. Matplotlib code is compiled before it is run. --fast
+stops after these checks, for tight edit loops.
+
+Passing fixture results are cached in fixtures/.validation-cache.json,
+keyed by the code's hash, its DiagramType, the mermaid-cli (full runs only)
+and matplotlib versions and the source of the checkers, renderer and chart
+runner. A fixture whose key is unchanged
+reports its cached PASS without being validated again; --changed-only
+leaves such fixtures out of the run altogether, and --no-cache ignores the
+cache. Failures are never cached.
+
+--profile [FILE] times each stage (syntax checks, mermaid-cli startup and
+renders, chart server startup and runs, per test), prints a summary and
+writes a Chrome trace to FILE (default: trace.json); see scripts/tracing.py.
 """
 
 import argparse
+import functools
+import hashlib
 import json
 import os
 import re
-import subprocess
 import sys
 import tempfile
+import threading
+from concurrent.futures import ThreadPoolExecutor
 from dataclasses import dataclass
 from enum import Enum
 from pathlib import Path
 from typing import Optional
 
+sys.path.insert(0, str(Path(__file__).resolve().parents[2] / "scripts"))
+from chart_runner import matplotlib_version, shared_runner
+from mermaid_renderer import RendererUnavailable, cli_version, shared_renderer
+from mermaid_syntax import check as check_mermaid, classify as classify_mermaid
+import tracing
+from tracing import span
+
+
+# Result of the one-time mermaid-cli probe: None until probed, then the
+# version string, or "" if mermaid-cli is unavailable
+_mmdc_version = None
+_mmdc_lock = threading.Lock()
+
+CACHE_NAME = ".validation-cache.json"
+# Changes to these invalidate every cached result
+SCRIPTS_DIR = Path(__file__).resolve().parents[2] / "scripts"
+CHECKER_FILES = [Path(__file__).resolve(), SCRIPTS_DIR / "mermaid_syntax.py",
+                 SCRIPTS_DIR / "mermaid_renderer.py", SCRIPTS_DIR / "chart_runner.py"]
+
 
 class DiagramType(Enum):
     MERMAID_FLOWCHART = "mermaid_flowchart"
@@ -34,26 +78,105 @@ class DiagramType(Enum):
     MATPLOTLIB_PIE = "matplotlib_pie"
 
 
+MERMAID_TYPES = {
+    "flowchart": DiagramType.MERMAID_FLOWCHART,
+    "sequence": DiagramType.MERMAID_SEQUENCE,
+    "state": DiagramType.MERMAID_STATE,
+    "block": DiagramType.MERMAID_BLOCK,
+}
+
+
 @dataclass
 class TestResult:
     test_id: str
     passed: bool
     message: str
     details: Optional[str] = None
+    duration: Optional[float] = None  # seconds spent rendering, where measured
+    cached: bool = False              # reused from the validation cache
+
+
+@functools.lru_cache(maxsize=None)
+def toolchain_signature(fast_only: bool = False) -> str:
+    """
+    Versions of everything besides the code that decides a validation's outcome.
+
+    Fast runs never reach mermaid-cli, so their signature leaves its version
+    out rather than paying for the lookup.
+    """
+    digest = hashlib.sha256()
+    for path in CHECKER_FILES:
+        digest.update(path.read_bytes())
+    mmdc = "" if fast_only else f"mmdc {cli_version()}; "
+    return f"{mmdc}matplotlib {matplotlib_version()}; checkers {digest.hexdigest()[:16]}"
+
+
+def validation_mode(fast_only: bool) -> str:
+    return "fast" if fast_only else "full"
+
+
+def validation_key(code: str, diagram_type: DiagramType, fast_only: bool) -> str:
+    """Cache key for validating code as diagram_type."""
+    signature = (f"{diagram_type.value}\0{validation_mode(fast_only)}\0"
+                 f"{toolchain_signature(fast_only)}\0")
+    return hashlib.sha256(signature.encode() + code.encode('utf-8')).hexdigest()
+
+
+class ValidationCache:
+    """
+    Last passing validation of each fixture, per mode (fast or full).
+
+    Stored as {test_id: {mode: {key, message}}}. Thread-safe. Only PASS
+    results are stored; a failure removes the fixture's entry for that
+    mode so it is validated again next run.
+    """
+
+    def __init__(self, path: Path):
+        self.path = path
+        self._lock = threading.Lock()
+        self._dirty = False
+        try:
+            self.entries = json.loads(path.read_text())
+        except (OSError, ValueError):
+            self.entries = {}
+
+    def lookup(self, test_id: str, key: str, fast_only: bool = False) -> Optional[TestResult]:
+        entry = self.entries.get(test_id, {}).get(validation_mode(fast_only))
+        if entry is None or entry.get("key") != key:
+            return None
+        return TestResult(test_id=test_id, passed=True, message=entry["message"], cached=True)
+
+    def store(self, test_id: str, key: str, result: TestResult, fast_only: bool = False):
+        mode = validation_mode(fast_only)
+        with self._lock:
+            modes = self.entries.setdefault(test_id, {})
+            if result.passed:
+                modes[mode] = {"key": key, "message": result.message}
+            elif modes.pop(mode, None) is None:
+                return
+            self._dirty = True
+
+    def save(self, test_ids: list[str]):
+        """Write the cache, dropping fixtures not in test_ids (deleted ones)."""
+        stale = set(self.entries) - set(test_ids)
+        if not self._dirty and not stale:
+            return
+        for test_id in stale:
+            del self.entries[test_id]
+        tmp_path = self.path.with_name(f".{self.path.name}.tmp")
+        tmp_path.write_text(json.dumps(self.entries, indent=2, sort_keys=True))
+        os.replace(tmp_path, self.path)
 
 
 def detect_diagram_type(code: str) -> Optional[DiagramType]:
-    """Detect diagram type from code content."""
-    code_lower = code.lower()
-
-    if "flowchart" in code_lower or "graph " in code_lower:
-        return DiagramType.MERMAID_FLOWCHART
-    elif "sequencediagram" in code_lower:
-        return DiagramType.MERMAID_SEQUENCE
-    elif "statediagram" in code_lower:
-        return DiagramType.MERMAID_STATE
-    elif "block-beta" in code_lower:
-        return DiagramType.MERMAID_BLOCK
+    """Detect diagram type from code content.
+
+    Mermaid types come from the diagram's header line, so Python code that
+    merely mentions "graph " is not mistaken for a flowchart.
+    """
+    kind = classify_mermaid(code)
+    if kind is not None:
+        return MERMAID_TYPES[kind]
     elif "plt.plot" in code or "ax.plot" in code:
         return DiagramType.MATPLOTLIB_LINE
     elif "plt.bar" in code or "ax.bar" in code:
@@ -64,13 +187,59 @@ def detect_diagram_type(code: str) -> Optional[DiagramType]:
     return None
 
 
-def validate_mermaid_syntax(code: str, test_id: str) -> TestResult:
-    """Validate Mermaid diagram syntax using mmdc (mermaid-cli)."""
+def mmdc_version() -> Optional[str]:
+    """Return the mermaid-cli version, or None if it is not installed.
+
+    Probed once per run by starting the shared render worker; later calls
+    (from any thread) reuse the result.
+    """
+    global _mmdc_version
+    with _mmdc_lock:
+        if _mmdc_version is None:
+            try:
+                renderer = shared_renderer()
+                renderer.start()
+                _mmdc_version = renderer.version or "unknown"
+            except RendererUnavailable:
+                _mmdc_version = ""
+    return _mmdc_version or None
+
+
+def validate_mermaid_syntax(code: str, test_id: str, fast_only: bool = False) -> TestResult:
+    """Validate Mermaid diagram syntax.
+
+    Runs the in-process syntax check, then (unless fast_only) renders the
+    diagram on the warm mermaid-cli worker. Syntax the in-process check
+    does not recognize is left for mermaid-cli to judge.
+    """
+
+    with span("mermaid syntax check"):
+        _, issues = check_mermaid(code)
+    errors = [issue for issue in issues if not issue.unrecognized]
+    if errors:
+        return TestResult(
+            test_id=test_id,
+            passed=False,
+            message="mermaid syntax error",
+            details='\n'.join(str(issue) for issue in errors)
+        )
+
+    if fast_only:
+        if issues:
+            return TestResult(
+                test_id=test_id,
+                passed=True,
+                message="syntax not recognized by the fast check (not rendered)",
+                details='\n'.join(str(issue) for issue in issues)
+            )
+        return TestResult(
+            test_id=test_id,
+            passed=True,
+            message="syntax valid (fast check only, not rendered)"
+        )
 
     # Check if mmdc is available
-    try:
-        subprocess.run(["mmdc", "--version"], capture_output=True, check=True)
-    except (subprocess.CalledProcessError, FileNotFoundError):
+    if mmdc_version() is None:
         return TestResult(
             test_id=test_id,
             passed=False,
@@ -78,61 +247,65 @@ def validate_mermaid_syntax(code: str, test_id: str) -> TestResult:
             details="Install with: npm install -g @mermaid-js/mermaid-cli"
         )
 
-    # Write code to temp file and validate
-    with tempfile.NamedTemporaryFile(mode='w', suffix='.mmd', delete=False) as f:
-        f.write(code)
-        input_path = f.name
+    try:
+        result = shared_renderer().render(code)
+    except RendererUnavailable as e:
+        return TestResult(
+            test_id=test_id,
+            passed=False,
+            message="mermaid renderer unavailable",
+            details=str(e)
+        )
 
-    output_path = tempfile.mktemp(suffix='.svg')
+    if result.timed_out:
+        return TestResult(
+            test_id=test_id,
+            passed=False,
+            message="render timeout - diagram may be too complex"
+        )
 
-    try:
-        result = subprocess.run(
-            ["mmdc", "-i", input_path, "-o", output_path, "-q"],
-            capture_output=True,
-            text=True,
-            timeout=30
+    if result.error:
+        return TestResult(
+            test_id=test_id,
+            passed=False,
+            message="mermaid parse error",
+            details=result.error.strip()
         )
 
-        if result.returncode != 0:
-            # Parse error message for line numbers
-            error_msg = result.stderr or result.stdout
-            return TestResult(
-                test_id=test_id,
-                passed=False,
-                message="mermaid parse error",
-                details=error_msg.strip()
-            )
+    # Check the render produced content
+    if result.svg:
+        return TestResult(
+            test_id=test_id,
+            passed=True,
+            message="syntax valid, renders correctly"
+        )
+    return TestResult(
+        test_id=test_id,
+        passed=False,
+        message="render failed - no output produced"
+    )
 
-        # Check output file exists and has content
-        if os.path.exists(output_path) and os.path.getsize(output_path) > 0:
-            return TestResult(
-                test_id=test_id,
-                passed=True,
-                message="syntax valid, renders correctly"
-            )
-        else:
-            return TestResult(
-                test_id=test_id,
-                passed=False,
-                message="render failed - no output produced"
-            )
 
-    except subprocess.TimeoutExpired:
+def validate_matplotlib_syntax(code: str, test_id: str, fast_only: bool = False) -> TestResult:
+    """Validate Matplotlib code syntax and (unless fast_only) execution."""
+
+    try:
+        with span("matplotlib compile"):
+            compile(code, "<chart>", "exec")
+    except SyntaxError as e:
         return TestResult(
             test_id=test_id,
             passed=False,
-            message="render timeout - diagram may be too complex"
+            message="matplotlib syntax error",
+            details=f"line {e.lineno}, column {e.offset}: {e.msg}"
         )
-    finally:
-        # Cleanup temp files
-        if os.path.exists(input_path):
-            os.unlink(input_path)
-        if os.path.exists(output_path):
-            os.unlink(output_path)
 
-
-def validate_matplotlib_syntax(code: str, test_id: str) -> TestResult:
-    """Validate Matplotlib code syntax and execution."""
+    if fast_only:
+        return TestResult(
+            test_id=test_id,
+            passed=True,
+            message="syntax valid (fast check only, not run)"
+        )
 
     # Create a temp directory for output
     with tempfile.TemporaryDirectory() as tmpdir:
@@ -150,62 +323,61 @@ def validate_matplotlib_syntax(code: str, test_id: str) -> TestResult:
         if "savefig" not in code:
             modified_code += f"\nplt.savefig('{output_path}', format='svg')\nplt.close()"
 
-        # Write to temp file and execute
+        # Write to temp file and execute in a child of the warm chart server
         script_path = os.path.join(tmpdir, "test_chart.py")
         with open(script_path, 'w') as f:
             f.write(modified_code)
 
-        try:
-            result = subprocess.run(
-                [sys.executable, script_path],
-                capture_output=True,
-                text=True,
-                timeout=30,
-                cwd=tmpdir
+        run = shared_runner().run(script_path, tmpdir)
+
+        if run.timed_out:
+            return TestResult(
+                test_id=test_id,
+                passed=False,
+                message="execution timeout",
+                duration=run.elapsed
             )
 
-            if result.returncode != 0:
-                # Parse Python error
-                error_lines = result.stderr.strip().split('\n')
-                # Find the most relevant error line
-                for line in reversed(error_lines):
-                    if 'Error' in line or 'error' in line:
-                        return TestResult(
-                            test_id=test_id,
-                            passed=False,
-                            message=f"matplotlib syntax error",
-                            details='\n'.join(error_lines[-5:])
-                        )
-                return TestResult(
-                    test_id=test_id,
-                    passed=False,
-                    message="matplotlib execution error",
-                    details=result.stderr.strip()
-                )
-
-            # Check SVG was created
-            if os.path.exists(output_path) and os.path.getsize(output_path) > 0:
-                return TestResult(
-                    test_id=test_id,
-                    passed=True,
-                    message="syntax valid, SVG generated"
-                )
-            else:
-                return TestResult(
-                    test_id=test_id,
-                    passed=False,
-                    message="execution succeeded but no SVG output"
-                )
-
-        except subprocess.TimeoutExpired:
+        if not run.ok:
+            # Parse Python error
+            error_lines = (run.error or "").strip().split('\n')
+            # Find the most relevant error line
+            for line in reversed(error_lines):
+                if 'Error' in line or 'error' in line:
+                    return TestResult(
+                        test_id=test_id,
+                        passed=False,
+                        message=f"matplotlib syntax error",
+                        details='\n'.join(error_lines[-5:]),
+                        duration=run.elapsed
+                    )
             return TestResult(
                 test_id=test_id,
                 passed=False,
-                message="execution timeout"
+                message="matplotlib execution error",
+                details=(run.error or "").strip(),
+                duration=run.elapsed
             )
 
+        # Check SVG was created
+        if os.path.exists(output_path) and os.path.getsize(output_path) > 0:
+            return TestResult(
+                test_id=test_id,
+                passed=True,
+                message="syntax valid, SVG generated",
+                duration=run.elapsed
+            )
+        else:
+            return TestResult(
+                test_id=test_id,
+                passed=False,
+                message="execution succeeded but no SVG output",
+                duration=run.elapsed
+            )
 
-def validate_diagram(code: str, test_id: str, diagram_type: Optional[DiagramType] = None) -> TestResult:
+
+def validate_diagram(code: str, test_id: str, diagram_type: Optional[DiagramType] = None,
+                     fast_only: bool = False) -> TestResult:
     """Validate diagram code based on detected or specified type."""
 
     if diagram_type is None:
@@ -220,9 +392,9 @@ def validate_diagram(code: str, test_id: str, diagram_type: Optional[DiagramType
         )
 
     if diagram_type.value.startswith("mermaid"):
-        return validate_mermaid_syntax(code, test_id)
+        return validate_mermaid_syntax(code, test_id, fast_only)
     else:
-        return validate_matplotlib_syntax(code, test_id)
+        return validate_matplotlib_syntax(code, test_id, fast_only)
 
 
 def load_test_fixture(fixtures_dir: Path, test_id: str) -> tuple[str, Optional[str]]:
@@ -264,8 +436,36 @@ def extract_code_from_response(response: str) -> Optional[str]:
     return None
 
 
-def run_test(fixtures_dir: Path, test_id: str, generated_code: Optional[str] = None) -> TestResult:
-    """Run a single test case."""
+def fixture_key(fixtures_dir: Path, test_id: str, fast_only: bool = False) -> Optional[str]:
+    """Validation cache key of a fixture's expected output, or None if it has none."""
+    try:
+        _, expected = load_test_fixture(fixtures_dir, test_id)
+    except FileNotFoundError:
+        return None
+    diagram_type = detect_diagram_type(expected) if expected else None
+    return validation_key(expected, diagram_type, fast_only) if diagram_type else None
+
+
+def changed_tests(fixtures_dir: Path, test_ids: list[str], cache: ValidationCache,
+                  fast_only: bool = False) -> list[str]:
+    """The test_ids without a cached PASS for their current code and toolchain."""
+    changed = []
+    for test_id in test_ids:
+        key = fixture_key(fixtures_dir, test_id, fast_only)
+        if key is None or cache.lookup(test_id, key, fast_only) is None:
+            changed.append(test_id)
+    return changed
+
+
+def run_test(fixtures_dir: Path, test_id: str, generated_code: Optional[str] = None,
+             fast_only: bool = False, cache: Optional[ValidationCache] = None) -> TestResult:
+    """Run a single test case, reusing a cached PASS for unchanged golden files."""
+    with span("test", test_id=test_id):
+        return _run_test(fixtures_dir, test_id, generated_code, fast_only, cache)
+
+
+def _run_test(fixtures_dir: Path, test_id: str, generated_code: Optional[str],
+              fast_only: bool, cache: Optional[ValidationCache]) -> TestResult:
     try:
         input_content, expected = load_test_fixture(fixtures_dir, test_id)
     except FileNotFoundError as e:
@@ -274,11 +474,19 @@ def run_test(fixtures_dir: Path, test_id: str, generated_code: Optional[str] = N
     # If generated code provided, validate it
     if generated_code:
         code = extract_code_from_response(generated_code) or generated_code
-        return validate_diagram(code, test_id)
+        return validate_diagram(code, test_id, fast_only=fast_only)
 
     # If expected output exists, validate it (for testing the golden files)
     if expected:
-        return validate_diagram(expected, test_id)
+        diagram_type = detect_diagram_type(expected)
+        if cache is None or diagram_type is None:
+            return validate_diagram(expected, test_id, diagram_type, fast_only)
+        key = validation_key(expected, diagram_type, fast_only)
+        result = cache.lookup(test_id, key, fast_only)
+        if result is None:
+            result = validate_diagram(expected, test_id, diagram_type, fast_only)
+            cache.store(test_id, key, result, fast_only)
+        return result
 
     return TestResult(
         test_id=test_id,
@@ -288,6 +496,24 @@ def run_test(fixtures_dir: Path, test_id: str, generated_code: Optional[str] = N
     )
 
 
+def run_tests(fixtures_dir: Path, test_ids: list[str], jobs: int = 1,
+              fast_only: bool = False, cache: Optional[ValidationCache] = None) -> list[TestResult]:
+    """Run test cases on up to `jobs` workers, returning results in test_ids order.
+
+    Mermaid cases share one render worker and Matplotlib cases run in forked
+    children of one chart server, so threads are enough to run them in
+    parallel.
+    """
+    if jobs <= 1 or len(test_ids) <= 1:
+        return [run_test(fixtures_dir, test_id, fast_only=fast_only, cache=cache)
+                for test_id in test_ids]
+
+    with ThreadPoolExecutor(max_workers=jobs) as pool:
+        return list(pool.map(
+            lambda test_id: run_test(fixtures_dir, test_id, fast_only=fast_only, cache=cache),
+            test_ids))
+
+
 def list_tests(fixtures_dir: Path) -> list[str]:
     """List all available test IDs."""
     tests = set()
@@ -301,6 +527,10 @@ def format_result(result: TestResult) -> str:
     """Format test result for output."""
     status = "PASS" if result.passed else "FAIL"
     output = f"{status}: {result.test_id} - {result.message}"
+    if result.cached:
+        output += " (cached)"
+    elif result.duration is not None:
+        output += f" ({result.duration * 1000:.0f} ms)"
     if result.details:
         # Indent details
         details = '\n  '.join(result.details.split('\n'))
@@ -315,7 +545,22 @@ def main():
     parser.add_argument("--list", action="store_true", help="List available tests")
     parser.add_argument("--fixtures", default=None, help="Path to fixtures directory")
     parser.add_argument("--json", action="store_true", help="Output results as JSON")
+    parser.add_argument("-j", "--jobs", type=int, default=1,
+                        help="Number of tests to run in parallel (default: 1)")
+    parser.add_argument("--fast", action="store_true",
+                        help="Only run the in-process syntax checks (no mmdc, charts not executed)")
+    parser.add_argument("--profile", nargs="?", const=tracing.DEFAULT_TRACE_FILE, default=None,
+                        metavar="FILE",
+                        help=f"Time each stage and write a Chrome trace (default: {tracing.DEFAULT_TRACE_FILE})")
+    parser.add_argument("--changed-only", action="store_true",
+                        help="Only validate fixtures without a cached PASS (new, edited or failing)")
+    parser.add_argument("--no-cache", action="store_true",
+                        help="Validate every fixture, ignoring cached results")
     args = parser.parse_args()
+    if args.changed_only and args.no_cache:
+        parser.error("--changed-only needs the cache; drop --no-cache")
+    if args.profile:
+        tracing.enable()
 
     # Determine fixtures directory
     if args.fixtures:
@@ -326,8 +571,9 @@ def main():
     # Handle --validate for inline code
     if args.validate:
         test_id = args.test_id or "inline"
-        result = validate_diagram(args.validate, test_id)
+        result = validate_diagram(args.validate, test_id, fast_only=args.fast)
         print(format_result(result))
+        tracing.report(args.profile)
         sys.exit(0 if result.passed else 1)
 
     # Handle --list
@@ -351,10 +597,16 @@ def main():
         print("No tests found. Create fixtures in", fixtures_dir)
         sys.exit(1)
 
-    results = []
-    for test_id in test_ids:
-        result = run_test(fixtures_dir, test_id)
-        results.append(result)
+    cache = None if args.no_cache else ValidationCache(fixtures_dir / CACHE_NAME)
+    skipped = 0
+    if args.changed_only:
+        changed = changed_tests(fixtures_dir, test_ids, cache, args.fast)
+        skipped = len(test_ids) - len(changed)
+        test_ids = changed
+
+    results = run_tests(fixtures_dir, test_ids, args.jobs, args.fast, cache)
+    if cache is not None:
+        cache.save(list_tests(fixtures_dir))
 
     # Output results
     if args.json:
@@ -363,7 +615,9 @@ def main():
                 "test_id": r.test_id,
                 "passed": r.passed,
                 "message": r.message,
-                "details": r.details
+                "details": r.details,
+                "duration_ms": round(r.duration * 1000, 1) if r.duration is not None else None,
+                "cached": r.cached
             }
             for r in results
         ]
@@ -375,7 +629,13 @@ def main():
     # Summary
     passed = sum(1 for r in results if r.passed)
     total = len(results)
-    print(f"\n{passed}/{total} tests passed")
+    cached = sum(1 for r in results if r.cached)
+    notes = [f"{cached} cached"] if cached else []
+    if skipped:
+        notes.append(f"{skipped} unchanged skipped")
+    print(f"\n{passed}/{total} tests passed" + (f" ({', '.join(notes)})" if notes else ""))
+    # Keep --json output parseable
+    tracing.report(args.profile, out=sys.stderr if args.json else None)
 
     sys.exit(0 if passed == total else 1)
 
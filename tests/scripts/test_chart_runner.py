@@ -0,0 +1,62 @@
+"""Tests for chart_runner.py."""
+
+import os
+
+import pytest
+
+pytest.importorskip("matplotlib")
+
+from chart_runner import ChartRunner
+
+
+SCRIPT = """
+import matplotlib
+import matplotlib.pyplot as plt
+
+with open("backend.txt", "w") as f:
+    f.write(matplotlib.get_backend().lower())
+fig, ax = plt.subplots()
+ax.plot([1, 2, 3])
+fig.savefig("chart.svg")
+"""
+
+
+@pytest.fixture(scope="module")
+def runner():
+    return ChartRunner()
+
+
+def run_chart(runner, tmp_path, **kwargs):
+    script = tmp_path / "chart.py"
+    script.write_text(SCRIPT)
+    result = runner.run(str(script), str(tmp_path), **kwargs)
+    assert result.ok, result.error
+    return (tmp_path / "backend.txt").read_text()
+
+
+def test_charts_use_agg_without_touching_the_callers_environment(runner, tmp_path, monkeypatch):
+    monkeypatch.delenv("MPLBACKEND", raising=False)
+    assert run_chart(runner, tmp_path, atomic=True) == "agg"
+    assert "MPLBACKEND" not in os.environ
+    assert (tmp_path / "chart.svg").stat().st_size > 0
+    assert not list(tmp_path.glob(".*.tmp*"))
+
+
+def test_mplbackend_in_run_env_wins(runner, tmp_path):
+    assert run_chart(runner, tmp_path, env={"MPLBACKEND": "svg"}) == "svg"
+
+
+def test_failures_report_the_script_traceback(runner, tmp_path):
+    script = tmp_path / "broken.py"
+    script.write_text("x = 1\nraise ValueError('bad data')\n")
+    result = runner.run(str(script), str(tmp_path))
+    assert not result.ok and not result.timed_out
+    assert "ValueError: bad data" in result.error
+    assert str(script) in result.error and "chart_runner" not in result.error
+
+
+def test_timeout_kills_the_chart(tmp_path):
+    script = tmp_path / "slow.py"
+    script.write_text("import time\ntime.sleep(30)\n")
+    result = ChartRunner(timeout=0.5).run(str(script), str(tmp_path))
+    assert result.timed_out and not result.ok
@@ -0,0 +1,94 @@
+"""Tests for deck_parser.py."""
+
+from pathlib import Path
+
+from deck_parser import parse_deck, parse_frontmatter
+
+
+def titles(text: str) -> list:
+    return [slide.title for slide in parse_deck(text).slides]
+
+
+def test_frontmatter():
+    text = "---\nmarp: true\ntheme: 'plato'\npaginate: true\nstyle: |\n  h1 { x: y }\n---\n\n# One\n"
+    deck = parse_deck(text)
+    assert deck.frontmatter == {"marp": "true", "theme": "plato", "paginate": "true", "style": "|"}
+    assert deck.frontmatter_text == "---\nmarp: true\ntheme: 'plato'\npaginate: true\nstyle: |\n  h1 { x: y }\n---"
+    assert parse_frontmatter(text) == deck.frontmatter
+    assert [slide.title for slide in deck.slides] == ["One"]
+    assert deck.slides[0].start == 7
+
+
+def test_deck_without_frontmatter():
+    deck = parse_deck("# One\n\n---\n\n# Two\n")
+    assert deck.frontmatter == {} and deck.frontmatter_text == ""
+    assert [slide.title for slide in deck.slides] == ["One", "Two"]
+    # An unterminated frontmatter block is ordinary slide text
+    assert parse_frontmatter("---\ntheme: plato\n# One\n") == {}
+
+
+def test_separators_inside_fences_do_not_split():
+    text = ("# One\n\n```yaml\n---\nkey: value\n---\n```\n\n---\n\n# Two\n\n"
+            "~~~~\n---\n# not a title\n~~~\n---\n~~~~\n\n---\n\n# Three\n")
+    deck = parse_deck(text)
+    assert [slide.title for slide in deck.slides] == ["One", "Two", "Three"]
+    yaml_block, tilde_block = deck.slides[0].code_blocks[0], deck.slides[1].code_blocks[0]
+    assert (yaml_block.language, yaml_block.source) == ("yaml", "---\nkey: value\n---\n")
+    # A shorter fence does not close a longer one
+    assert tilde_block.source == "---\n# not a title\n~~~\n---\n"
+
+
+def test_setext_underlines():
+    # `---` right after paragraph text underlines it instead of splitting
+    deck = parse_deck("Big Title\n---\nbody\n\n---\n\nOther\n===\n")
+    assert [slide.title for slide in deck.slides] == ["Big Title", "Other"]
+    # After a blank line, a list or a heading it is a separator again
+    assert titles("# A\n---\n# B\n") == ["A", "B"]
+    assert titles("- item\n---\n# B\n") == [None, "B"]
+
+
+def test_comments_directives_and_notes():
+    text = ("<!-- _class: lead -->\n<!--\npaginate: false\n---\n-->\n# One\n"
+            "<!-- Speaker note: say hello -->\n<style>h1 { color: red; }</style>\n"
+            "<style scoped>p { margin: 0; }</style>\n\n---\n\n# Two\n")
+    deck = parse_deck(text)
+    assert len(deck.slides) == 2          # `---` inside a comment does not split
+    one = deck.slides[0]
+    assert one.directives == {"_class": "lead"}
+    assert one.notes == ["paginate: false\n---", "Speaker note: say hello"]
+    assert one.styles == ["<style>h1 { color: red; }</style>"]
+
+
+def test_code_blocks_and_images(tmp_path):
+    text = ("---\nbackgroundImage: url('img/bg.png')\n---\n\n"
+            "```mermaid bg right:40%\ngraph TD\n```\n\n"
+            "![w:300](img/a%20b.png \"A\")\n<img src=\"https://example.com/x.png\">\n\n---\n\n"
+            "```python\nprint(1)\n")
+    deck = parse_deck(text)
+    mermaid = deck.code_blocks["mermaid"][0]
+    assert (mermaid.info, mermaid.source, mermaid.start, mermaid.end) == ("bg right:40%", "graph TD\n", 4, 6)
+    unclosed = deck.code_blocks["python"][0]
+    assert unclosed.end is None and unclosed.source == "print(1)\n\n" and unclosed.slide == 1
+
+    assert [(image.ref, image.slide, image.remote) for image in deck.images] == [
+        ("img/bg.png", None, False), ("img/a%20b.png", 0, False),
+        ("https://example.com/x.png", 0, True)]
+    assert deck.local_files(tmp_path) == [(tmp_path / "img/bg.png").resolve(),
+                                          (tmp_path / "img/a b.png").resolve()]
+
+
+def test_slide_hashes_follow_their_own_text():
+    before = parse_deck("# One\n\n---\n\n# Two\n")
+    after = parse_deck("# One\n\n---\n\n# Two, edited\n")
+    assert before.slides[0].hash == after.slides[0].hash
+    assert before.slides[1].hash != after.slides[1].hash
+
+
+def test_example_deck_parses():
+    example = Path(__file__).resolve().parents[2] / "examples" / "deck-forge-overview.md"
+    text = example.read_text()
+    deck = parse_deck(text)
+    assert len(deck.slides) > 1 and deck.slides[0].title
+    # Slides plus their separators give back the deck
+    body = '\n---\n'.join(slide.body for slide in deck.slides)
+    assert deck.frontmatter_text + '\n' + body == text
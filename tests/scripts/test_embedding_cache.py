@@ -0,0 +1,72 @@
+"""Tests for embedding_cache.py."""
+
+import pytest
+
+np = pytest.importorskip("numpy")
+
+from embedding_cache import EmbeddingCache
+
+
+MODEL = "test-model"
+
+
+def vectors(*values: float):
+    return np.array([[value] * 4 for value in values], dtype='float32')
+
+
+def test_round_trip_through_disk(tmp_path):
+    cache = EmbeddingCache(str(tmp_path), MODEL, max_entries=4)
+    cache.store(["a", "b"], vectors(1, 2))
+    cache.save()
+
+    reloaded = EmbeddingCache(str(tmp_path), MODEL, max_entries=4)
+    found, misses = reloaded.lookup(["b", "c", "a"])
+    assert misses == [1]
+    assert found[0].tolist() == [2] * 4 and found[2].tolist() == [1] * 4
+    # Keys depend on the model
+    assert EmbeddingCache(str(tmp_path), "other-model", 4).lookup(["a"])[1] == [0]
+
+
+def test_evicts_least_recently_used(tmp_path):
+    cache = EmbeddingCache(str(tmp_path), MODEL, max_entries=3)
+    cache.store(["a", "b", "c"], vectors(1, 2, 3))
+    cache.lookup(["a"])            # b is now the least recently used
+    cache.store(["d"], vectors(4))
+    found, misses = cache.lookup(["a", "b", "c", "d"])
+    assert misses == [1]
+    assert [found[i][0] for i in (0, 2, 3)] == [1, 3, 4]
+    assert cache.evictions == 1
+
+
+def test_batch_keys_are_not_evicted_for_each_other(tmp_path):
+    cache = EmbeddingCache(str(tmp_path), MODEL, max_entries=2)
+    cache.store(["a", "b", "c"], vectors(1, 2, 3))
+    found, misses = cache.lookup(["a", "b", "c"])
+    assert misses == [2]       # No room left for c
+    assert len(cache.entries) == 2
+
+
+def test_crash_after_eviction_leaves_no_stale_mapping(tmp_path):
+    cache = EmbeddingCache(str(tmp_path), MODEL, max_entries=2)
+    cache.store(["a", "b"], vectors(1, 2))
+    cache.save()
+    # a is evicted and its row overwritten with c; the run dies before save()
+    cache.store(["c"], vectors(3))
+    cache.vectors.flush()
+    del cache
+
+    reloaded = EmbeddingCache(str(tmp_path), MODEL, max_entries=2)
+    found, misses = reloaded.lookup(["a", "b", "c"])
+    assert 0 in misses         # a no longer maps to the row now holding c
+    assert found[1].tolist() == [2] * 4
+
+
+def test_dimension_change_discards_old_index(tmp_path):
+    cache = EmbeddingCache(str(tmp_path), MODEL, max_entries=2)
+    cache.store(["a"], vectors(1))
+    cache.save()
+    cache.store(["b"], np.ones((1, 8), dtype='float32'))
+    del cache   # crash before save
+
+    reloaded = EmbeddingCache(str(tmp_path), MODEL, max_entries=2)
+    assert reloaded.lookup(["a"])[1] == [0]
@@ -0,0 +1,151 @@
+"""Tests for index_sessions.py."""
+
+import random
+
+import pytest
+
+from index_sessions import (FLAT_MAX_CHUNKS, INDEX_STORAGE, KEEP_EXACT_VECTORS,
+                            MODEL_MAX_SEQ_LENGTH, WINDOW_TOKENS, choose_index_params,
+                            chunk_hash, chunk_markdown, count_truncated, needs_retier,
+                            storage_settings)
+
+
+DIM = 384
+
+
+def manifest_for(num_chunks: int, storage: str, exact_vectors: bool) -> dict:
+    return {"index": choose_index_params(num_chunks, DIM, storage, exact_vectors),
+            "storage": {"storage": storage, "exact_vectors": exact_vectors}}
+
+
+def test_storage_settings_default_without_a_manifest():
+    assert storage_settings({}) == (INDEX_STORAGE, KEEP_EXACT_VECTORS)
+    assert storage_settings({}, "float16", False) == ("float16", False)
+
+
+def test_plain_run_keeps_previous_storage():
+    # A run without --storage after --storage int8 used to re-tier back to float32
+    manifest = manifest_for(1000, "int8", False)
+    storage, exact_vectors = storage_settings(manifest)
+    assert (storage, exact_vectors) == ("int8", False)
+    target = choose_index_params(1000, DIM, storage, exact_vectors)
+    assert not needs_retier(manifest["index"], target)
+
+
+def test_explicit_flags_override_manifest():
+    manifest = manifest_for(1000, "int8", True)
+    assert storage_settings(manifest, storage="float16") == ("float16", True)
+    assert storage_settings(manifest, exact_vectors=False) == ("int8", False)
+    target = choose_index_params(1000, DIM, *storage_settings(manifest, storage="float16"))
+    assert needs_retier(manifest["index"], target)
+
+
+def test_storage_survives_ivf_tier():
+    # IVF params record the tier's own storage, not the flat-tier choice
+    manifest = manifest_for(FLAT_MAX_CHUNKS, "float16", True)
+    assert manifest["index"]["storage"] == "int8"
+    assert storage_settings(manifest) == ("float16", True)
+
+
+@pytest.mark.parametrize("params, expected", [
+    (choose_index_params(10, DIM, "int8", True), ("int8", True)),
+    (choose_index_params(10, DIM, "float16", False), ("float16", False)),
+    (choose_index_params(10, DIM, "float32", False), ("float32", KEEP_EXACT_VECTORS)),
+    (choose_index_params(FLAT_MAX_CHUNKS, DIM, "float32", False), (INDEX_STORAGE, False)),
+])
+def test_storage_settings_from_older_manifests(params, expected):
+    assert storage_settings({"index": params}) == expected
+
+
+def test_tier_change_still_retiers():
+    manifest = manifest_for(1000, "int8", True)
+    target = choose_index_params(FLAT_MAX_CHUNKS, DIM, *storage_settings(manifest))
+    assert needs_retier(manifest["index"], target)
+
+
+def words(count: int, prefix: str = "w") -> str:
+    return ' '.join(f"{prefix}{i}" for i in range(count))
+
+
+def test_chunk_markdown_splits_sections():
+    content = "intro text\n\n## First\nalpha beta\n\n## Second\ngamma\n## Empty\n"
+    chunks = chunk_markdown(content, "log.md")
+    assert [(c["section"], c["section_index"], c["text"]) for c in chunks] == [
+        ("intro", 0, "intro text"), ("First", 1, "alpha beta"), ("Second", 2, "gamma")]
+    assert all(c["file"] == "log.md" and c["window"] == 0 for c in chunks)
+
+
+def test_chunk_markdown_overlapping_windows_cover_every_word():
+    content = "## Long\n" + words(25)
+    chunks = chunk_markdown(content, "log.md", window_tokens=10, overlap_tokens=3)
+    texts = [c["text"].split() for c in chunks]
+    assert [c["window"] for c in chunks] == [0, 1, 2, 3]
+    assert texts[0] == [f"w{i}" for i in range(10)]
+    assert texts[1][:3] == texts[0][-3:]            # overlap
+    assert texts[-1][-1] == "w24"
+    assert {w for text in texts for w in text} == set(words(25).split())
+
+
+def test_chunk_markdown_keeps_original_whitespace_and_preview():
+    content = "## Code\n```\nx  =  1\n```\n" + "y " * 150
+    chunk = chunk_markdown(content, "log.md")[0]
+    assert chunk["text"].startswith("```\nx  =  1\n```")
+    assert '\n' not in chunk["preview"] and len(chunk["preview"]) == 200
+
+
+def test_default_window_leaves_room_for_code():
+    assert WINDOW_TOKENS * 2 <= MODEL_MAX_SEQ_LENGTH
+    assert len(chunk_markdown(words(WINDOW_TOKENS), "log.md")) == 1
+
+
+def test_chunk_hash_covers_position_and_text():
+    chunk = chunk_markdown("## A\none two", "log.md")[0]
+    same = dict(chunk, file="other.md", preview="")
+    assert chunk_hash(chunk) == chunk_hash(same)
+    for change in ({"text": "one three"}, {"section": "B"}, {"window": 1}, {"section_index": 2}):
+        assert chunk_hash(chunk) != chunk_hash(dict(chunk, **change))
+
+
+class FakeModel:
+    """Tokenizes like a word-piece model: one piece per character, plus [CLS] and [SEP]."""
+    max_seq_length = 8
+
+    def tokenizer(self, texts, **kwargs):
+        return {"input_ids": [[0] * (len(text) + 2) for text in texts]}
+
+
+def test_count_truncated():
+    assert count_truncated(FakeModel(), ["abcdef", "abcdefg", ""]) == 1
+
+
+def test_count_truncated_without_a_tokenizer():
+    class NoTokenizer:
+        def encode(self, texts, **kwargs):
+            return []
+
+    assert count_truncated(NoTokenizer(), ["a " * 1000]) == 0
+
+
+def test_edited_chunk_is_reindexed(tmp_path):
+    # A one-word edit keeps the chunk above the dedup threshold against its own
+    # pre-edit text; it must still be embedded and searchable, not collapsed
+    pytest.importorskip("faiss")
+    import index_sessions
+    from benchmark import in_directory, offline_model
+    from search_sessions import SessionSearcher
+
+    rng = random.Random(0)
+    body = [f"word{rng.randrange(5000)}" for _ in range(100)]
+    log = tmp_path / index_sessions.SESSION_LOGS_DIR / "2026-01" / "20260117_1856_e7d432a7.md"
+    log.parent.mkdir(parents=True)
+    log.write_text("## User\n\n" + " ".join(body) + "\n")
+    with in_directory(tmp_path), offline_model():
+        index_sessions.build_index(workers=1)
+        body[50] = "zebracorn"
+        log.write_text("## User\n\n" + " ".join(body) + "\n")
+        index_sessions.build_index(workers=1)
+
+        searcher = SessionSearcher()
+        hits = searcher.search("zebracorn", mode="lexical")
+        searcher.store.close()
+    assert [hit["file"] for hit in hits] == [str(log.relative_to(tmp_path))]
@@ -0,0 +1,119 @@
+"""Tests for lint_deck.py."""
+
+import pytest
+
+from deck_parser import parse_deck
+from lint_deck import lint, lint_deck_level, lint_slide, slide_classes
+
+
+FRONTMATTER = "---\nmarp: true\ntheme: default\npaginate: true\n---\n\n"
+TITLE = "# Revenue grew 40% after the launch"
+
+
+def rules(body: str, classes: set = frozenset()) -> list[str]:
+    deck = parse_deck(body)
+    return [finding.rule for finding in lint_slide(deck.slides[0], deck.lines, set(classes))]
+
+
+def test_clean_slide():
+    assert rules(f"{TITLE}\n\n- New customers doubled\n- Churn fell\n") == []
+
+
+@pytest.mark.parametrize("title", ["# Results", "# Key Findings:", "# Too short", "# Why this matters:"])
+def test_label_titles(title):
+    assert rules(f"{title}\n\nBody\n") == ["title-label"]
+
+
+def test_missing_title_unless_exempt():
+    assert rules("Just text\n") == ["title-missing"]
+    assert rules("Just text\n", {"lead"}) == []
+    assert rules("# Deck Forge\n", {"title"}) == []
+
+
+def test_setext_title_counts():
+    assert rules("Revenue grew 40% after the launch\n===\n\nBody\n") == []
+
+
+def test_one_idea():
+    assert rules(f"{TITLE}\n\nPricing works and also hiring is slow\n") == ["one-idea"]
+    assert rules(f"{TITLE}\n\n# Second claim about hiring speed\n") == ["one-idea"]
+
+
+def test_bullets_and_text_density():
+    bullets = '\n'.join(f"- point {i}" for i in range(7))
+    assert rules(f"{TITLE}\n\n{bullets}\n") == ["bullets"]
+    assert rules(f"{TITLE}\n\n{bullets[:-10]}\n") == []
+    long_line = "word " * 100  # wraps to 7 lines
+    assert rules(f"{TITLE}\n\n{long_line}\nmore\ntext\n") == ["text-density"]
+
+
+def table(rows: int) -> str:
+    return "| A | B |\n|---|---|\n" + ''.join(f"| {i} | x |\n" for i in range(rows))
+
+
+def test_table_rows():
+    assert rules(f"{TITLE}\n\n{table(8)}\n<!-- notes -->\n") == []
+    assert rules(f"{TITLE}\n\n{table(10)}\n<!-- notes -->\n") == ["table-rows"]
+    assert rules(f"{TITLE}\n\n{table(10)}\n<!-- notes -->\n", {"small"}) == []
+    scoped = "<style scoped>table { font-size: 0.7em; }</style>\n"
+    assert rules(f"{TITLE}\n\n{scoped}{table(10)}\n<!-- notes -->\n") == []
+    deck = parse_deck(f"{TITLE}\n\n{table(13)}\n<!-- notes -->\n")
+    [finding] = lint_slide(deck.slides[0], deck.lines, set())
+    assert (finding.rule, finding.severity) == ("table-rows", "error")
+
+
+def test_table_with_text():
+    text = "one\ntwo\nthree\nfour\n"
+    assert rules(f"{TITLE}\n\n{table(3)}\n{text}<!-- notes -->\n") == ["table-with-text"]
+
+
+def test_code_blocks():
+    code = '\n'.join(f"line {i}" for i in range(13))
+    assert rules(f"{TITLE}\n\n```python\n{code}\n```\n<!-- notes -->\n") == ["code-length"]
+    # Mermaid diagrams may be long; separators inside code are not text
+    assert rules(f"{TITLE}\n\n```mermaid\n{code}\n```\n<!-- notes -->\n") == []
+    assert rules(f"{TITLE}\n\n```python\nx = 1\n") == ["unclosed-fence", "speaker-notes"]
+
+
+def test_images_and_speaker_notes():
+    assert rules(f"{TITLE}\n\n![chart](img/chart.svg)\n") == ["image-size", "speaker-notes"]
+    assert rules(f"{TITLE}\n\n![w:900](img/chart.svg)\n<!-- Walk through Q3 -->\n") == []
+    assert rules(f"{TITLE}\n\n![bg right:40%](img/photo.png)\n") == []
+
+
+def test_findings_point_at_their_line():
+    deck = parse_deck(f"{FRONTMATTER}{TITLE}\n\n---\n\n# Results\n\n![x](a.svg)\n")
+    findings = lint_slide(deck.slides[1], deck.lines, set())
+    assert [(f.rule, deck.lines[f.line]) for f in findings] == [
+        ("image-size", "![x](a.svg)"), ("title-label", "# Results"), ("speaker-notes", "")]
+
+
+def test_classes_are_inherited():
+    deck = parse_deck("<!-- class: lead -->\n# A\n\n---\n\n# B\n\n---\n\n<!-- _class: dense x -->\n# C\n")
+    assert slide_classes(deck) == [{"lead"}, {"lead"}, {"dense", "x"}]
+
+
+def test_deck_level_checks(tmp_path):
+    (tmp_path / "img").mkdir()
+    (tmp_path / "img" / "there.svg").write_text("<svg/>")
+    deck = parse_deck("---\ntheme: nonexistent-theme\n---\n\n# A\n\n"
+                      "![w:10](img/there.svg) ![w:10](img/gone.svg) ![w:10](https://x.org/y.png)\n")
+    found = [(f.rule, f.severity) for f in lint_deck_level(deck, tmp_path)]
+    assert found == [("frontmatter", "error"), ("frontmatter", "warning"),
+                     ("theme-unknown", "error"), ("image-missing", "error")]
+
+
+def test_cache_reuses_unchanged_slides(tmp_path):
+    path = tmp_path / "deck.md"
+    path.write_text(f"{FRONTMATTER}{TITLE}\n\n---\n\n# Results\n")
+    _, first, cached = lint(path)
+    assert cached == 0
+    _, second, cached = lint(path)
+    assert cached == 2 and second == first
+
+    # Inserting a slide moves the later one; its cached findings move with it
+    path.write_text(f"{FRONTMATTER}{TITLE}\n\n---\n\n# New\n\n---\n\n# Results\n")
+    deck, third, cached = lint(path)
+    assert cached == 2
+    [results] = [f for f in third if f.slide == 2]
+    assert deck.lines[results.line] == "# Results"
@@ -0,0 +1,85 @@
+"""Tests for mermaid_syntax.py."""
+
+import pytest
+
+from mermaid_syntax import SyntaxIssue, check, classify
+
+
+def issues(source: str) -> list[tuple[int, int, bool]]:
+    return [(issue.line, issue.column, issue.unrecognized) for issue in check(source)[1]]
+
+
+@pytest.mark.parametrize("source, kind", [
+    ("flowchart LR\n  A[Start] --> B{Ok?}\n  B -->|yes| C([Done])\n  B -- no --> A\n", "flowchart"),
+    ("graph TD\n  subgraph s [Group]\n    A & B --> C\n  end\n  C:::hot --- D((D))\n", "flowchart"),
+    ("sequenceDiagram\n  participant A as Alice\n  A->>+B: hi\n  loop every s\n"
+     "    B-->>A: ok\n  end\n  B-->>-A: bye\n", "sequence"),
+    ("stateDiagram-v2\n  [*] --> Idle\n  state Busy {\n    [*] --> Work\n  }\n"
+     "  Idle --> Busy: start\n", "state"),
+    ("stateDiagram-v2\n  A --> B\n  note right of A: one line\n  note left of B : spaced\n"
+     "  note right of B\n    multi\n  end note\n", "state"),
+    ("block-beta\n  columns 3\n  a[\"A\"]:2 b\n  block:group\n    c\n  end\n  a --> c\n", "block"),
+    ("---\ntitle: T\n---\n%% comment\nflowchart TB\n  A --> B\n", "flowchart"),
+])
+def test_valid_diagrams(source, kind):
+    assert check(source) == (kind, [])
+    assert classify(source) == kind
+
+
+@pytest.mark.parametrize("source, expected", [
+    ("flowchart LR\n  A[Call f(x)] --> B\n", (2, 11, "'(' in unquoted node text")),
+    ("flowchart LR\n  A -> B\n", (2, 5, "invalid arrow '->'")),
+    ("flowchart LR\n  end --> B\n", (2, 3, "'end' is reserved")),
+    ("flowchart LR\n  A[\"open --> B\n", (2, 5, "unclosed '\"'")),
+    ("flowchart LR\n  A -->\n", (2, 5, "link has no target node")),
+    ("flowchart XY\n  A --> B\n", (1, 11, "unknown direction 'XY'")),
+    ("flowchart LR\n  subgraph S\n  A --> B\n", (2, 3, "'subgraph' is never closed")),
+    ("sequenceDiagram\n  A->>B\n", (2, 8, "message needs ':'")),
+    ("sequenceDiagram\n  else\n", (2, 3, "'else' is only valid inside 'alt'")),
+    ("stateDiagram-v2\n  Some State --> B\n", (2, 3, "contains spaces")),
+    ("stateDiagram-v2\n  A -> B\n", (2, 5, "invalid arrow '->'")),
+    ("stateDiagram-v2\n  note right of A\n  text\n", (2, 3, "note is never closed")),
+    ("block-beta\n  columns many\n", (2, 11, "'columns' needs a number")),
+    ("pie title Pets\n  \"Dogs\" : 3\n", (1, 1, "unknown diagram type 'pie'")),
+])
+def test_reports_line_and_column(source, expected):
+    _, found = check(source)
+    assert found, "expected an issue"
+    line, column, message = expected
+    assert (found[0].line, found[0].column) == (line, column)
+    assert message in found[0].message
+    assert not found[0].unrecognized
+
+
+def test_multi_line_markdown_string_labels():
+    source = ('flowchart LR\n'
+              '  A["`**Bold** title\n'
+              '  second line (with parens)\n'
+              '  third`"] --> B["`one line`"]\n'
+              '  B -->|"`edge\n'
+              '  label`"| C\n')
+    assert check(source) == ("flowchart", [])
+    block = 'block-beta\n  a["`multi\n  line`"]:2 b\n'
+    assert check(block) == ("block", [])
+
+
+def test_issues_after_a_markdown_string_report_their_own_line():
+    source = 'flowchart LR\n  A["`one\n  two`"] -> B\n'
+    assert check(source)[1] == [SyntaxIssue(3, 10, "invalid arrow '->'; use '-->'")]
+
+
+def test_unclosed_markdown_string():
+    _, found = check('flowchart LR\n  A["`never closed] --> B\n  B --> C\n')
+    assert [(issue.line, issue.column) for issue in found] == [(2, 5)]
+    assert "unclosed '\"`'" in found[0].message
+
+
+def test_unknown_constructs_are_unrecognized_not_errors():
+    # Edge IDs (Mermaid 11) are outside what the checker models
+    assert issues("flowchart LR\n  A e1@--> B\n") == [(2, 5, True)]
+    assert issues("stateDiagram-v2\n  A --> B?\n") == [(2, 9, True)]
+
+
+def test_empty_and_unclosed_frontmatter():
+    assert check("\n\n")[1][0].message == "empty diagram"
+    assert "never closed" in check("---\ntitle: x\nflowchart LR\n")[1][0].message
@@ -0,0 +1,57 @@
+"""Tests for near_duplicates.py."""
+
+import random
+
+import pytest
+
+pytest.importorskip("numpy")
+
+from chunk_store import ChunkStore
+from near_duplicates import (BANDS, DEDUP_THRESHOLD, NUM_PERM, band_keys, find_near_duplicate,
+                             minhash_signature, similarity)
+
+
+def text(seed: int, words: int = 120) -> str:
+    rng = random.Random(seed)
+    return ' '.join(f"word{rng.randrange(5000)}" for _ in range(words))
+
+
+def test_signatures_are_deterministic():
+    signature = minhash_signature(text(1))
+    assert len(signature) == NUM_PERM * 4
+    assert minhash_signature(text(1)) == signature
+    assert len(band_keys(signature)) == BANDS
+    assert band_keys(signature) == band_keys(minhash_signature(text(1)))
+
+
+def test_similarity_tracks_overlap():
+    base = text(1)
+    edited = base.replace(base.split()[60], "changed", 1)
+    assert similarity(minhash_signature(base), minhash_signature(base)) == 1.0
+    assert similarity(minhash_signature(base), minhash_signature(edited)) >= DEDUP_THRESHOLD
+    assert similarity(minhash_signature(base), minhash_signature(text(2))) < 0.2
+
+
+def test_short_and_empty_texts():
+    assert minhash_signature("one two") == minhash_signature("one  two\n")
+    assert len(minhash_signature("")) == NUM_PERM * 4
+
+
+def test_find_near_duplicate_in_store(tmp_path):
+    store = ChunkStore(str(tmp_path / "chunks.sqlite"))
+    for chunk_id, seed in enumerate((1, 2, 3)):
+        signature = minhash_signature(text(seed))
+        store.add_signature(chunk_id, signature, band_keys(signature))
+
+    base = text(2)
+    near = base.replace(base.split()[10], "changed", 1)
+    signature = minhash_signature(near)
+    assert find_near_duplicate(store, signature, band_keys(signature)) == 1
+
+    unrelated = minhash_signature(text(99))
+    assert find_near_duplicate(store, unrelated, band_keys(unrelated)) is None
+    # A stricter threshold than the pair's similarity rejects it
+    assert find_near_duplicate(store, signature, band_keys(signature), threshold=1.01) is None
+    # Excluded rows (a file's own edited-away chunks) are never candidates
+    assert find_near_duplicate(store, signature, band_keys(signature), exclude={1}) is None
+    store.close()
@@ -0,0 +1,119 @@
+"""Tests for optimize_svg.py."""
+
+import io
+import json
+import re
+import xml.etree.ElementTree as ET
+
+import pytest
+
+from optimize_svg import OPTIMIZER_VERSION, generated_svgs, optimize_images, optimize_svg
+
+
+SVG_NS = "http://www.w3.org/2000/svg"
+
+
+def svg(body: str, attributes: str = "") -> str:
+    return f'<svg xmlns="{SVG_NS}"{attributes}>{body}</svg>'
+
+
+def transforms(text: str) -> list[str]:
+    return [element.get("transform") for element in ET.fromstring(text).iter()
+            if element.get("transform")]
+
+
+def test_rounds_coordinates_and_translations():
+    result = optimize_svg(svg('<rect x="1.23456" width="10.005" height="2.5"/>'
+                              '<g transform="translate(12.3456 7.891011) rotate(45.12345)"/>'))
+    assert 'x="1.23"' in result
+    assert 'height="2.5"' in result
+    assert 'transform="translate(12.35 7.89) rotate(45.12)"' in result
+
+
+def test_keeps_scale_and_matrix_factors():
+    # Matplotlib draws each glyph with scale(0.015625); rounding it to 0.02
+    # made every glyph 28% too large
+    source = svg('<g transform="translate(10.123456 20) scale(0.015625)"/>'
+                 '<g transform="scale(0.085)"/>'
+                 '<g transform="matrix(0.105 0 0 -0.105 1.23456 2)"/>'
+                 '<g style="transform: scale(0.333333)"/>')
+    result = optimize_svg(source)
+    assert transforms(result) == ["translate(10.12 20) scale(0.015625)", "scale(0.085)",
+                                  "matrix(0.105 0 0 -0.105 1.23456 2)"]
+    assert "scale(0.333333)" in result
+
+
+def test_matplotlib_glyph_transforms_survive():
+    matplotlib = pytest.importorskip("matplotlib")
+    matplotlib.use("Agg")
+    import matplotlib.pyplot as plt
+
+    fig, ax = plt.subplots()
+    ax.bar(["Q1", "Q2"], [3, 5])
+    ax.set_title("Revenue")
+    buffer = io.StringIO()
+    with matplotlib.rc_context({"svg.fonttype": "path", "svg.hashsalt": "test"}):
+        fig.savefig(buffer, format="svg")
+    plt.close(fig)
+    source = buffer.getvalue()
+
+    scales = re.findall(r"scale\(([^)]*)\)", source)
+    assert "0.015625" in scales
+    result = optimize_svg(source)
+    assert re.findall(r"scale\(([^)]*)\)", result) == scales
+    assert len(result) < len(source)
+    assert "<metadata" not in result
+
+
+def test_strips_metadata_comments_and_duplicate_css():
+    source = svg('<!-- generated --><metadata><title>x</title></metadata>'
+                 '<style>.a { fill: red; }\n.b { fill: blue; }</style>'
+                 '<style>.a { fill: red; }</style><rect class="a"/>')
+    result = optimize_svg(source)
+    assert "generated" not in result and "metadata" not in result
+    # The later copy of a repeated rule is the one kept
+    assert "<style>.b{fill: blue}</style><style>.a{fill: red}</style>" in result
+
+
+def test_is_idempotent_and_leaves_invalid_xml_alone():
+    once = optimize_svg(svg('\n  <path d="M 0.123456 1\nL 2 3\nz"/>\n'))
+    assert optimize_svg(once) == once
+    assert 'd="M 0.12 1 L 2 3 z"' in once
+    broken = "<svg><g></svg>"
+    assert optimize_svg(broken) == broken
+
+
+def test_only_generated_svgs_are_rewritten(tmp_path):
+    hand = svg('<!-- mine --><rect width="1.23456"/>')
+    diagram = svg('<!-- generated --><rect width="1.23456"/>')
+    chart = svg('<rect width="9.87654"/>')
+    (tmp_path / "hand.svg").write_text(hand)
+    (tmp_path / "diagram-0123456789abcdef.svg").write_text(diagram)
+    (tmp_path / "chart-1.svg").write_text(chart)
+    (tmp_path / ".charts-manifest.json").write_text(
+        json.dumps({"make.py": {"key": "k", "outputs": ["chart-1.svg"]}}))
+
+    assert generated_svgs(tmp_path) == {"diagram-0123456789abcdef.svg", "chart-1.svg"}
+    stats = optimize_images(tmp_path, quiet=True)
+    assert stats.optimized == 2
+    assert (tmp_path / "hand.svg").read_text() == hand
+    assert 'width="1.23"' in (tmp_path / "diagram-0123456789abcdef.svg").read_text()
+    assert 'width="9.88"' in (tmp_path / "chart-1.svg").read_text()
+
+    again = optimize_images(tmp_path, quiet=True)
+    assert (again.optimized, again.cached) == (0, 2)
+    manifest = json.loads((tmp_path / ".svg-manifest.json").read_text())
+    assert manifest["chart-1.svg"]["version"] == OPTIMIZER_VERSION
+    assert "version" not in manifest["hand.svg"]
+
+
+def test_optimizer_version_is_part_of_diagram_key():
+    import render_mermaid
+
+    key = render_mermaid.diagram_key("graph TD\n", "neutral", "white", "11.0.0")
+    original = render_mermaid.OPTIMIZER_VERSION
+    try:
+        render_mermaid.OPTIMIZER_VERSION = original + "-next"
+        assert render_mermaid.diagram_key("graph TD\n", "neutral", "white", "11.0.0") != key
+    finally:
+        render_mermaid.OPTIMIZER_VERSION = original
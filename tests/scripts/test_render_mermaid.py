@@ -0,0 +1,49 @@
+"""Tests for render_mermaid.py."""
+
+import pytest
+
+import render_mermaid
+import watch_deck
+from mermaid_renderer import RendererUnavailable
+
+
+DECK = "# Flow\n\n```mermaid bg right:40%\ngraph TD\n  A --> B\n```\n\n```python\nx = 1\n```\n"
+
+
+@pytest.fixture
+def deck(tmp_path):
+    path = tmp_path / "deck.md"
+    path.write_text(DECK)
+    return path
+
+
+def test_missing_cli_raises_instead_of_exiting(deck, monkeypatch):
+    monkeypatch.setattr(render_mermaid, "cli_version", lambda: None)
+    with pytest.raises(RendererUnavailable, match="Mermaid CLI not found"):
+        render_mermaid.render_deck(deck)
+    assert not deck.with_name("deck.rendered.md").exists()
+
+
+def test_watch_mode_survives_missing_cli(deck, monkeypatch, capsys):
+    monkeypatch.setattr(render_mermaid, "cli_version", lambda: None)
+    watcher = watch_deck.DeckWatcher(deck, preview=False)
+    assert "not rendered" in watcher.render()
+    assert "Mermaid CLI not found" in capsys.readouterr().out
+
+
+def test_cached_diagrams_render_without_a_browser(deck, monkeypatch):
+    monkeypatch.setattr(render_mermaid, "cli_version", lambda: "11.0.0")
+    source = "graph TD\n  A --> B\n"
+    name = f"diagram-{render_mermaid.diagram_key(source, 'neutral', 'white', '11.0.0')}.svg"
+    (deck.parent / "img").mkdir()
+    (deck.parent / "img" / name).write_text("<svg/>")
+
+    def no_renderer(*args, **kwargs):
+        raise AssertionError("renderer started for a cached diagram")
+    monkeypatch.setattr(render_mermaid, "MermaidRenderer", no_renderer)
+
+    assert render_mermaid.render_deck(deck, theme="neutral", background="white") == 0
+    rendered = deck.with_name("deck.rendered.md").read_text()
+    assert f"![bg right:40%](img/{name})" in rendered
+    assert "```python\nx = 1\n```" in rendered
+    assert "```mermaid" not in rendered
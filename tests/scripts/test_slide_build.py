@@ -0,0 +1,69 @@
+"""Tests for slide_build.py's per-slide documents."""
+
+from deck_parser import parse_deck
+from slide_build import FULL_RENDER_FRACTION, render_whole_deck, slide_documents
+
+
+def documents(text: str):
+    return slide_documents(parse_deck(text))
+
+
+def test_unpaginated_slides_get_one_page_documents():
+    docs = documents("---\nmarp: true\ntheme: plato\n---\n\n# One\n\n---\n\n# Two\n")
+    assert [page for _, page, _ in docs] == [0, 0]
+    first, second = (document for document, _, _ in docs)
+    assert first.startswith("---\nmarp: true\ntheme: plato\n---\n")
+    assert "# One" in first and "# Two" not in first
+    assert "# Two" in second and "# One" not in second
+
+
+def test_documents_carry_inherited_directives_globals_and_styles():
+    text = ("---\nmarp: true\n---\n\n<!-- class: lead -->\n<!-- title: Deck -->\n# One\n\n"
+            "<style>h1 { color: red; }</style>\n\n---\n\n"
+            "<!-- _class: dark -->\n# Two\n\n---\n\n# Three\n")
+    docs = [document for document, _, _ in documents(text)]
+    # Globals and unscoped styles reach every slide
+    assert all("title: Deck" in document for document in docs)
+    assert all(document.count("<style>h1 { color: red; }</style>") == 1 for document in docs)
+    # Local directives are inherited from earlier slides only
+    assert "<!--\nclass: lead\n-->" not in docs[0]
+    assert "<!--\nclass: lead\n-->" in docs[1]
+    assert "<!--\nclass: lead\n-->" in docs[2]
+    assert "_class: dark" not in docs[2]
+
+
+def test_paginated_slides_keep_their_position():
+    text = ("---\nmarp: true\npaginate: true\n---\n\n# One\n\n---\n\n"
+            "<!-- _paginate: false -->\n# Two\n\n---\n\n# Three\n")
+    docs = documents(text)
+    assert [page for _, page, _ in docs] == [0, 1, 2]
+    document, page, slide = docs[2]
+    pages = document.split("\n---\n")[1:]   # after the frontmatter
+    assert len(pages) == 3
+    assert pages[0].strip() == "<!-- _paginate: true -->"
+    assert pages[1].strip() == "<!-- _paginate: false -->"
+    assert "# Three" in pages[2] and slide.title == "Three"
+
+
+def test_heading_divider_decks_are_not_split():
+    assert documents("---\nmarp: true\nheadingDivider: 2\n---\n\n# One\n\n## Two\n") is None
+    assert documents("# One\n\n<!-- headingDivider: 2 -->\n\n## Two\n") is None
+
+
+def test_documents_ignore_separators_inside_code():
+    docs = documents("# One\n\n```yaml\n---\nkey: value\n---\n```\n\n---\n\n# Two\n")
+    assert len(docs) == 2
+    assert "key: value" in docs[0][0]
+
+
+def test_paginated_decks_render_whole_once_two_slides_miss():
+    paginated = documents("---\npaginate: true\n---\n\n" + "\n\n---\n\n".join(
+        f"# Slide {i}" for i in range(20)))
+    plain = documents("\n\n---\n\n".join(f"# Slide {i}" for i in range(20)))
+    # Each paginated document renders every page, so two misses already
+    # cost more than one render of the deck
+    assert not render_whole_deck(paginated, 1)
+    assert render_whole_deck(paginated, 2)
+    assert not render_whole_deck(plain, 2)
+    assert not render_whole_deck(plain, int(FULL_RENDER_FRACTION * 20))
+    assert render_whole_deck(plain, int(FULL_RENDER_FRACTION * 20) + 1)